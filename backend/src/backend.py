@@ -4,19 +4,34 @@ Supports plugin-based patterns and system event hooks
 Works with Pi5Neo library
 """
 
+import functools
+import itertools
 import os
-import importlib.util
-import inspect
 import queue
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Mapping
 import threading
-from config import PATTERN_FILE, PATTERN_LOCATION, HOOK_FILE 
+import time
+from config import (PATTERN_FILE, PATTERN_LOCATION, HOOK_FILE, PLUGIN_INDEX_FILE, COMPOSITE_HOOKS,
+                    HOOK_BREAKER_FAILURES, HOOK_BREAKER_COOLDOWN, HOOK_BREAKER_MAX_COOLDOWN, HOOK_SLOW_CHECK,
+                    PERSIST_DELAY, PERSIST_MAX_DELAY, STATE_DB, LEGACY_STARTUP_FILE)
+from plugin_registry import PluginRegistry, LazyPluginMap
+from event_bus import EventBus
+from hook_breaker import CircuitBreaker
+from ipc_metrics import IPCMetrics
+from manager_actor import ManagerActor
+from state_store import StateStore
+from write_behind import WriteBehind
 
 class PatternBase(ABC):
     """Base class that all pattern plugins must inherit from"""
     
+    # Saved parameters ({name: JSON value}) and zones ([{"name", "start", "length"}]),
+    # set by the manager before run() and replaced when they are changed
+    params: dict = {}
+    zones: list = []
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -76,86 +91,305 @@ class SystemEventHook(ABC):
         return None
 
 
+def _command(method):
+    """Run a PatternManager method on the manager actor thread and wait for its result"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.actor.call(method.__name__, functools.partial(method, self, *args, **kwargs))
+    return wrapper
+
+
 class PatternManager:
-    """Manages pattern plugins and system hooks"""
-    
-    def __init__(self, neo, patterns_dir: str = "./patterns", hooks_dir: str = "./hooks"):
+    """Manages pattern plugins and system hooks
+
+    Methods that change the running pattern, links or startup patterns are
+    @_command methods: they run one at a time on the manager actor thread,
+    whichever thread calls them. Other threads read state through
+    snapshot(); links and startup patterns are replaced rather than mutated,
+    so a reference taken by a reader never changes under it.
+    """
+    
+    def __init__(self, neo, patterns_dir: str = "./patterns", hooks_dir: str = "./hooks",
+                 data_dir: str = PATTERN_LOCATION, legacy_startup_file: str = LEGACY_STARTUP_FILE):
+        """
+        Args:
+            neo: LED strip (Pi5Neo, or a StripProxy/SimulatedStrip)
+            patterns_dir: Directory of pattern plugins
+            hooks_dir: Directory of hook plugins
+            data_dir: Where the state store and plugin index live; its legacy
+                pattern/hook files are migrated into the store on the first open
+            legacy_startup_file: Startup list from before the store, migrated along
+        """
         self.neo = neo
+        self.data_dir = data_dir
         self.patterns_dir = Path(patterns_dir)
         self.hooks_dir = Path(hooks_dir)
-        self.patterns: Dict[str, PatternBase] = {}
-        self.hooks: List[SystemEventHook] = []
+        self.hooks: List[SystemEventHook] = []  # Imported hooks only; see hook_names()
+        self.composite_parents: Dict[str, list] = {}  # child event_name -> [CompositeHook]
+        self._composites = None
+        self._hooks_generation = None
+        self._all_hooks_generation = None  # Registry generation after the last load_all()
         self.current_pattern = None
         self.stop_event = threading.Event()
         self.pattern_thread = None
         self.startup_patterns = []
         self.startup_links = {}
         self.alert_queue = queue.Queue()  # Queue for hook messages to patterns
+        self.startup_profile = None  # StartupProfile, set by run_service
+        self.events = EventBus()  # pattern/hook/link/error events for subscribers
+        # Runs every state change in order on one thread (see _command)
+        self.actor = ManagerActor()
+        self.actor.start()
+        # Versioned, cached view of the state that IPC reads are served from
+        # Starts at the wall clock in ms, so a client holding a version from before a
+        # service restart can't mistake the new state for the one it has
+        self._state_version = time.time_ns() // 1_000_000
+        self._snapshot = None
+        self._snapshot_key = None
+        self._snapshot_lock = threading.Lock()
+        # Persistent files are written from memory, coalesced and atomically (see write_behind)
+        self.persistence = WriteBehind(PERSIST_DELAY, PERSIST_MAX_DELAY)
+        self.persistence.start()
+        # Saved pattern, links, startup lists, pattern params and zones, read once (see state_store)
+        self.store = StateStore(
+            os.path.join(data_dir, STATE_DB), self.persistence,
+            legacy_files=[os.path.join(data_dir, PATTERN_FILE),
+                          os.path.join(data_dir, HOOK_FILE), legacy_startup_file])
+        self.store.open()
+        # Hook check times and circuit breakers, by event name
+        self.hook_timings = IPCMetrics(name="wopr_hook_check", label="hook",
+                                       description="Time spent in hook checks.")
+        self._hook_breakers = {}  # event_name -> (hook instance, CircuitBreaker)
         
         # Create directories if they don't exist
         self.patterns_dir.mkdir(exist_ok=True)
         self.hooks_dir.mkdir(exist_ok=True)
         
-    def load_patterns(self) -> List[str]:
-        """Load all pattern plugins from patterns directory"""
-        self.patterns.clear()
+        # Loaded plugins, keyed by file path/mtime/size
+        self._pattern_registry = PluginRegistry(
+            self.patterns_dir, PatternBase, "pattern",
+            describe=lambda p: {"name": p.name, "description": p.description})
+        self._hook_registry = PluginRegistry(
+            self.hooks_dir, SystemEventHook, "hook",
+            describe=lambda h: {"name": h.event_name})
+        self._index_lock = threading.Lock()
+        # name -> PatternBase; a pattern's file is imported on first access
+        self.patterns: Mapping[str, PatternBase] = LazyPluginMap(self._pattern_registry)
         
-        for file_path in self.patterns_dir.glob("*.py"):
-            if file_path.name.startswith("_"):
-                continue
-                
-            try:
-                # Load module dynamically
-                spec = importlib.util.spec_from_file_location(
-                    file_path.stem, file_path
-                )
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Find PatternBase subclasses
-                for name, obj in inspect.getmembers(module, inspect.isclass):
-                    if (issubclass(obj, PatternBase) and 
-                        obj is not PatternBase and
-                        not inspect.isabstract(obj)):
-                        
-                        pattern = obj()
-                        self.patterns[pattern.name] = pattern
-                        print(f"Loaded pattern: {pattern.name}")
-                        
-            except Exception as e:
-                print(f"Error loading pattern {file_path.name}: {e}")
+    def load_patterns(self) -> List[str]:
+        """Load pattern plugins, re-importing only files that changed since the last call.
         
+        Files that match the plugin index are not imported until a pattern
+        from them is first used.
+        """
+        self._pattern_registry.scan()
+        self._save_plugin_index()
         return list(self.patterns.keys())
     
     def load_hooks(self) -> List[str]:
-        """Load all system event hooks"""
-        self.hooks.clear()
+        """Load system event hooks, re-importing only files that changed since the last call.
         
-        for file_path in self.hooks_dir.glob("*.py"):
-            if file_path.name.startswith("_"):
-                continue
-                
+        Hooks from unchanged files keep their instance, and with it their state.
+        Files that match the plugin index are not imported until the hook has a consumer.
+        """
+        if self._composites is None:
+            self._load_composite_hooks()
+        self._hook_registry.scan()
+        self._refresh_hooks()
+        self._save_plugin_index()
+        return self.hook_names()
+    
+    def load_plugin_index(self) -> bool:
+        """Prime the plugin registries from the persisted index, without importing anything"""
+        index_file = os.path.join(self.data_dir, PLUGIN_INDEX_FILE)
+        try:
+            with open(index_file, 'r') as f:
+                import json
+                data = json.load(f)
+            self._pattern_registry.load_index(data.get("patterns", {}))
+            self._hook_registry.load_index(data.get("hooks", {}))
+            print(f"Loaded plugin index: {len(self._pattern_registry.names())} patterns, "
+                  f"{len(self._hook_registry.names())} hooks")
+            return True
+        except FileNotFoundError:
+            print("No plugin index found, plugins will be imported")
+        except Exception as e:
+            print(f"Error loading plugin index: {e}")
+        return False
+    
+    def _save_plugin_index(self):
+        """Write the plugin index if anything changed since it was last written"""
+        index_file = os.path.join(self.data_dir, PLUGIN_INDEX_FILE)
+        # Patterns and hooks may be loaded on different threads at boot
+        with self._index_lock:
+            if not (self._pattern_registry.index_dirty or self._hook_registry.index_dirty):
+                return
             try:
-                spec = importlib.util.spec_from_file_location(
-                    file_path.stem, file_path
-                )
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Find SystemEventHook subclasses
-                for name, obj in inspect.getmembers(module, inspect.isclass):
-                    if (issubclass(obj, SystemEventHook) and 
-                        obj is not SystemEventHook and
-                        not inspect.isabstract(obj)):
-                        
-                        hook = obj()
-                        self.hooks.append(hook)
-                        print(f"Loaded hook: {hook.event_name}")
-                        
+                data = {
+                    "patterns": self._pattern_registry.index_data(),
+                    "hooks": self._hook_registry.index_data(),
+                }
+                import json
+                self.persistence.write(index_file, json.dumps(data, indent=2))
             except Exception as e:
-                print(f"Error loading hook {file_path.name}: {e}")
+                print(f"Error saving plugin index: {e}")
+    
+    def reload_plugin_file(self, file_path) -> bool:
+        """Reload a single changed pattern or hook file (used by the plugin watcher).
+        
+        The file is imported on the calling thread, so a slow import never
+        holds up other commands; the manager state is then updated as one
+        command on the actor. If the running pattern came from that file, it
+        is restarted with the new class at the next frame boundary.
+        """
+        file_path = Path(file_path)
+        if file_path.parent == self.patterns_dir:
+            registry = self._pattern_registry
+        elif file_path.parent == self.hooks_dir:
+            registry = self._hook_registry
+        else:
+            return False
+        
+        changed = registry.reload_file(file_path)
+        if changed:
+            self._plugin_file_reloaded(file_path)
+        return changed
+    
+    @_command
+    def _plugin_file_reloaded(self, file_path: Path):
+        """Pick up a reloaded file's plugins: rebuild the hook list, save the index, swap the running pattern"""
+        self._refresh_hooks()
+        self._save_plugin_index()
+        
+        current = self.current_pattern
+        if current is None or self._pattern_registry.path_of(current.name) != file_path:
+            return
+        replacement = self.patterns.get(current.name)
+        if replacement is not None and replacement is not current:
+            print(f"Pattern changed on disk, swapping: {current.name}")
+            self.swap_pattern(current.name)
+    
+    def swap_pattern(self, pattern_name: str):
+        """Restart the running pattern with its current instance at the next frame boundary"""
+        wait_for_frame = getattr(self.neo, "wait_for_frame", None)
+        if wait_for_frame:
+            wait_for_frame(timeout=1.0)
+        if self.current_pattern is not None and self.current_pattern.name == pattern_name:
+            self.start_pattern(pattern_name)
+    
+    def _refresh_hooks(self):
+        """Rebuild self.hooks if the set of imported hooks changed"""
+        if self._hooks_generation == self._hook_registry.generation:
+            return
+        self._hooks_generation = self._hook_registry.generation
+        # Rebind rather than mutate, so a check_hooks pass iterating the old list is unaffected
+        self.hooks = self._hook_registry.instances() + (self._composites or [])
+    
+    def frame_bytes(self) -> bytes:
+        """Current LED colors in the strip buffer, as packed RGB bytes (3 per LED)"""
+        state = getattr(self.neo, "led_state", None) or ()
+        return bytes(itertools.chain.from_iterable(state))
+    
+    def state_changed(self):
+        """Bump the state version after changing links, startup patterns or the running pattern"""
+        with self._snapshot_lock:
+            self._state_version += 1
+    
+    def snapshot(self) -> dict:
+        """
+        Current state as an immutable dict with a monotonically increasing "version".
+        
+        The dict is rebuilt only after state_changed() or when the set of
+        plugins changed; otherwise the cached one is returned. Callers must
+        not modify it.
+        """
+        with self._snapshot_lock:
+            key = (self._pattern_registry.generation, self._hook_registry.generation,
+                   self._composites is not None)
+            if key != self._snapshot_key:
+                self._snapshot_key = key
+                self._state_version += 1
+            if self._snapshot is not None and self._snapshot["version"] == self._state_version:
+                return self._snapshot
+            
+            persistent = self.load_persistent_data()
+            startup_links = dict(self.startup_links)
+            hook_names = self.hook_names()
+            current = self.current_pattern
+            self._snapshot = {
+                "version": self._state_version,
+                "current_pattern": current.name if current else None,
+                "patterns": list(self.patterns.keys()),
+                "hooks": hook_names,
+                "startup_patterns": list(self.startup_patterns),
+                "startup_links": startup_links,
+                "hook_pattern_links": {h: startup_links.get(h) for h in hook_names},
+                "persistent_links": persistent.get("linked", {}),
+                "standalone_patterns": persistent.get("standalone", []),
+            }
+            return self._snapshot
+    
+    def hook_names(self) -> List[str]:
+        """Event names of all hooks, including ones not imported yet"""
+        return self._hook_registry.names() + [c.event_name for c in self._composites or ()]
+    
+    def has_hook(self, event_name: str) -> bool:
+        return event_name in self.hook_names()
+    
+    def get_hook(self, event_name: str) -> SystemEventHook:
+        """Get a hook by event name, importing it on first use"""
+        for composite in self._composites or ():
+            if composite.event_name == event_name:
+                return composite
+        hook = self._hook_registry.load(event_name)
+        self._refresh_hooks()
+        return hook
+    
+    def _consumed_hook_names(self) -> set:
+        """Hooks that are linked to a pattern, directly or through a linked composite"""
+        names = set()
+        pending = list(self.startup_links)
+        while pending:
+            name = pending.pop()
+            if name in names:
+                continue
+            names.add(name)
+            for composite in self._composites or ():
+                if composite.event_name == name:
+                    pending.extend(composite.children)
+        return names
+    
+    def _ensure_hooks_loaded(self):
+        """Import hooks on first use: linked ones, or all of them once a pattern is running"""
+        if self.current_pattern is not None:
+            generation = self._hook_registry.generation
+            if generation == self._all_hooks_generation:
+                return  # Every hook was imported and the registry hasn't changed since
+            if not self._hook_registry.load_all():
+                self._all_hooks_generation = generation
+        else:
+            for name in self._consumed_hook_names():
+                if name in self._hook_registry:
+                    self._hook_registry.load(name)
+        self._refresh_hooks()
+    
+    def _load_composite_hooks(self):
+        """Create composite hooks from config, after the hooks they combine"""
+        from composite_hooks import build_composite_hooks
         
-        return [hook.event_name for hook in self.hooks]
+        self._composites = build_composite_hooks(COMPOSITE_HOOKS)
+        self.composite_parents = {}
+        for composite in self._composites:
+            for child in composite.children:
+                self.composite_parents.setdefault(child, []).append(composite)
+            print(f"Loaded composite hook: {composite.event_name}")
+    
+    def _feeds_linked_hook(self, event_name: str) -> bool:
+        """True if a composite built on this hook (directly or nested) is linked"""
+        for parent in self.composite_parents.get(event_name, ()):
+            if parent.event_name in self.startup_links or self._feeds_linked_hook(parent.event_name):
+                return True
+        return False
     
     def get_pattern(self, name: str) -> PatternBase:
         """Get a pattern by name"""
@@ -172,12 +406,23 @@ class PatternManager:
         return None
     
     def get_all_patterns_info(self) -> List[Dict[str, str]]:
-        """Get info for all patterns"""
+        """Get info for all patterns (from the plugin index, without importing them)"""
         return [
-            {"name": p.name, "description": p.description}
-            for p in self.patterns.values()
+            {"name": m["name"], "description": m["description"]}
+            for m in self._pattern_registry.describe_all()
         ]
     
+    def execute(self, name: str, fn: Callable, *args):
+        """Run fn(*args) as one command on the manager actor, so no other change
+        interleaves with it (e.g. an IPC batch); returns its result
+
+        Args:
+            name: Command name the queue and run timings are recorded under
+            fn: Callable to run; manager commands it calls run inline
+        """
+        return self.actor.call(name, fn, *args)
+    
+    @_command
     def start_pattern(self, pattern_name: str):
         """Start running a pattern"""
         if self.pattern_thread and self.pattern_thread.is_alive():
@@ -188,202 +433,255 @@ class PatternManager:
             raise ValueError(f"Pattern '{pattern_name}' not found")
         
         self.current_pattern = pattern
+        pattern.params = self.store.params(pattern_name)
+        pattern.zones = self.store.zones(pattern_name)
         self.stop_event.clear()
         # Create a fresh alert queue for this pattern
         self.alert_queue = queue.Queue()
         
+        pattern_started = getattr(self.neo, "pattern_started", None)
+        if pattern_started:
+            pattern_started()  # Frame timing starts over for the new pattern
+        
         self.pattern_thread = threading.Thread(
-            target=pattern.run,
-            args=(self.neo, self.stop_event, self.alert_queue),
+            target=self._run_pattern,
+            args=(pattern, self.stop_event, self.alert_queue),
             daemon=True
         )
         self.pattern_thread.start()
         print(f"Started pattern: {pattern_name}")
+        self.state_changed()
+        self.events.publish("pattern", {"event": "started", "name": pattern_name})
         
     
+    def _run_pattern(self, pattern: PatternBase, stop_event: threading.Event, alert_queue: queue.Queue):
+        """Pattern thread body; reports a crashing pattern instead of dying silently"""
+        try:
+            pattern.run(self.neo, stop_event, alert_queue)
+        except Exception as e:
+            print(f"Pattern {pattern.name} crashed: {e}")
+            self.events.publish("error", {"source": "pattern", "name": pattern.name, "error": str(e)})
+    
+    @_command
     def stop_pattern(self):
         """Stop the currently running pattern"""
         if self.pattern_thread and self.pattern_thread.is_alive():
             self.stop_event.set()
             self.pattern_thread.join(timeout=2.0)
-            
+        
             if self.current_pattern:
                 self.current_pattern.cleanup(self.neo)
                 print(f"Stopped pattern: {self.current_pattern.name}")
-            
+                self.events.publish("pattern", {"event": "stopped", "name": self.current_pattern.name})
+        
             self.current_pattern = None
+            self.state_changed()
         # AUTO-SAVE: Clear saved pattern
         self.clear_pattern()
     
+    @_command
     def save_pattern(self, pattern_name: str):
         """Save the pattern to persist across reboots"""
-        file_name = file_name = os.path.join(PATTERN_LOCATION, PATTERN_FILE)
-        try:
-            os.makedirs(PATTERN_LOCATION, exist_ok=True) 
-            with open(file_name, 'w') as f:
-                f.write(pattern_name)
+        if self.store.set_pattern(pattern_name):
             print(f"Saved pattern: {pattern_name}")
-        except Exception as e:
-            print(f"Error saving pattern: {e}")
     
+    @_command
     def clear_pattern(self):
-        """Clear the saved pattern"""
-        file_name = file_name = os.path.join(PATTERN_LOCATION, PATTERN_FILE)
-        try:
-            if os.path.exists(file_name):
-                os.remove(file_name)
-                print("Cleared pattern")
-        except Exception as e:
-            print(f"Error clearing pattern: {e}")
+        """Clear the saved pattern (only touches the disk if one was saved)"""
+        if self.store.set_pattern(None):
+            print("Cleared pattern")
     
     def load_pattern(self):
-        """Load and start the pattern from file"""
-        file_name = file_name = os.path.join(PATTERN_LOCATION, PATTERN_FILE)
+        """Start the saved pattern (from the state store, already in memory)"""
         try:
-            with open(file_name, 'r') as f:
-                pattern_name = f.read().strip()
-                if pattern_name and pattern_name in self.patterns:
-                    print(f"Restoring pattern: {pattern_name}")
-                    self.start_pattern(pattern_name)
-                    return True
-        except FileNotFoundError:
-            print("No saved pattern found")
+            pattern_name = self.store.pattern
+            if not pattern_name:
+                print("No saved pattern found")
+            elif pattern_name in self.patterns:
+                print(f"Restoring pattern: {pattern_name}")
+                self.start_pattern(pattern_name)
+                return True
         except Exception as e:
             print(f"Error loading pattern: {e}")
         return False
     
+    def pattern_config(self, pattern_name: str) -> dict:
+        """Saved parameters and zones of a pattern"""
+        return {"params": self.store.params(pattern_name), "zones": self.store.zones(pattern_name)}
+    
+    @_command
+    def set_pattern_params(self, pattern_name: str, params: dict):
+        """Save a pattern's parameters (raises ValueError); a running pattern sees them at once"""
+        self.store.set_params(pattern_name, params)
+        if self.current_pattern and self.current_pattern.name == pattern_name:
+            self.current_pattern.params = self.store.params(pattern_name)
+    
+    @_command
+    def set_pattern_zones(self, pattern_name: str, zones: list):
+        """Save a pattern's zones (raises ValueError); a running pattern sees them at once"""
+        self.store.set_zones(pattern_name, zones)
+        if self.current_pattern and self.current_pattern.name == pattern_name:
+            self.current_pattern.zones = self.store.zones(pattern_name)
+    
     def check_hooks(self):
-        """Check all system hooks and trigger if needed"""
+        """Check all system hooks and trigger if needed
+
+        Linked patterns are started through the actor without waiting, so a
+        slow pattern change never delays the next hook check.
+        """
+        self._ensure_hooks_loaded()
+        startup_links = self.startup_links  # Replaced, never mutated
         for hook in self.hooks:
             try:
                 # Only check hooks that have a purpose:
-                # 1. They're linked to a pattern, OR
+                # 1. They're linked to a pattern (directly or through a composite), OR
                 # 2. A pattern is running that can receive alerts
-                hook_has_link = hook.event_name in self.startup_links
+                hook_has_link = (hook.event_name in startup_links or
+                                 self._feeds_linked_hook(hook.event_name))
                 pattern_is_running = self.current_pattern is not None
                 
                 # Skip this hook if it has no purpose
                 if not hook_has_link and not pattern_is_running:
                     continue
                 
-                if hook.check():
+                # Skip a hook that keeps failing until its breaker lets a trial through
+                breaker = self._hook_breaker(hook)
+                if not breaker.allow():
+                    continue
+                
+                start = time.perf_counter()
+                try:
+                    triggered = hook.check()
+                except Exception as e:
+                    self._hook_checked(hook, breaker, time.perf_counter() - start, str(e))
+                    raise
+                self._hook_checked(hook, breaker, time.perf_counter() - start, None)
+                
+                if triggered:
                     print(f"Event triggered: {hook.event_name}")
                     
                     # Check if this hook is linked to a pattern
-                    linked_pattern = self.startup_links.get(hook.event_name)
+                    linked_pattern = startup_links.get(hook.event_name)
+                    
+                    message = hook.get_message()
+                    
+                    if message:
+                        self.events.publish("hook", {
+                            "hook": hook.event_name,
+                            "level": message.alert_level.name if message.alert_level else None,
+                            "color": list(message.color) if message.color else None,
+                            "metadata": message.metadata,
+                        })
+                    
+                    # Composites built on this hook are re-evaluated later in this pass
+                    if message:
+                        for parent in self.composite_parents.get(hook.event_name, ()):
+                            parent.child_changed(hook.event_name, message.alert_level)
                     
                     # Try to send alert message to currently running pattern
-                    if self.current_pattern and hasattr(self, 'alert_queue'):
-                        message = hook.get_message()
+                    alert_queue = self.alert_queue
+                    if self.current_pattern and alert_queue is not None:
                         if message:
                             try:
-                                self.alert_queue.put_nowait(message)
+                                alert_queue.put_nowait(message)
                                 print(f"Sent alert from {hook.event_name} to running pattern: {message}")
                             except queue.Full:
                                 print(f"Alert queue full, message from {hook.event_name} dropped")
                     
                     if linked_pattern and linked_pattern in self.patterns:
                         print(f"Starting linked pattern: {linked_pattern}")
-                        self.start_pattern(linked_pattern)
+                        future = self.actor.submit("start_pattern", self.start_pattern, linked_pattern)
+                        future.add_done_callback(functools.partial(self._linked_start_done, linked_pattern))
             except Exception as e:
                 print(f"Error checking hook {hook.event_name}: {e}")
-    
+                self.events.publish("error", {"source": "hook", "name": hook.event_name, "error": str(e)})
+    
+    def _hook_breaker(self, hook) -> CircuitBreaker:
+        """The hook's breaker; a reloaded hook (new instance) starts with a closed one"""
+        entry = self._hook_breakers.get(hook.event_name)
+        if entry is None or entry[0] is not hook:
+            entry = (hook, CircuitBreaker(HOOK_BREAKER_FAILURES, HOOK_BREAKER_COOLDOWN,
+                                          HOOK_BREAKER_MAX_COOLDOWN))
+            self._hook_breakers[hook.event_name] = entry
+        return entry[1]
+    
+    def _hook_checked(self, hook, breaker: CircuitBreaker, seconds: float, error):
+        """Time one check and feed the result (a slow check is a failure) to its breaker"""
+        if error is None and seconds > HOOK_SLOW_CHECK:
+            error = f"check took {seconds:.2f}s"
+        self.hook_timings.observe(hook.event_name, seconds, error is None)
+        if breaker.record(error is None, error):
+            print(f"Hook {hook.event_name} disabled for {breaker.cooldown:.0f}s after failing: {error}")
+            self.events.publish("error", {"source": "hook", "name": hook.event_name,
+                                          "error": f"circuit open for {breaker.cooldown:.0f}s: {error}"})
+    
+    def hook_stats(self) -> dict:
+        """Check time and breaker state of every hook checked so far"""
+        timings = self.hook_timings.snapshot()["actions"]
+        breakers = dict(self._hook_breakers)
+        return {name: {**timings.get(name, {}), "breaker": breaker.snapshot()}
+                for name, (_, breaker) in sorted(breakers.items())}
+    
+    def _linked_start_done(self, pattern_name: str, future):
+        error = future.exception()
+        if error is not None:
+            print(f"Failed to start linked pattern '{pattern_name}': {error}")
+            self.events.publish("error", {"source": "pattern", "name": pattern_name, "error": str(error)})
+    
+    @_command
+    def link_hook(self, hook_event_name: str, pattern_name: str):
+        """Start pattern_name whenever the hook triggers (runtime link)"""
+        self.startup_links = {**self.startup_links, hook_event_name: pattern_name}
+        self.state_changed()
+    
+    @_command
+    def unlink_hook(self, hook_event_name: str) -> bool:
+        """Remove a runtime hook link; returns False if the hook was not linked"""
+        if hook_event_name not in self.startup_links:
+            return False
+        self.startup_links = {k: v for k, v in self.startup_links.items() if k != hook_event_name}
+        self.state_changed()
+        return True
+    
+    @_command
     def save_persistent_link(self, hook_event_name: str, pattern_name: str):
         """Save a hook-pattern link to persistent storage"""
-        try:
-            data = self.load_persistent_data()
-            if "linked" not in data:
-                data["linked"] = {}
-            data["linked"][hook_event_name] = pattern_name
-            
-            self._write_persistent_data(data)
+        if self.store.set_link(hook_event_name, pattern_name):
+            self.state_changed()
             print(f"Saved persistent link: {hook_event_name} → {pattern_name}")
-        except Exception as e:
-            print(f"Error saving persistent link: {e}")
     
+    @_command
     def remove_persistent_link(self, hook_event_name: str):
         """Remove a hook-pattern link from persistent storage"""
-        try:
-            data = self.load_persistent_data()
-            if "linked" in data and hook_event_name in data["linked"]:
-                del data["linked"][hook_event_name]
-                self._write_persistent_data(data)
-                print(f"Removed persistent link: {hook_event_name}")
-        except Exception as e:
-            print(f"Error removing persistent link: {e}")
+        if self.store.remove_link(hook_event_name):
+            self.state_changed()
+            print(f"Removed persistent link: {hook_event_name}")
     
+    @_command
     def save_pattern_to_startup(self, pattern_name: str):
         """Add a standalone pattern to persistent startup (no hook required)"""
-        try:
-            data = self.load_persistent_data()
-            if "standalone" not in data:
-                data["standalone"] = []
-            if pattern_name not in data["standalone"]:
-                data["standalone"].append(pattern_name)
-            
-            self._write_persistent_data(data)
+        if self.store.add_standalone(pattern_name):
+            self.state_changed()
             print(f"Added standalone startup pattern: {pattern_name}")
-        except Exception as e:
-            print(f"Error saving standalone pattern: {e}")
     
+    @_command
     def remove_pattern_from_startup(self, pattern_name: str):
         """Remove a standalone pattern from persistent startup"""
-        try:
-            data = self.load_persistent_data()
-            if "standalone" in data and pattern_name in data["standalone"]:
-                data["standalone"].remove(pattern_name)
-                self._write_persistent_data(data)
-                print(f"Removed standalone startup pattern: {pattern_name}")
-        except Exception as e:
-            print(f"Error removing standalone pattern: {e}")
+        if self.store.remove_standalone(pattern_name):
+            self.state_changed()
+            print(f"Removed standalone startup pattern: {pattern_name}")
     
     def load_persistent_links(self) -> dict:
         """Load hook-pattern links from persistent storage (returns only linked patterns)"""
-        try:
-            data = self.load_persistent_data()
-            return data.get("linked", {})
-        except Exception as e:
-            print(f"Error loading persistent links: {e}")
-        return {}
+        return self.store.links()
     
     def load_startup_patterns_list(self) -> list:
         """Load standalone startup patterns from persistent storage"""
-        try:
-            data = self.load_persistent_data()
-            return data.get("standalone", [])
-        except Exception as e:
-            print(f"Error loading startup patterns: {e}")
-        return []
+        return self.store.standalone()
     
     def load_persistent_data(self) -> dict:
-        """Load all persistent data (linked patterns and standalone patterns)"""
-        try:
-            hook_file = os.path.join(PATTERN_LOCATION, HOOK_FILE)
-            if os.path.exists(hook_file):
-                with open(hook_file, 'r') as f:
-                    import json
-                    data = json.load(f)
-                    # Support legacy format: if data is a dict of strings (old format),
-                    # convert it to new format with "linked" key
-                    if data and isinstance(data, dict):
-                        # Check if it's old format (has hook names as keys, patterns as values)
-                        # vs new format (has "linked" and "standalone" keys)
-                        if "linked" not in data and "standalone" not in data:
-                            # Old format - convert to new format
-                            data = {"linked": data, "standalone": []}
-                    return data
-        except Exception as e:
-            print(f"Error loading persistent data: {e}")
-        return {"linked": {}, "standalone": []}
-    
-    def _write_persistent_data(self, data: dict):
-        """Write persistent data to file"""
-        hook_file = os.path.join(PATTERN_LOCATION, HOOK_FILE)
-        os.makedirs(PATTERN_LOCATION, exist_ok=True)
-        
-        with open(hook_file, 'w') as f:
-            import json
-            json.dump(data, f, indent=2)
+        """All persistent links and standalone patterns: {"linked": {...}, "standalone": [...]}"""
+        return {"linked": self.store.links(), "standalone": self.store.standalone()}
 
     def start_startup_patterns(self):
         """Start all patterns registered to start on startup."""
@@ -392,11 +690,13 @@ class PatternManager:
                 self.start_pattern(name)
             except Exception as e:
                 print(f"Failed to start startup pattern '{name}': {e}")
+                self.events.publish("error", {"source": "pattern", "name": name, "error": str(e)})
 
     def stop_all_patterns(self):
         """Stop any running pattern(s)."""
         self.stop_pattern()
 
+    @_command
     def register_startup_pattern(self, pattern_name: str, linked_hook: str = None):
         """Register a pattern to automatically start on manager startup.
 
@@ -404,35 +704,33 @@ class PatternManager:
         when that hook's event_name triggers.
         """
         if pattern_name not in self.startup_patterns:
-            self.startup_patterns.append(pattern_name)
+            self.startup_patterns = self.startup_patterns + [pattern_name]
         if linked_hook:
-            self.startup_links[linked_hook] = pattern_name
+            self.startup_links = {**self.startup_links, linked_hook: pattern_name}
+        self.state_changed()
         print(f"Registered startup pattern: {pattern_name}" + 
               (f" (linked to hook: {linked_hook})" if linked_hook else ""))
 
-    def save_startup_patterns(self, filepath: str = "/tmp/wopr_startup.txt"):
-        """Save startup patterns to file"""
-        try:
-            with open(filepath, 'w') as f:
-                for pattern in self.startup_patterns:
-                    f.write(f"{pattern}\n")
-            print(f"Saved {len(self.startup_patterns)} startup patterns to {filepath}")
-        except Exception as e:
-            print(f"Error saving startup patterns: {e}")
+    @_command
+    def unregister_startup_pattern(self, pattern_name: str):
+        """Stop starting a pattern on startup and remove every hook link to it"""
+        self.startup_patterns = [p for p in self.startup_patterns if p != pattern_name]
+        self.startup_links = {k: v for k, v in self.startup_links.items() if v != pattern_name}
+        self.state_changed()
 
-    def load_startup_patterns_from_file(self, filepath: str = "/tmp/wopr_startup.txt"):
-        """Load startup patterns from file"""
-        try:
-            with open(filepath, 'r') as f:
-                for line in f:
-                    pattern_name = line.strip()
-                    if pattern_name and pattern_name in self.patterns:
-                        self.startup_patterns.append(pattern_name)
-            print(f"Loaded {len(self.startup_patterns)} startup patterns from {filepath}")
-        except FileNotFoundError:
-            print(f"No startup patterns file found at {filepath}")
-        except Exception as e:
-            print(f"Error loading startup patterns: {e}")
+    @_command
+    def save_startup_patterns(self):
+        """Save the registered startup patterns to the state store"""
+        self.store.set_registered(self.startup_patterns)
+        print(f"Saved {len(self.startup_patterns)} startup patterns")
+
+    @_command
+    def load_saved_startup_patterns(self):
+        """Register the startup patterns saved by save_startup_patterns()"""
+        loaded = [p for p in self.store.registered() if p in self.patterns and p not in self.startup_patterns]
+        self.startup_patterns = self.startup_patterns + loaded
+        self.state_changed()
+        print(f"Loaded {len(loaded)} saved startup patterns")
 
 
 # Example usage and testing
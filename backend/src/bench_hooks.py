@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark for system event hooks - reports how many samples per second
+each hook can take. Run from backend/src:
+
+    python3 bench_hooks.py [--seconds 2] [--watch 200] [--log-mb 1024]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from hooks.cpu_cores import PerCoreCPUHook
+from hooks.net_throughput import NetworkThroughputHook
+
+
+def bench_samples(label, sample, seconds):
+    """Call `sample` repeatedly for `seconds` and print samples/sec."""
+    sample()  # Warm up (opens files, sizes buffers)
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            sample()
+        count += 100
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{label:32} {rate:12,.0f} samples/sec  ({1e6 / rate:.1f} µs/sample)")
+    return rate
+
+
+def bench_process_watch(count, seconds):
+    """Watch `count` entries built from the running processes."""
+    import psutil
+    from hooks.process_watch import ProcessWatchHook
+
+    names = sorted({p.info["name"] for p in psutil.process_iter(["name"]) if p.info["name"]})
+    watches = [{"name": names[i % len(names)]} for i in range(count)]
+    hook = ProcessWatchHook(watches=watches)
+    rate = bench_samples(f"process_watch.check ({count} watches)", hook.check, seconds)
+    pids = sum(len(w.processes) for w in hook.watches)
+    print(f"  processes sampled per tick: {pids}, /proc rescans: {hook.scans}")
+    return rate
+
+
+def bench_log_tail(size_mb, error_every=10000):
+    """Scan a synthetic log of `size_mb` MB with one error line per `error_every` lines."""
+    from hooks.log_tail import LogTailHook
+
+    lines = []
+    for i in range(error_every):
+        if i == error_every // 2:
+            lines.append(b"Jan  1 00:00:00 pi app[1234]: ERROR request failed: timeout after 30s\n")
+        else:
+            lines.append(b"Jan  1 00:00:00 pi app[1234]: INFO handled request id=%06d in 12ms\n" % i)
+    block = b"".join(lines)
+
+    with tempfile.NamedTemporaryFile(prefix="wopr_bench_", suffix=".log", delete=False) as f:
+        path = f.name
+        print(f"Writing {size_mb} MB synthetic log to {path}...")
+        written = 0
+        while written < size_mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+
+    try:
+        hook = LogTailHook(paths=[path], from_start=True, max_bytes_per_check=written)
+        hook.check()
+        print(f"{'log_tail scan':32} {hook.mb_per_sec:12,.1f} MB/sec  "
+              f"({hook.bytes_scanned / 1e6:,.0f} MB, {hook.error_lines:,} error lines)")
+        return hook.mb_per_sec
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WOPR hooks")
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="time to spend on each benchmark")
+    parser.add_argument("--watch", type=int, default=200,
+                        help="number of watched processes for the process_watch benchmark")
+    parser.add_argument("--log-mb", type=int, default=1024,
+                        help="size of the synthetic log for the log_tail benchmark (0 to skip)")
+    args = parser.parse_args()
+
+    print("=== Hook sampling benchmark ===\n")
+
+    cores = PerCoreCPUHook()
+    bench_samples("cpu_core_monitor.sample", cores.sample, args.seconds)
+    bench_samples("cpu_core_monitor.check", cores.check, args.seconds)
+    print(f"  cores: {len(cores.core_percent)}")
+
+    net = NetworkThroughputHook()
+    bench_samples("net_throughput_monitor.sample", net.sample, args.seconds)
+    bench_samples("net_throughput_monitor.check", net.check, args.seconds)
+    print(f"  interfaces: {', '.join(net.iface_names) or '(none)'}")
+
+    bench_process_watch(args.watch, args.seconds)
+
+    if args.log_mb > 0:
+        bench_log_tail(args.log_mb)
+
+
+if __name__ == "__main__":
+    main()
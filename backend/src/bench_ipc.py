@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Benchmark and load generator for the IPC server. The service runs in this
+process on a simulated strip (or use --socket for a running service); the
+clients run in separate processes so they don't share the server's GIL.
+Run from backend/src:
+
+Throughput - requests/sec with 1, 10 and 100 concurrent persistent clients:
+
+    python3 bench_ipc.py [--seconds 3] [--clients 1 10 100] [--action status]
+
+Load - a weighted mix of actions at a target rate, reported as JSON with
+p50/p95/p99 latency, throughput and error counts:
+
+    python3 bench_ipc.py load [--clients 10] [--rate 500] [--seconds 10]
+        [--mix '{"status": 8, "list_patterns": 1, "get_frame": 1}']
+        [--params '{"start_pattern": {"name": "Knight Rider Pattern"}}']
+        [--codec binary] [--output report.json] [--max-p99-ms 5] [--max-errors 0]
+
+HTTP - the same throughput runs against the HTTP gateway (keep-alive, on
+loopback) and the Unix socket, side by side:
+
+    python3 bench_ipc.py http [--seconds 3] [--clients 1 10 100] [--action status]
+        [--address 127.0.0.1:8765]
+
+The load generator is open-loop: each request is sent at its scheduled time
+whether or not earlier ones have been answered, and latency is measured from
+that scheduled time, so a stalled server shows up as latency instead of
+silently lowering the request rate. It exits non-zero when a --max-* limit
+is exceeded, so it can gate regressions.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import selectors
+import socket
+import sys
+import tempfile
+import time
+
+from backend import PatternManager
+from http_gateway import ACTION_PREFIX, ROUTES, HTTPGateway
+from ipc_server import IPCServer
+from ipc_codec import CODECS
+from sim_strip import SimulatedStrip
+from config import NUM_LEDS
+
+
+def run_clients(socket_path, clients, seconds, action, result_queue):
+    """Drive `clients` connections, each with one request in flight, for `seconds`."""
+    selector = selectors.DefaultSelector()
+    request = {"action": action}
+    for i in range(clients):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, {"buffer": b"", "id": 0})
+
+    def send(sock, state):
+        state["id"] += 1
+        sock.sendall(json.dumps({"id": state["id"], **request}).encode("utf-8") + b"\n")
+
+    for key in selector.get_map().values():
+        send(key.fileobj, key.data)
+
+    count = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for key, _ in selector.select(timeout=1.0):
+            state = key.data
+            chunk = key.fileobj.recv(65536)
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            state["buffer"] += chunk
+            while b"\n" in state["buffer"]:
+                line, _, state["buffer"] = state["buffer"].partition(b"\n")
+                if not json.loads(line).get("ok"):
+                    errors += 1
+                count += 1
+                send(key.fileobj, state)
+
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    result_queue.put((count, errors))
+
+
+def run_http_clients(address, clients, seconds, action, result_queue):
+    """Like run_clients, over keep-alive HTTP connections to the gateway at (host, port)."""
+    path = next((p for (method, p), a in ROUTES.items() if a == action and method == "GET"), None)
+    if path:
+        request = f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("ascii")
+    else:
+        request = (f"POST {ACTION_PREFIX}{action} HTTP/1.1\r\nHost: bench\r\n"
+                   f"Content-Length: 0\r\n\r\n").encode("ascii")
+    selector = selectors.DefaultSelector()
+    for i in range(clients):
+        sock = socket.create_connection(address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, {"buffer": b""})
+        sock.sendall(request)
+
+    count = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for key, _ in selector.select(timeout=1.0):
+            state = key.data
+            chunk = key.fileobj.recv(65536)
+            if not chunk:
+                raise ConnectionError("gateway closed the connection")
+            state["buffer"] += chunk
+            while True:
+                head, sep, rest = state["buffer"].partition(b"\r\n\r\n")
+                if not sep:
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                length = next((int(l.split(":", 1)[1]) for l in lines[1:]
+                               if l.lower().startswith("content-length:")), 0)
+                if len(rest) < length:
+                    break
+                state["buffer"] = rest[length:]
+                if lines[0].split()[1] != "200":
+                    errors += 1
+                count += 1
+                key.fileobj.sendall(request)
+
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    result_queue.put((count, errors))
+
+
+def bench_clients(target, clients, seconds, action, runner=run_clients, label=""):
+    """Run one client process and print requests/sec."""
+    result_queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(
+        target=runner, args=(target, clients, seconds, action, result_queue))
+    proc.start()
+    count, errors = result_queue.get()
+    proc.join()
+    rate = count / seconds
+    print(f"{label}{clients:7d} clients {rate:12,.0f} requests/sec  ({1e6 / rate:.1f} µs/request)"
+          + (f"  {errors} errors" if errors else ""))
+    return rate
+
+
+class LoadClient:
+    """One persistent connection sending requests on a fixed schedule"""
+
+    def __init__(self, socket_path, codec_name, interval, start, rng):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.codec = CODECS["json"]
+        self.buffer = bytearray()
+        if codec_name != "json":
+            self._negotiate(codec_name)
+        self.sock.setblocking(False)
+        self.interval = interval
+        self.next_send = start + rng.uniform(0, interval) if interval else start
+        self.next_id = 0
+        self.in_flight = {}  # id -> (action, scheduled time)
+
+    def _negotiate(self, codec_name):
+        self.sock.sendall(self.codec.encode({"id": 0, "action": "hello", "params": {"codec": codec_name}}))
+        while True:
+            for reply in self.codec.decode(self.buffer):
+                if not (reply and reply.get("ok")):
+                    raise RuntimeError(f"codec negotiation failed: {reply}")
+                self.codec = CODECS[codec_name]
+                return
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            self.buffer += chunk
+
+    def send(self, action, params, scheduled):
+        self.next_id += 1
+        self.in_flight[self.next_id] = (action, scheduled)
+        request = {"id": self.next_id, "action": action}
+        if params:
+            request["params"] = params
+        self.sock.setblocking(True)
+        self.sock.sendall(self.codec.encode(request))
+        self.sock.setblocking(False)
+
+    def receive(self):
+        """Read what is available; returns [(action, scheduled time, ok)] for each response"""
+        done = []
+        try:
+            chunk = self.sock.recv(1 << 20)
+        except BlockingIOError:
+            return done
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        self.buffer += chunk
+        for reply in self.codec.decode(self.buffer):
+            entry = self.in_flight.pop(reply.get("id"), None) if reply else None
+            if entry:
+                done.append((entry[0], entry[1], bool(reply.get("ok"))))
+        return done
+
+
+def run_load(socket_path, clients, rate, seconds, mix, params, codec_name, seed, result_queue):
+    """Drive a weighted action mix from `clients` connections at `rate` requests/sec in total.
+
+    A rate of 0 runs closed-loop instead: each client sends its next
+    request as soon as the previous one is answered.
+    """
+    rng = random.Random(seed)
+    actions = list(mix)
+    weights = [mix[a] for a in actions]
+    interval = clients / rate if rate else 0.0
+    start = time.perf_counter() + 0.05
+    conns = [LoadClient(socket_path, codec_name, interval, start, rng) for _ in range(clients)]
+    selector = selectors.DefaultSelector()
+    for client in conns:
+        selector.register(client.sock, selectors.EVENT_READ, client)
+
+    latencies = {a: [] for a in actions}
+    errors = {a: 0 for a in actions}
+    send_errors = 0
+    end = start + seconds
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        for client in conns:
+            # Closed loop: only one request in flight per client
+            while client.next_send <= now and (interval or not client.in_flight):
+                action = rng.choices(actions, weights)[0]
+                try:
+                    client.send(action, params.get(action), client.next_send if interval else now)
+                except OSError:
+                    send_errors += 1
+                client.next_send = client.next_send + interval if interval else now
+        timeout = max(0.0, min(c.next_send for c in conns) - time.perf_counter()) if interval else 0.1
+        for key, _ in selector.select(timeout=min(timeout, end - time.perf_counter(), 0.1)):
+            received = time.perf_counter()
+            for action, scheduled, ok in key.data.receive():
+                latencies[action].append(received - scheduled)
+                if not ok:
+                    errors[action] += 1
+
+    # Give stragglers a moment, then count the rest as timeouts
+    grace = time.perf_counter() + 1.0
+    while any(c.in_flight for c in conns) and time.perf_counter() < grace:
+        for key, _ in selector.select(timeout=0.1):
+            received = time.perf_counter()
+            for action, scheduled, ok in key.data.receive():
+                latencies[action].append(received - scheduled)
+                if not ok:
+                    errors[action] += 1
+    timeouts = sum(len(c.in_flight) for c in conns)
+    for client in conns:
+        client.sock.close()
+    result_queue.put((latencies, errors, timeouts, send_errors))
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (0 if empty)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(values):
+    values = sorted(values)
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "count": len(values),
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+    }
+
+
+def load_test(socket_path, args):
+    """Run the load generator in worker processes and return the JSON report."""
+    mix = json.loads(args.mix)
+    params = json.loads(args.params)
+    processes = max(1, min(args.processes, args.clients))
+    result_queue = multiprocessing.Queue()
+    procs = []
+    for i in range(processes):
+        share = args.clients // processes + (1 if i < args.clients % processes else 0)
+        procs.append(multiprocessing.Process(target=run_load, args=(
+            socket_path, share, args.rate * share / args.clients, args.seconds,
+            mix, params, args.codec, args.seed + i, result_queue)))
+    for proc in procs:
+        proc.start()
+    results = [result_queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    latencies = {a: [] for a in mix}
+    errors = {a: 0 for a in mix}
+    timeouts = send_errors = 0
+    for lat, err, tmo, snd in results:
+        for action in mix:
+            latencies[action].extend(lat[action])
+            errors[action] += err[action]
+        timeouts += tmo
+        send_errors += snd
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    total_errors = sum(errors.values()) + timeouts + send_errors
+    return {
+        "config": {
+            "clients": args.clients,
+            "processes": processes,
+            "target_rate": args.rate,
+            "seconds": args.seconds,
+            "codec": args.codec,
+            "mix": mix,
+            "num_leds": args.num_leds,
+        },
+        "requests": len(all_latencies),
+        "throughput_rps": round(len(all_latencies) / args.seconds, 1),
+        "errors": {"total": total_errors, "responses": sum(errors.values()),
+                   "timeouts": timeouts, "send": send_errors},
+        "latency": latency_summary(all_latencies),
+        "per_action": {a: dict(latency_summary(latencies[a]), errors=errors[a]) for a in mix},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WOPR IPC server")
+    parser.add_argument("--socket", default=None,
+                        help="benchmark a running service instead of an in-process one")
+    parser.add_argument("--num-leds", type=int, default=NUM_LEDS,
+                        help="LEDs on the simulated strip")
+    parser.add_argument("--seconds", type=float, default=3.0,
+                        help="time to spend on each client count")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100],
+                        help="numbers of concurrent clients to benchmark")
+    parser.add_argument("--action", default="status",
+                        help="IPC action every client sends")
+    sub = parser.add_subparsers(dest="command")
+    load = sub.add_parser("load", help="drive an action mix at a target rate and report JSON")
+    load.add_argument("--clients", type=int, default=10, help="concurrent connections")
+    load.add_argument("--processes", type=int, default=1,
+                      help="client processes to spread the connections over")
+    load.add_argument("--rate", type=float, default=500.0,
+                      help="target requests/sec over all clients (0 = as fast as possible)")
+    load.add_argument("--seconds", type=float, default=10.0, help="test duration")
+    load.add_argument("--mix", default='{"status": 8, "list_patterns": 1, "get_frame": 1}',
+                      help="JSON object of action -> relative weight")
+    load.add_argument("--params", default="{}",
+                      help="JSON object of action -> params sent with it")
+    load.add_argument("--codec", choices=sorted(CODECS), default="json")
+    load.add_argument("--seed", type=int, default=1)
+    load.add_argument("--output", default=None, help="also write the report to this file")
+    load.add_argument("--max-p99-ms", type=float, default=None,
+                      help="exit with status 1 if the overall p99 latency is higher")
+    load.add_argument("--max-errors", type=int, default=None,
+                      help="exit with status 1 if there are more errors")
+    http = sub.add_parser("http", help="compare the HTTP gateway with the Unix socket on loopback")
+    http.add_argument("--seconds", type=float, default=3.0, help="time to spend on each run")
+    http.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100],
+                      help="numbers of concurrent clients to benchmark")
+    http.add_argument("--action", default="status", help="IPC action every client sends")
+    http.add_argument("--address", default=None,
+                      help="host:port of a running gateway (with --socket for its service)")
+    args = parser.parse_args()
+
+    # In load mode stdout carries only the JSON report; service logs (including
+    # ones from threads still finishing after the run) go to stderr
+    out = sys.stdout
+    if args.command == "load":
+        sys.stdout = sys.stderr
+
+    ipc = None
+    status = 0
+    socket_path = args.socket
+    if socket_path is None:
+        # Keep the state store, plugin index and socket of the in-process service in a
+        # scratch dir, so bench traffic never touches (or migrates) the real state files
+        bench_dir = tempfile.mkdtemp(prefix="wopr-bench-")
+        manager = PatternManager(SimulatedStrip(num_leds=args.num_leds), data_dir=bench_dir,
+                                 legacy_startup_file=os.path.join(bench_dir, "wopr_startup.txt"))
+        manager.load_patterns()
+        manager.load_hooks()
+        socket_path = os.path.join(bench_dir, "bench.sock")
+        ipc = IPCServer(manager, socket_path=socket_path)
+        ipc.start()
+        ipc.ready.wait(timeout=5.0)
+
+    try:
+        if args.command == "load":
+            report = load_test(socket_path, args)
+            text = json.dumps(report, indent=2)
+            print(text, file=out)
+            if args.output:
+                with open(args.output, "w") as f:
+                    f.write(text + "\n")
+            if args.max_p99_ms is not None and report["latency"]["p99_ms"] > args.max_p99_ms:
+                print(f"FAIL: p99 {report['latency']['p99_ms']} ms > {args.max_p99_ms} ms", file=sys.stderr)
+                status = 1
+            if args.max_errors is not None and report["errors"]["total"] > args.max_errors:
+                print(f"FAIL: {report['errors']['total']} errors > {args.max_errors}", file=sys.stderr)
+                status = 1
+        elif args.command == "http":
+            if args.address:
+                host, _, port = args.address.rpartition(":")
+                address = (host, int(port))
+            elif ipc is None:
+                parser.error("http: give --address of the gateway when using --socket")
+            else:
+                gateway = HTTPGateway(ipc, "127.0.0.1", 0)
+                gateway.start()
+                gateway.ready.wait(timeout=5.0)
+                address = ("127.0.0.1", gateway.port)
+            print(f"HTTP gateway vs Unix socket, action '{args.action}', {args.seconds:.0f}s per run")
+            for clients in args.clients:
+                bench_clients(socket_path, clients, args.seconds, args.action, label="unix ")
+                bench_clients(address, clients, args.seconds, args.action,
+                              runner=run_http_clients, label="http ")
+        else:
+            print(f"IPC benchmark, action '{args.action}', {args.seconds:.0f}s per run")
+            for clients in args.clients:
+                bench_clients(socket_path, clients, args.seconds, args.action)
+    finally:
+        if ipc:
+            ipc.stop()
+            ipc.join(timeout=2.0)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
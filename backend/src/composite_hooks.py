@@ -0,0 +1,169 @@
+"""
+Composite Hooks - hooks whose alert level is derived from other hooks
+Defined in config.COMPOSITE_HOOKS over other hooks' event names, e.g.
+"any CRITICAL among cpu/temp/voltage" or "WARNING if 2 of 3 are WARNING"
+"""
+
+from typing import Dict, List, Optional
+
+from backend import SystemEventHook
+from hook_alerts import AlertLevel, HookMessage, AlertColorScheme
+
+
+OPERATORS = ("max", "any", "all", "k_of_n")
+
+
+class CompositeHook(SystemEventHook):
+    """
+    Combine the alert levels of child hooks with one operator:
+    - max: The highest level among the children
+    - any: `level` if any child is at or above `level`, else NORMAL
+    - all: `level` if every child is at or above `level`, else NORMAL
+    - k_of_n: `level` if at least `k` children are at or above `level`, else NORMAL
+
+    The manager calls child_changed() when a child's level changes. The
+    composite keeps a count of children per level, so re-evaluating is a
+    constant-time update, and check() does nothing unless a child changed
+    since the last call.
+    """
+
+    def __init__(self, name: str, op: str, children: List[str],
+                 level: str = "WARNING", k: Optional[int] = None):
+        """
+        Initialize composite hook
+
+        Args:
+            name: Event name of the composite (used for linking like any hook)
+            op: One of "max", "any", "all", "k_of_n"
+            children: Event names of the hooks being combined
+            level: Level raised by any/all/k_of_n (ignored by max)
+            k: Number of children required by k_of_n
+        """
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator '{op}' (expected one of {', '.join(OPERATORS)})")
+        if not children:
+            raise ValueError("composite hook needs at least one child")
+        if op == "k_of_n" and not (k and 0 < k <= len(children)):
+            raise ValueError(f"k_of_n needs 0 < k <= {len(children)}")
+
+        self._name = name
+        self.op = op
+        self.children = list(children)
+        self.level = AlertLevel.from_string(level)
+        self.k = {"any": 1, "all": len(self.children), "k_of_n": k}.get(op)
+
+        # Children start out NORMAL until they report otherwise
+        self._child_levels: Dict[str, AlertLevel] = {c: AlertLevel.NORMAL for c in self.children}
+        self._counts = {lvl: 0 for lvl in AlertLevel}
+        self._counts[AlertLevel.NORMAL] = len(self.children)
+        self._dirty = True
+        self._last_level = None
+
+    @property
+    def event_name(self) -> str:
+        return self._name
+
+    def child_changed(self, child: str, level: AlertLevel):
+        """Record a child's new level; the composite is re-evaluated on the next check"""
+        old = self._child_levels.get(child)
+        if old is None or level is None or old == level:
+            return
+        self._child_levels[child] = level
+        self._counts[old] -= 1
+        self._counts[level] += 1
+        self._dirty = True
+
+    def check(self) -> bool:
+        """Return True if the combined level changed since the last check"""
+        if not self._dirty:
+            return False
+        self._dirty = False
+
+        current_level = self._evaluate()
+        if self._last_level != current_level:
+            self._last_level = current_level
+            return True
+
+        return False
+
+    def _evaluate(self) -> AlertLevel:
+        if self.op == "max":
+            for lvl in sorted(AlertLevel, key=lambda l: l.value, reverse=True):
+                if self._counts[lvl]:
+                    return lvl
+            return AlertLevel.NORMAL
+
+        at_or_above = sum(n for lvl, n in self._counts.items()
+                          if lvl.value >= self.level.value)
+        return self.level if at_or_above >= self.k else AlertLevel.NORMAL
+
+    def get_message(self) -> HookMessage:
+        """Generate alert message with the level of every child"""
+        color = AlertColorScheme.get_color(self._last_level)
+
+        return HookMessage(
+            hook_name=self.event_name,
+            alert_level=self._last_level,
+            color=color,
+            metadata={
+                "op": self.op,
+                "children": {c: lvl.name for c, lvl in self._child_levels.items()},
+            }
+        )
+
+    def on_trigger(self, pattern_manager):
+        """Called if no linked pattern is configured"""
+        level = self._last_level.name if self._last_level else "UNKNOWN"
+        print(f"Composite alert {self.event_name} [{level}]: {self.op} of {', '.join(self.children)}")
+
+
+def build_composite_hooks(definitions: dict) -> List[CompositeHook]:
+    """Create CompositeHooks from a {name: {op, children, level, k}} mapping"""
+    composites = []
+    for name, spec in definitions.items():
+        try:
+            composites.append(CompositeHook(
+                name,
+                op=spec.get("op", "max"),
+                children=spec.get("children", []),
+                level=spec.get("level", "WARNING"),
+                k=spec.get("k"),
+            ))
+        except Exception as e:
+            print(f"Error creating composite hook {name}: {e}")
+    return _children_first(composites)
+
+
+def _children_first(composites: List[CompositeHook]) -> List[CompositeHook]:
+    """
+    Order composites so nested ones come before the composites built on them,
+    letting a change propagate through every level in one check pass. A
+    composite that is part of a cycle (or built on one) is dropped.
+    """
+    by_name = {c.event_name: c for c in composites}
+    state = {}  # event_name -> "visiting", "done" or "cycle"
+    ordered = []
+
+    def visit(composite: CompositeHook) -> bool:
+        state[composite.event_name] = "visiting"
+        acyclic = True
+        for child in composite.children:
+            if child not in by_name:
+                continue  # A plain hook
+            child_state = state.get(child)
+            if child_state is None:
+                acyclic = visit(by_name[child]) and acyclic
+            elif child_state != "done":
+                acyclic = False
+        if acyclic:
+            state[composite.event_name] = "done"
+            ordered.append(composite)
+        else:
+            state[composite.event_name] = "cycle"
+            print(f"Error creating composite hook {composite.event_name}: it is built on a cycle of composite hooks")
+        return acyclic
+
+    for composite in composites:
+        if composite.event_name not in state:
+            visit(composite)
+    return ordered
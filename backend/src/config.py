@@ -17,7 +17,70 @@ STARTUP_PATTERNS = []  # e.g. ["My Pattern"]
 # automatically by the manager.
 HOOK_LINKS = {}  # e.g. {"cpu_over_20": "Loading Bar Pattern"}
 
+# Processes watched by the process_watch hook. Each entry matches by process
+# `name` and/or a `cmdline` substring, with optional limits that raise a
+# WARNING when exceeded. A watched process that is not running is CRITICAL.
+PROCESS_WATCH = []  # e.g. [{"name": "nginx", "max_cpu": 80, "max_rss_mb": 512},
+                    #       {"cmdline": "worker.py", "min_count": 4}]
+
+# Log files tailed by the log_tail hook and the keywords that mark an error
+# line. Keywords are matched case-sensitively as plain substrings.
+LOG_WATCH_FILES = []  # e.g. ["/var/log/syslog", "/opt/app/app.log"]
+LOG_WATCH_KEYWORDS = ["ERROR", "CRITICAL", "Traceback", "error:", "panic"]
+
+# Composite hooks combine the levels of other hooks (by event_name) with one
+# of the operators max / any / all / k_of_n. They are listed and linked to
+# patterns like any other hook. A composite may combine other composites, but
+# not itself or a cycle of them (those are skipped at load).
+COMPOSITE_HOOKS = {}  # e.g. {"system_critical": {"op": "any", "level": "CRITICAL",
+                      #         "children": ["cpu_monitor", "cpu_temp_monitor", "voltage_monitor"]},
+                      #       "system_warning": {"op": "k_of_n", "k": 2, "level": "WARNING",
+                      #         "children": ["cpu_monitor", "cpu_temp_monitor", "voltage_monitor"]}}
+
+# A hook whose check fails (raises, or takes longer than HOOK_SLOW_CHECK
+# seconds) HOOK_BREAKER_FAILURES times in a row is skipped for
+# HOOK_BREAKER_COOLDOWN seconds, then tried once; each failed trial doubles
+# the cooldown, up to HOOK_BREAKER_MAX_COOLDOWN (see hook_breaker).
+HOOK_BREAKER_FAILURES = 3
+HOOK_BREAKER_COOLDOWN = 30
+HOOK_BREAKER_MAX_COOLDOWN = 600
+HOOK_SLOW_CHECK = 1.0
+
+# Reload pattern/hook files in the background when they change on disk
+PLUGIN_HOT_RELOAD = True
+
+# Per-action IPC latency metrics are written as a Prometheus textfile (for
+# node_exporter's textfile collector) under PATTERN_LOCATION every
+# IPC_METRICS_INTERVAL seconds while requests arrive. The file also carries
+# the frame, hook, manager and persistence timings, but those are only
+# refreshed along with an IPC change, so an idle service doesn't keep
+# rewriting it on the SD card. 0 disables the file.
+IPC_METRICS_FILE = 'wopr_ipc.prom'
+IPC_METRICS_INTERVAL = 15
+
+# Persistent files (saved pattern, hook links, plugin index) are written
+# behind from memory: once no change has arrived for PERSIST_DELAY seconds,
+# and at most PERSIST_MAX_DELAY seconds after the first unwritten change.
+# Each write is atomic (temp file, fsync, rename), see write_behind.
+PERSIST_DELAY = 2.0
+PERSIST_MAX_DELAY = 10.0
+
+# Optional HTTP/1.1 gateway for dashboards on other machines: REST routes
+# onto the IPC actions plus a server-sent-events stream (see http_gateway).
+# Bind to "0.0.0.0" to accept remote clients; when a token is set, every
+# request needs "Authorization: Bearer <token>".
+HTTP_GATEWAY_ENABLED = False
+HTTP_GATEWAY_HOST = "127.0.0.1"
+HTTP_GATEWAY_PORT = 8765
+HTTP_GATEWAY_TOKEN = None
+
 
-PATTERN_FILE = 'pattern.txt'
 PATTERN_LOCATION = "/opt/WOPR/backend/data/"
-HOOK_FILE =    'hook.txt'
\ No newline at end of file
+# Saved pattern, persistent links, startup lists and per-pattern params and
+# zones, in one SQLite database under PATTERN_LOCATION (see state_store)
+STATE_DB = 'wopr_state.db'
+# Files used before the state store; imported into it once, then renamed *.migrated
+PATTERN_FILE = 'pattern.txt'
+HOOK_FILE =    'hook.txt'
+LEGACY_STARTUP_FILE = '/tmp/wopr_startup.txt'
+PLUGIN_INDEX_FILE = 'plugin_index.json'
\ No newline at end of file
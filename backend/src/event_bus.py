@@ -0,0 +1,100 @@
+"""
+Event Bus - publish/subscribe for service events
+The manager and IPC server publish events on a few topics; subscribers
+(e.g. IPC `subscribe` connections) get them through a bounded buffer that
+drops the oldest events when the subscriber falls behind, so a slow client
+never blocks a publisher or grows memory without limit.
+
+Topics:
+  - pattern: a pattern started or stopped
+  - hook: a hook changed level (with its color and metadata)
+  - link: hook-pattern links or startup patterns changed
+  - error: a hook, pattern or action failed
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable, List, Optional
+
+TOPICS = ("pattern", "hook", "link", "error")
+
+
+class Subscription:
+    """Bounded queue of events for one subscriber"""
+
+    def __init__(self, topics: Iterable[str], maxlen: int, notify: Optional[Callable] = None):
+        """
+        Args:
+            topics: Topics to receive
+            maxlen: Events buffered before the oldest are dropped
+            notify: Called (on the publishing thread) when the buffer goes from empty to non-empty
+        """
+        self.topics = frozenset(topics)
+        self.events = deque(maxlen=maxlen)
+        self.dropped = 0  # Events dropped since the last drain()
+        self.notify = notify
+        self._lock = threading.Lock()
+
+    def push(self, event: dict):
+        with self._lock:
+            was_empty = not self.events
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+        if was_empty and self.notify:
+            self.notify(self)
+
+    def drain(self, limit: Optional[int] = None):
+        """Take up to `limit` buffered events; returns (events, dropped_since_last_drain)"""
+        with self._lock:
+            if limit is None or limit >= len(self.events):
+                events = list(self.events)
+                self.events.clear()
+            else:
+                events = [self.events.popleft() for _ in range(limit)]
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+
+class EventBus:
+    """Fan-out of published events to subscriptions, filtered by topic"""
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []  # Replaced, never mutated
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def subscribe(self, topics: Iterable[str] = TOPICS, maxlen: int = 256,
+                  notify: Optional[Callable] = None) -> Subscription:
+        """
+        Create a subscription
+
+        Args:
+            topics: Topics to receive (default: all)
+            maxlen: Per-subscriber buffer size
+            notify: See Subscription
+        """
+        topics = list(topics)
+        unknown = [t for t in topics if t not in TOPICS]
+        if unknown:
+            raise ValueError(f"unknown topic(s): {', '.join(unknown)} (expected {', '.join(TOPICS)})")
+        sub = Subscription(topics, maxlen, notify)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [sub]
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not sub]
+
+    def publish(self, topic: str, data: dict):
+        """Send an event to every subscription that wants the topic"""
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        event = {"topic": topic, "seq": next(self._seq), "time": time.time(), "data": data}
+        for sub in subscriptions:
+            if topic in sub.topics:
+                sub.push(event)
@@ -0,0 +1,70 @@
+"""
+Frame Delta - the LEDs that changed between two frames
+Frames are packed RGB bytes (3 per LED), as returned by
+PatternManager.frame_bytes(). A delta is a list of runs of changed LEDs
+plus their new colors:
+
+    runs  array('I') of (start, count) pairs, in LED units
+    data  the new RGB bytes of every run, concatenated
+
+so a preview that already holds the old frame only touches the changed
+LEDs. Runs separated by a few unchanged LEDs are merged, since sending
+the unchanged colors is cheaper than another run header.
+"""
+
+from array import array
+from typing import Tuple
+
+MERGE_GAP = 2  # Unchanged LEDs between two runs that are sent rather than starting a new run
+CHUNK = 16     # LEDs compared as one slice before looking at single LEDs
+
+
+def encode_delta(old: bytes, new: bytes) -> Tuple[array, bytes]:
+    """
+    Changed runs between two frames of the same length
+
+    Args:
+        old: Frame the receiver already has
+        new: Current frame
+
+    Returns:
+        (runs, data); both are empty when nothing changed
+    """
+    runs = array("I")
+    if old == new:
+        return runs, b""
+    num_leds = len(new) // 3
+    step = CHUNK * 3
+    start = end = None  # Current run, [start, end) in LEDs
+    for base in range(0, len(new), step):
+        if old[base:base + step] == new[base:base + step]:
+            continue  # Most of a frame is usually unchanged; skip it a chunk at a time
+        for led in range(base // 3, min(num_leds, (base + step) // 3)):
+            offset = led * 3
+            if old[offset:offset + 3] == new[offset:offset + 3]:
+                continue
+            if start is not None and led - end <= MERGE_GAP:
+                end = led + 1
+            else:
+                if start is not None:
+                    runs.extend((start, end - start))
+                start, end = led, led + 1
+    if start is not None:
+        runs.extend((start, end - start))
+    data = b"".join(new[runs[i] * 3:(runs[i] + runs[i + 1]) * 3] for i in range(0, len(runs), 2))
+    return runs, data
+
+
+def key_delta(frame: bytes) -> Tuple[array, bytes]:
+    """Delta that replaces the whole frame (for a receiver without one)"""
+    num_leds = len(frame) // 3
+    return array("I", (0, num_leds) if num_leds else ()), bytes(frame)
+
+
+def apply_delta(frame: bytearray, runs, data: bytes):
+    """Write a delta's colors into `frame` in place"""
+    offset = 0
+    for i in range(0, len(runs), 2):
+        start, size = runs[i] * 3, runs[i + 1] * 3
+        frame[start:start + size] = data[offset:offset + size]
+        offset += size
@@ -0,0 +1,86 @@
+"""
+Hook Breaker - per-hook circuit breaker for the hook check loop
+A hook whose check keeps failing (raising, or taking longer than the slow
+limit) is skipped for a cooldown instead of costing every pass of the
+hook loop. After the cooldown one trial check runs: if it succeeds the
+hook is checked normally again, if it fails the hook is skipped for twice
+as long (up to a maximum).
+
+States:
+  - closed: checked every pass
+  - open: skipped until the cooldown has passed
+  - half_open: the next check is the trial
+"""
+
+import time
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure count and state of one hook"""
+
+    __slots__ = ("threshold", "base_cooldown", "max_cooldown", "cooldown", "state",
+                 "failures", "opened_at", "trips", "last_error")
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0, max_cooldown: float = 600.0):
+        """
+        Args:
+            threshold: Consecutive failures that open the breaker
+            cooldown: Seconds the hook is skipped the first time the breaker opens
+            max_cooldown: Upper limit for the doubled cooldown after failed trials
+        """
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0  # Consecutive
+        self.opened_at = 0.0  # time.monotonic() the breaker last opened
+        self.trips = 0  # Times the breaker opened
+        self.last_error = None
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """True if the hook should be checked now"""
+        if self.state != OPEN:
+            return True
+        now = time.monotonic() if now is None else now
+        if now - self.opened_at < self.cooldown:
+            return False
+        self.state = HALF_OPEN
+        return True
+
+    def record(self, ok: bool, error: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """Record a check result; returns True if this result opened the breaker"""
+        if ok:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.cooldown = self.base_cooldown
+            return False
+        self.failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        elif self.failures < self.threshold:
+            return False
+        self.state = OPEN
+        self.opened_at = time.monotonic() if now is None else now
+        self.trips += 1
+        return True
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.cooldown - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "cooldown_s": self.cooldown,
+            "retry_in_s": retry_in,
+            "last_error": self.last_error,
+        }
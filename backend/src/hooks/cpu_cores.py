@@ -0,0 +1,158 @@
+"""
+Per-Core CPU Monitoring Hook
+Reads /proc/stat directly and reports per-core load so patterns can map
+each core onto its own LED segment
+"""
+
+import os
+from backend import SystemEventHook
+from hook_alerts import AlertLevel, HookMessage, AlertColorScheme
+
+
+PROC_STAT = "/proc/stat"
+
+
+class PerCoreCPUHook(SystemEventHook):
+    """
+    Monitor the load of every CPU core and send alerts at multiple levels:
+    - NORMAL: All cores below warning threshold
+    - WARNING: Busiest core at warning threshold (default 50%)
+    - CRITICAL: Busiest core at critical threshold (default 90%)
+
+    Each sample is a single pread() of /proc/stat into a reused buffer.
+    Counters from the previous tick live in preallocated lists, so the
+    load of each core is a delta between two ticks rather than a blocking
+    sampling interval.
+    """
+
+    def __init__(self, warn_threshold=50.0, crit_threshold=90.0,
+                 proc_path=PROC_STAT, buffer_size=16384):
+        """
+        Initialize per-core CPU monitor hook
+
+        Args:
+            warn_threshold: Core load % to trigger WARNING level
+            crit_threshold: Core load % to trigger CRITICAL level
+            proc_path: Path of the kernel CPU statistics file
+            buffer_size: Initial size of the read buffer in bytes
+        """
+        self.warn_threshold = warn_threshold
+        self.crit_threshold = crit_threshold
+        self.proc_path = proc_path
+        self._fd = None
+        self._buf = bytearray(buffer_size)
+        self._last_level = None
+        self._last_core_levels = ()
+
+        # Per-core state, resized only if the number of cores changes
+        self._prev_busy = []
+        self._prev_total = []
+        self.core_percent = []
+
+    @property
+    def event_name(self) -> str:
+        return "cpu_core_monitor"
+
+    def check(self) -> bool:
+        """Sample per-core load and return True if any core changed level"""
+        try:
+            if not self.sample():
+                return False
+        except Exception as e:
+            print(f"Error reading {self.proc_path}: {e}")
+            return False
+
+        core_levels = tuple(self._level_for(p) for p in self.core_percent)
+        if core_levels != self._last_core_levels:
+            self._last_core_levels = core_levels
+            self._last_level = max(core_levels, key=lambda level: level.value)
+            return True
+
+        return False
+
+    def sample(self) -> bool:
+        """
+        Read /proc/stat once and update `core_percent` in place.
+
+        Returns False on the first call, when there is no previous tick to
+        compute a delta against.
+        """
+        n = self._read()
+        buf = self._buf
+        end = buf.find(b"\nintr", 0, n)
+        if end < 0:
+            end = n
+
+        has_previous = bool(self._prev_total)
+        core = 0
+        # Skip the aggregate "cpu " line; per-core lines are "cpuN ..."
+        pos = buf.find(b"\ncpu", 0, end)
+        while pos >= 0:
+            line_end = buf.find(b"\n", pos + 1, end)
+            if line_end < 0:
+                line_end = end
+            fields = buf[pos + 1:line_end].split()
+            # user nice system idle iowait irq softirq steal
+            idle = int(fields[4]) + int(fields[5])
+            total = (int(fields[1]) + int(fields[2]) + int(fields[3]) + idle +
+                     int(fields[6]) + int(fields[7]) + int(fields[8]))
+            busy = total - idle
+
+            if core == len(self._prev_total):
+                self._prev_busy.append(busy)
+                self._prev_total.append(total)
+                self.core_percent.append(0.0)
+                has_previous = False
+            else:
+                d_total = total - self._prev_total[core]
+                if d_total > 0:
+                    self.core_percent[core] = 100.0 * (busy - self._prev_busy[core]) / d_total
+                self._prev_busy[core] = busy
+                self._prev_total[core] = total
+            core += 1
+            pos = buf.find(b"\ncpu", line_end, end)
+
+        # Cores went offline since the last tick
+        if core < len(self._prev_total):
+            del self._prev_busy[core:], self._prev_total[core:], self.core_percent[core:]
+            has_previous = False
+
+        return has_previous
+
+    def _read(self) -> int:
+        """Read the whole stat file with one syscall, growing the buffer if needed"""
+        if self._fd is None:
+            self._fd = os.open(self.proc_path, os.O_RDONLY)
+        while True:
+            n = os.preadv(self._fd, [self._buf], 0)
+            if n < len(self._buf):
+                return n
+            self._buf = bytearray(len(self._buf) * 2)
+
+    def _level_for(self, percent: float) -> AlertLevel:
+        if percent >= self.crit_threshold:
+            return AlertLevel.CRITICAL
+        if percent >= self.warn_threshold:
+            return AlertLevel.WARNING
+        return AlertLevel.NORMAL
+
+    def get_message(self) -> HookMessage:
+        """Generate alert message with the load and color of every core"""
+        color = AlertColorScheme.get_color(self._last_level)
+
+        return HookMessage(
+            hook_name=self.event_name,
+            alert_level=self._last_level,
+            color=color,
+            metadata={
+                "core_percent": list(self.core_percent),
+                "core_levels": [level.name for level in self._last_core_levels],
+                "core_colors": [AlertColorScheme.get_color(level) for level in self._last_core_levels],
+            }
+        )
+
+    def on_trigger(self, pattern_manager):
+        """Called if no linked pattern is configured"""
+        level = self._last_level.name if self._last_level else "UNKNOWN"
+        loads = ", ".join(f"{p:.0f}%" for p in self.core_percent)
+        print(f"CPU core alert [{level}]: {loads}")
@@ -0,0 +1,234 @@
+"""
+Log Tail Hook
+Tails log files incrementally and alerts when error lines are written
+"""
+
+import os
+import time
+from backend import SystemEventHook
+from hook_alerts import AlertLevel, HookMessage, AlertColorScheme
+from config import LOG_WATCH_FILES, LOG_WATCH_KEYWORDS
+
+
+class TailedFile:
+    """Read position of one log file, tracked by inode so rotation is noticed"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = None
+        self.inode = None
+        self.offset = 0
+        self.checked = False
+
+    def open(self, from_start: bool) -> bool:
+        """Open the current file at `path`; returns False if it doesn't exist"""
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        st = os.fstat(fd)
+        self.close()
+        self.fd = fd
+        self.inode = (st.st_dev, st.st_ino)
+        self.offset = 0 if from_start else st.st_size
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def rotated(self) -> bool:
+        """True if `path` now points at a different file than the one we hold"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (st.st_dev, st.st_ino) != self.inode
+
+    def truncated(self) -> bool:
+        return os.fstat(self.fd).st_size < self.offset
+
+
+class LogTailHook(SystemEventHook):
+    """
+    Tail log files and send alerts at multiple levels:
+    - NORMAL: No error lines for `hold_seconds`
+    - WARNING: Error lines written since the last check
+    - CRITICAL: At least `crit_lines` error lines written since the last check
+
+    Only new bytes are read, in large chunks into a reused buffer. The
+    offset only advances over complete lines, so a line split across
+    chunks is read again in full next time; when the file is rotated, its
+    unterminated last line is scanned before switching files. Keywords are
+    literals, found with plain substring search (no regex).
+    """
+
+    def __init__(self, paths=None, keywords=None, crit_lines=10, hold_seconds=30.0,
+                 chunk_size=1024 * 1024, max_bytes_per_check=64 * 1024 * 1024,
+                 from_start=False):
+        """
+        Initialize log tail hook
+
+        Args:
+            paths: Log files to tail (default: config.LOG_WATCH_FILES)
+            keywords: Substrings that mark an error line (default: config.LOG_WATCH_KEYWORDS)
+            crit_lines: Error lines per check to trigger CRITICAL level
+            hold_seconds: Seconds without error lines before returning to NORMAL
+            chunk_size: Bytes read per syscall
+            max_bytes_per_check: Upper bound on bytes scanned per check, per file
+            from_start: Scan existing file content instead of starting at the end
+        """
+        keywords = LOG_WATCH_KEYWORDS if keywords is None else keywords
+        self.files = [TailedFile(p) for p in (LOG_WATCH_FILES if paths is None else paths)]
+        self.keywords = [k.encode() for k in keywords if k]
+        self.crit_lines = crit_lines
+        self.hold_seconds = hold_seconds
+        self.max_bytes_per_check = max_bytes_per_check
+        self.from_start = from_start
+        self._buf = bytearray(chunk_size)
+        self._last_level = None
+        self._last_match_time = None
+        self._last_line = ""
+        self._new_lines = 0
+
+        # Throughput counters
+        self.bytes_scanned = 0
+        self.scan_seconds = 0.0
+        self.error_lines = 0
+
+    @property
+    def event_name(self) -> str:
+        return "log_tail"
+
+    @property
+    def mb_per_sec(self) -> float:
+        """Average scan throughput since the hook was created"""
+        if self.scan_seconds <= 0:
+            return 0.0
+        return self.bytes_scanned / self.scan_seconds / 1e6
+
+    def check(self) -> bool:
+        """Scan new log content and return True if the alert level changed"""
+        if not self.files or not self.keywords:
+            return False
+
+        start = time.perf_counter()
+        new_lines = 0
+        for tailed in self.files:
+            try:
+                new_lines += self._scan_file(tailed)
+            except Exception as e:
+                print(f"Error tailing {tailed.path}: {e}")
+        self.scan_seconds += time.perf_counter() - start
+        self._new_lines = new_lines
+        self.error_lines += new_lines
+
+        now = time.monotonic()
+        if new_lines:
+            self._last_match_time = now
+        if new_lines >= self.crit_lines:
+            current_level = AlertLevel.CRITICAL
+        elif new_lines:
+            current_level = AlertLevel.WARNING
+        elif (self._last_match_time is not None and
+              now - self._last_match_time < self.hold_seconds):
+            current_level = self._last_level
+        else:
+            current_level = AlertLevel.NORMAL
+
+        if self._last_level != current_level:
+            self._last_level = current_level
+            return True
+
+        return False
+
+    def _scan_file(self, tailed: TailedFile) -> int:
+        """Read and scan everything new in one file; returns error line count"""
+        if tailed.fd is None:
+            # First check opens at the end; files that appear later are read in full
+            from_start = self.from_start or tailed.checked
+            tailed.checked = True
+            if not tailed.open(from_start):
+                return 0
+
+        count = 0
+        if tailed.rotated():
+            # Finish the old file, including an unterminated last line, before switching
+            count += self._scan_new_bytes(tailed, final=True)
+            tailed.open(from_start=True)
+        elif tailed.truncated():
+            tailed.offset = 0
+
+        return count + self._scan_new_bytes(tailed)
+
+    def _scan_new_bytes(self, tailed: TailedFile, final: bool = False) -> int:
+        """Scan from the offset to the end of the file (final: the file won't grow any more)"""
+        buf = self._buf
+        count = 0
+        budget = self.max_bytes_per_check
+        while budget > 0:
+            n = os.preadv(tailed.fd, [buf], tailed.offset)
+            if n <= 0:
+                break
+            # Only consume complete lines, unless one line fills the buffer
+            end = n if final else buf.rfind(b"\n", 0, n) + 1
+            if end == 0:
+                if n < len(buf):
+                    break
+                end = n
+            count += self._scan(buf, end)
+            tailed.offset += end
+            budget -= end
+            self.bytes_scanned += end
+            if n < len(buf):
+                break
+        return count
+
+    def _scan(self, buf: bytearray, end: int) -> int:
+        """Count lines in buf[:end] that contain a keyword"""
+        # The next occurrence of each keyword is cached, so every keyword
+        # scans the chunk once; a line is counted at its first hit
+        keywords = self.keywords
+        next_hit = [buf.find(k, 0, end) for k in keywords]
+        count = 0
+        pos = 0
+        while True:
+            first = -1
+            for i, hit in enumerate(next_hit):
+                if 0 <= hit < pos:
+                    hit = next_hit[i] = buf.find(keywords[i], pos, end)
+                if hit >= 0 and (first < 0 or hit < first):
+                    first = hit
+            if first < 0:
+                break
+
+            line_start = max(pos, buf.rfind(b"\n", pos, first) + 1)
+            line_end = buf.find(b"\n", first, end)
+            if line_end < 0:
+                line_end = end
+            count += 1
+            self._last_line = buf[line_start:line_end].decode("utf-8", "replace")
+            pos = line_end + 1
+        return count
+
+    def get_message(self) -> HookMessage:
+        """Generate alert message for the current log state"""
+        color = AlertColorScheme.get_color(self._last_level)
+
+        return HookMessage(
+            hook_name=self.event_name,
+            alert_level=self._last_level,
+            color=color,
+            metadata={
+                "new_error_lines": self._new_lines,
+                "last_line": self._last_line,
+                "total_error_lines": self.error_lines,
+                "scan_mb_per_sec": self.mb_per_sec,
+            }
+        )
+
+    def on_trigger(self, pattern_manager):
+        """Called if no linked pattern is configured"""
+        level = self._last_level.name if self._last_level else "UNKNOWN"
+        print(f"Log alert [{level}]: {self._new_lines} new error lines, last: {self._last_line}")
@@ -0,0 +1,195 @@
+"""
+Network Throughput Monitoring Hook
+Reads /proc/net/dev directly and reports per-interface receive/transmit rates
+"""
+
+import os
+import time
+from backend import SystemEventHook
+from hook_alerts import AlertLevel, HookMessage, AlertColorScheme
+
+
+PROC_NET_DEV = "/proc/net/dev"
+
+
+class NetworkThroughputHook(SystemEventHook):
+    """
+    Monitor NIC throughput and send alerts at multiple levels:
+    - NORMAL: All interfaces below warning threshold
+    - WARNING: Busiest direction of any interface at warning threshold (default 50 Mbit/s)
+    - CRITICAL: Busiest direction of any interface at critical threshold (default 90 Mbit/s)
+
+    Each sample is a single pread() of /proc/net/dev into a reused buffer.
+    Byte counters from the previous tick are kept in preallocated lists
+    indexed by interface, and the name -> index map is only rebuilt when
+    an interface appears or disappears.
+    """
+
+    def __init__(self, warn_mbps=50.0, crit_mbps=90.0, interfaces=None,
+                 proc_path=PROC_NET_DEV, buffer_size=8192):
+        """
+        Initialize network throughput monitor hook
+
+        Args:
+            warn_mbps: Throughput (Mbit/s) to trigger WARNING level
+            crit_mbps: Throughput (Mbit/s) to trigger CRITICAL level
+            interfaces: Interface names to watch (default: all except loopback)
+            proc_path: Path of the kernel network statistics file
+            buffer_size: Initial size of the read buffer in bytes
+        """
+        self.warn_mbps = warn_mbps
+        self.crit_mbps = crit_mbps
+        self.interfaces = set(interfaces) if interfaces else None
+        self._wanted = {name.encode() for name in interfaces} if interfaces else None
+        self.proc_path = proc_path
+        self._fd = None
+        self._buf = bytearray(buffer_size)
+        self._last_level = None
+        self._last_iface_levels = ()
+        self._last_time = None
+
+        # Per-interface state, rebuilt only when the interface set changes
+        self._index = {}
+        self.iface_names = []
+        self._prev_rx = []
+        self._prev_tx = []
+        self.rx_mbps = []
+        self.tx_mbps = []
+
+    @property
+    def event_name(self) -> str:
+        return "net_throughput_monitor"
+
+    def check(self) -> bool:
+        """Sample interface counters and return True if any interface changed level"""
+        try:
+            if not self.sample():
+                return False
+        except Exception as e:
+            print(f"Error reading {self.proc_path}: {e}")
+            return False
+
+        iface_levels = tuple(
+            self._level_for(max(rx, tx)) for rx, tx in zip(self.rx_mbps, self.tx_mbps)
+        )
+        if iface_levels != self._last_iface_levels:
+            self._last_iface_levels = iface_levels
+            self._last_level = max(iface_levels, key=lambda level: level.value,
+                                   default=AlertLevel.NORMAL)
+            return True
+
+        return False
+
+    def sample(self) -> bool:
+        """
+        Read /proc/net/dev once and update `rx_mbps`/`tx_mbps` in place.
+
+        Returns False when there is no previous tick to compute a delta
+        against (first call, or the interface set changed).
+        """
+        n = self._read()
+        now = time.monotonic()
+        buf = self._buf
+        elapsed = now - self._last_time if self._last_time else 0.0
+        self._last_time = now
+
+        has_previous = elapsed > 0
+        seen = 0
+        # The first two lines are column headers
+        pos = buf.find(b"\n", buf.find(b"\n", 0, n) + 1, n) + 1
+        while 0 < pos < n:
+            line_end = buf.find(b"\n", pos, n)
+            if line_end < 0:
+                line_end = n
+            colon = buf.find(b":", pos, line_end)
+            start, pos = pos, line_end + 1
+            if colon < 0:
+                continue
+            name = bytes(buf[start:colon]).strip()
+            if self._wanted is None:
+                if name == b"lo":
+                    continue
+            elif name not in self._wanted:
+                continue
+
+            fields = buf[colon + 1:line_end].split()
+            rx = int(fields[0])
+            tx = int(fields[8])
+            i = self._index.get(name)
+            if i is None:
+                i = self._add_interface(name, rx, tx)
+                has_previous = False
+            elif elapsed > 0:
+                # bytes/s -> Mbit/s
+                self.rx_mbps[i] = max(rx - self._prev_rx[i], 0) * 8e-6 / elapsed
+                self.tx_mbps[i] = max(tx - self._prev_tx[i], 0) * 8e-6 / elapsed
+            self._prev_rx[i] = rx
+            self._prev_tx[i] = tx
+            seen += 1
+
+        if seen != len(self.iface_names):
+            # An interface disappeared; start over with a fresh index
+            self._reset()
+            has_previous = False
+
+        return has_previous
+
+    def _add_interface(self, name: bytes, rx: int, tx: int) -> int:
+        i = len(self.iface_names)
+        self._index[name] = i
+        self.iface_names.append(name.decode())
+        self._prev_rx.append(rx)
+        self._prev_tx.append(tx)
+        self.rx_mbps.append(0.0)
+        self.tx_mbps.append(0.0)
+        return i
+
+    def _reset(self):
+        self._index = {}
+        self.iface_names = []
+        self._prev_rx = []
+        self._prev_tx = []
+        self.rx_mbps = []
+        self.tx_mbps = []
+
+    def _read(self) -> int:
+        """Read the whole file with one syscall, growing the buffer if needed"""
+        if self._fd is None:
+            self._fd = os.open(self.proc_path, os.O_RDONLY)
+        while True:
+            n = os.preadv(self._fd, [self._buf], 0)
+            if n < len(self._buf):
+                return n
+            self._buf = bytearray(len(self._buf) * 2)
+
+    def _level_for(self, mbps: float) -> AlertLevel:
+        if mbps >= self.crit_mbps:
+            return AlertLevel.CRITICAL
+        if mbps >= self.warn_mbps:
+            return AlertLevel.WARNING
+        return AlertLevel.NORMAL
+
+    def get_message(self) -> HookMessage:
+        """Generate alert message with the throughput of every interface"""
+        color = AlertColorScheme.get_color(self._last_level)
+
+        return HookMessage(
+            hook_name=self.event_name,
+            alert_level=self._last_level,
+            color=color,
+            metadata={
+                "interfaces": list(self.iface_names),
+                "rx_mbps": list(self.rx_mbps),
+                "tx_mbps": list(self.tx_mbps),
+                "interface_levels": [level.name for level in self._last_iface_levels],
+            }
+        )
+
+    def on_trigger(self, pattern_manager):
+        """Called if no linked pattern is configured"""
+        level = self._last_level.name if self._last_level else "UNKNOWN"
+        rates = ", ".join(
+            f"{name} rx {rx:.1f}/tx {tx:.1f} Mbit/s"
+            for name, rx, tx in zip(self.iface_names, self.rx_mbps, self.tx_mbps)
+        )
+        print(f"Network alert [{level}]: {rates}")
@@ -0,0 +1,179 @@
+"""
+Process Watch Hook
+Watches configured services and alerts when they die or exceed CPU/RSS limits
+"""
+
+import time
+import psutil
+from backend import SystemEventHook
+from hook_alerts import AlertLevel, HookMessage, AlertColorScheme
+from config import PROCESS_WATCH
+
+
+class WatchedProcess:
+    """One entry of PROCESS_WATCH plus the psutil.Process objects that matched it"""
+
+    def __init__(self, spec: dict):
+        self.name = spec.get("name")
+        self.cmdline = spec.get("cmdline")
+        if not self.name and not self.cmdline:
+            raise ValueError(f"process watch entry needs a name or cmdline: {spec}")
+        self.label = spec.get("label") or self.name or self.cmdline
+        self.min_count = spec.get("min_count", 1)
+        self.max_cpu = spec.get("max_cpu")
+        self.max_rss = spec["max_rss_mb"] * 1024 * 1024 if spec.get("max_rss_mb") else None
+
+        self.processes = {}  # pid -> psutil.Process, kept across ticks
+        self.cpu_percent = 0.0
+        self.rss = 0
+        self.level = AlertLevel.NORMAL
+
+    def matches(self, info: dict) -> bool:
+        if self.name and info.get("name") != self.name:
+            return False
+        if self.cmdline:
+            cmdline = info.get("cmdline")
+            if not cmdline or self.cmdline not in " ".join(cmdline):
+                return False
+        return True
+
+    @property
+    def missing(self) -> bool:
+        return len(self.processes) < self.min_count
+
+
+class ProcessWatchHook(SystemEventHook):
+    """
+    Watch processes by name/cmdline and send alerts at multiple levels:
+    - NORMAL: All watched processes running and within limits
+    - WARNING: A watched process is over its max_cpu or max_rss_mb limit
+    - CRITICAL: A watched process is not running (or fewer than min_count)
+
+    PIDs are cached between ticks and each process is sampled inside
+    psutil's oneshot() context. /proc is rescanned at most once every
+    `rescan_interval` seconds, and a single scan resolves every watch at
+    once: it replaces processes that died and picks up newly started ones
+    (e.g. extra worker children). A process whose stats are not readable
+    (AccessDenied) still counts as running, without its CPU/RSS.
+    """
+
+    def __init__(self, watches=None, rescan_interval=5.0):
+        """
+        Initialize process watch hook
+
+        Args:
+            watches: List of watch specs (default: config.PROCESS_WATCH)
+            rescan_interval: Minimum seconds between /proc rescans for new or missing processes
+        """
+        self.watches = [WatchedProcess(spec) for spec in
+                        (PROCESS_WATCH if watches is None else watches)]
+        self.rescan_interval = rescan_interval
+        self._last_scan = None
+        self._last_level = None
+        self._last_watch_levels = ()
+        self.scans = 0
+
+    @property
+    def event_name(self) -> str:
+        return "process_watch"
+
+    def check(self) -> bool:
+        """Sample watched processes and return True if any watch changed level"""
+        if not self.watches:
+            return False
+
+        try:
+            self.sample()
+        except Exception as e:
+            print(f"Error checking watched processes: {e}")
+            return False
+
+        watch_levels = tuple(w.level for w in self.watches)
+        if watch_levels != self._last_watch_levels:
+            self._last_watch_levels = watch_levels
+            self._last_level = max(watch_levels, key=lambda level: level.value)
+            return True
+
+        return False
+
+    def sample(self):
+        """Sample every cached process, rescanning /proc when the interval is up"""
+        now = time.monotonic()
+        if self._last_scan is None or now - self._last_scan >= self.rescan_interval:
+            self._last_scan = now
+            self._rescan()
+
+        for watch in self.watches:
+            self._sample_watch(watch)
+
+        for watch in self.watches:
+            watch.level = self._level_for(watch)
+
+    def _sample_watch(self, watch: WatchedProcess):
+        cpu = 0.0
+        rss = 0
+        for pid, proc in list(watch.processes.items()):
+            try:
+                with proc.oneshot():
+                    if proc.status() == psutil.STATUS_ZOMBIE:
+                        raise psutil.NoSuchProcess(pid)
+                    # First call per Process returns 0.0 and primes the counter
+                    proc_cpu = proc.cpu_percent(None)
+                    proc_rss = proc.memory_info().rss
+            except psutil.NoSuchProcess:
+                del watch.processes[pid]
+                continue
+            except psutil.AccessDenied:
+                continue  # Still running; its stats just aren't ours to read
+            cpu += proc_cpu
+            rss += proc_rss
+        watch.cpu_percent = cpu
+        watch.rss = rss
+
+    def _rescan(self):
+        """One pass over /proc adding every matching process not cached yet"""
+        self.scans += 1
+        want_cmdline = any(w.cmdline for w in self.watches)
+        attrs = ["name", "cmdline"] if want_cmdline else ["name"]
+        for proc in psutil.process_iter(attrs):
+            for watch in self.watches:
+                if proc.pid not in watch.processes and watch.matches(proc.info):
+                    watch.processes[proc.pid] = proc
+
+    def _level_for(self, watch: WatchedProcess) -> AlertLevel:
+        if watch.missing:
+            return AlertLevel.CRITICAL
+        if watch.max_cpu is not None and watch.cpu_percent >= watch.max_cpu:
+            return AlertLevel.WARNING
+        if watch.max_rss is not None and watch.rss >= watch.max_rss:
+            return AlertLevel.WARNING
+        return AlertLevel.NORMAL
+
+    def get_message(self) -> HookMessage:
+        """Generate alert message with the state of every watched process"""
+        color = AlertColorScheme.get_color(self._last_level)
+
+        return HookMessage(
+            hook_name=self.event_name,
+            alert_level=self._last_level,
+            color=color,
+            metadata={
+                "processes": [
+                    {
+                        "label": w.label,
+                        "pids": sorted(w.processes),
+                        "cpu_percent": w.cpu_percent,
+                        "rss_mb": w.rss / (1024 * 1024),
+                        "level": w.level.name,
+                    }
+                    for w in self.watches
+                ]
+            }
+        )
+
+    def on_trigger(self, pattern_manager):
+        """Called if no linked pattern is configured"""
+        level = self._last_level.name if self._last_level else "UNKNOWN"
+        problems = ", ".join(f"{w.label}={w.level.name}" for w in self.watches
+                             if w.level is not AlertLevel.NORMAL)
+        print(f"Process watch alert [{level}]: {problems or 'all OK'}")
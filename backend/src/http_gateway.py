@@ -0,0 +1,296 @@
+"""
+HTTP Gateway - optional HTTP/1.1 front end to the IPC actions
+Lets dashboards on other machines drive the service. REST routes map onto
+the same actions the Unix socket serves (IPCServer.dispatch), connections
+are kept alive between requests, and GET /api/events streams state changes
+as server-sent events.
+
+Routes (JSON bodies and responses; query string values are params too):
+  GET    /api/status                  status
+  GET    /api/patterns                list_patterns
+  GET    /api/hooks                   list_hooks
+  GET    /api/startup                 list_startup
+  POST   /api/startup                 register_startup {name, linked_hook}
+  DELETE /api/startup?name=...        unregister_startup
+  GET    /api/links                   list_hook_pattern_links
+  POST   /api/links                   link_hook_to_pattern {hook_event_name, pattern_name}
+  DELETE /api/links?hook_event_name=  unlink_hook
+  GET    /api/persistent-links        list_persistent_links
+  POST   /api/persistent-links        add_persistent_link {hook_event_name, pattern_name}
+  DELETE /api/persistent-links?...    remove_persistent_link
+  GET    /api/startup-patterns        list_startup_patterns
+  POST   /api/startup-patterns        add_pattern_to_startup {pattern_name}
+  DELETE /api/startup-patterns?...    remove_pattern_from_startup
+  POST   /api/pattern/start           start_pattern {name}
+  POST   /api/pattern/stop            stop_pattern
+  POST   /api/pattern/stop-all        stop_all
+  POST   /api/pattern/save            save_pattern {name}
+  GET    /api/pattern/config?name=... get_pattern_config
+  POST   /api/pattern/params          set_pattern_params {name, params}
+  POST   /api/pattern/zones           set_pattern_zones {name, zones}
+  POST   /api/hooks/test-trigger      trigger_test_hook
+  GET    /api/frame                   get_frame (frame is base64, as in the JSON codec)
+  GET    /api/metrics                 metrics
+  GET    /api/stats                   stats
+  GET    /api/startup-profile         startup_profile
+  POST   /api/batch                   batch {requests}
+  POST   /api/action/<action>         any other action by name
+  GET    /api/events?topics=a,b       server-sent events (see event_bus)
+
+Responses are the IPC response objects: 200 when "ok" is true, 400 when it
+is false. List and status reads carry an ETag of the state version; send it
+back in If-None-Match to get 304 Not Modified when nothing changed.
+`shutdown` is not reachable over HTTP. When a token is configured every
+request needs "Authorization: Bearer <token>".
+"""
+
+import hmac
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from event_bus import TOPICS
+from ipc_codec import JSONCodec
+
+ROUTES = {
+    ("GET", "/api/status"): "status",
+    ("GET", "/api/patterns"): "list_patterns",
+    ("GET", "/api/hooks"): "list_hooks",
+    ("GET", "/api/startup"): "list_startup",
+    ("POST", "/api/startup"): "register_startup",
+    ("DELETE", "/api/startup"): "unregister_startup",
+    ("GET", "/api/links"): "list_hook_pattern_links",
+    ("POST", "/api/links"): "link_hook_to_pattern",
+    ("DELETE", "/api/links"): "unlink_hook",
+    ("GET", "/api/persistent-links"): "list_persistent_links",
+    ("POST", "/api/persistent-links"): "add_persistent_link",
+    ("DELETE", "/api/persistent-links"): "remove_persistent_link",
+    ("GET", "/api/startup-patterns"): "list_startup_patterns",
+    ("POST", "/api/startup-patterns"): "add_pattern_to_startup",
+    ("DELETE", "/api/startup-patterns"): "remove_pattern_from_startup",
+    ("POST", "/api/pattern/start"): "start_pattern",
+    ("POST", "/api/pattern/stop"): "stop_pattern",
+    ("POST", "/api/pattern/stop-all"): "stop_all",
+    ("POST", "/api/pattern/save"): "save_pattern",
+    ("GET", "/api/pattern/config"): "get_pattern_config",
+    ("POST", "/api/pattern/params"): "set_pattern_params",
+    ("POST", "/api/pattern/zones"): "set_pattern_zones",
+    ("POST", "/api/hooks/test-trigger"): "trigger_test_hook",
+    ("GET", "/api/frame"): "get_frame",
+    ("GET", "/api/metrics"): "metrics",
+    ("GET", "/api/stats"): "stats",
+    ("GET", "/api/startup-profile"): "startup_profile",
+    ("POST", "/api/batch"): "batch",
+}
+ACTION_PREFIX = "/api/action/"
+HTTP_EXCLUDED = {"shutdown"}  # Actions a remote client may not run
+MAX_BODY = 1024 * 1024
+INT_QUERY_PARAMS = {"if_version"}  # Query string values passed on as integers
+SSE_KEEPALIVE = 15.0  # Seconds between comment lines on an idle event stream
+SSE_BUFFER = 256      # Events buffered per stream before the oldest are dropped
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    """One keep-alive connection; `server.gateway` is the owning HTTPGateway"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive; every response has a Content-Length
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    def log_message(self, format, *args):
+        pass  # One line per request is too noisy for the service log
+
+    def _route(self, method: str):
+        gateway = self.server.gateway
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        # Check the token first, so an unauthenticated client can't make us read and parse a body
+        if not gateway.authorized(self.headers.get("Authorization")):
+            if self.headers.get("Content-Length", "0") != "0" or "Transfer-Encoding" in self.headers:
+                self.close_connection = True  # The unread body would be parsed as the next request
+            self._send_json(401, {"ok": False, "error": "missing or wrong bearer token"},
+                            {"WWW-Authenticate": "Bearer"})
+            return
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            self.close_connection = True  # The unread body would be parsed as the next request
+            self._send_json(400, {"ok": False, "error": str(e)})
+            return
+        for key in INT_QUERY_PARAMS & params.keys():
+            try:
+                params[key] = int(params[key])
+            except ValueError:
+                self._send_json(400, {"ok": False, "error": f"{key} must be an integer"})
+                return
+        if isinstance(body, dict):
+            params.update(body)
+
+        if method == "GET" and url.path == "/api/events":
+            self._stream_events(params)
+            return
+        action = ROUTES.get((method, url.path))
+        if action is None and method == "POST" and url.path.startswith(ACTION_PREFIX):
+            action = url.path[len(ACTION_PREFIX):]
+        if action is None:
+            known = any(path == url.path for _, path in ROUTES)
+            self._send_json(405 if known else 404, {"ok": False, "error": f"no route {method} {url.path}"})
+            return
+        if action in HTTP_EXCLUDED:
+            self._send_json(403, {"ok": False, "error": f"{action} is not available over HTTP"})
+            return
+
+        etag = self.headers.get("If-None-Match", "").strip('"')
+        if etag.isdigit():
+            params["if_version"] = int(etag)
+        resp = gateway.ipc.dispatch(action, params)
+        headers = {"ETag": f'"{resp["version"]}"'} if "version" in resp else {}
+        if resp.get("not_modified"):
+            self._send(304, b"", None, headers)
+        else:
+            self._send_json(200 if resp.get("ok") else 400, resp, headers)
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ValueError("bad Content-Length")
+        if length > MAX_BODY:
+            raise ValueError("request body too large")
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise ValueError("request body is not valid JSON")
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, default=JSONCodec._default).encode("utf-8")
+        self._send(status, body, "application/json", headers)
+
+    def _send(self, status: int, body: bytes, content_type, headers: dict = None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if status != 304:  # A 304 has no body and must not describe one
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _stream_events(self, params: dict):
+        """Server-sent events until the client goes away or the gateway stops"""
+        gateway = self.server.gateway
+        topics = [t for t in params.get("topics", "").split(",") if t] or TOPICS
+        wakeup = threading.Event()
+        gateway.streams.add(wakeup)
+        try:
+            sub = gateway.ipc.manager.events.subscribe(topics, maxlen=SSE_BUFFER,
+                                                       notify=lambda _sub: wakeup.set())
+        except ValueError as e:
+            gateway.streams.discard(wakeup)
+            self._send_json(400, {"ok": False, "error": str(e)})
+            return
+        self.close_connection = True  # The stream has no length; it ends with the connection
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"retry: 2000\n\n")
+            while not gateway.stopping.is_set():
+                wakeup.wait(SSE_KEEPALIVE)
+                wakeup.clear()
+                events, dropped = sub.drain()
+                if not events:
+                    self.wfile.write(b": keepalive\n\n")
+                    continue
+                chunks = []
+                for event in events:
+                    if dropped:
+                        event = {**event, "dropped": dropped}
+                        dropped = 0
+                    chunks.append(f"id: {event['seq']}\nevent: {event['topic']}\n"
+                                  f"data: {json.dumps(event, default=str)}\n\n")
+                self.wfile.write("".join(chunks).encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            gateway.ipc.manager.events.unsubscribe(sub)
+            gateway.streams.discard(wakeup)
+
+
+class _GatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        error = sys.exc_info()[1]
+        if isinstance(error, ConnectionError):
+            return  # Client went away mid-request
+        print(f"HTTP gateway: error serving {client_address}: {error}")
+
+
+class HTTPGateway(threading.Thread):
+    """Serves the HTTP gateway on its own threads (one per connection)"""
+
+    def __init__(self, ipc, host: str = "127.0.0.1", port: int = 8765, token: str = None):
+        """
+        Args:
+            ipc: IPCServer whose actions are exposed
+            host: Address to bind ("0.0.0.0" to accept remote clients)
+            port: TCP port
+            token: If set, required as "Authorization: Bearer <token>"
+        """
+        super().__init__(daemon=True, name="http-gateway")
+        self.ipc = ipc
+        self.host = host
+        self.port = port
+        self.token = token
+        self.ready = threading.Event()  # Set once the socket is listening
+        self.stopping = threading.Event()
+        self.streams = set()  # Wakeup events of open event streams
+        self._server = None
+
+    def authorized(self, header) -> bool:
+        if not self.token:
+            return True
+        expected = f"Bearer {self.token}"
+        return header is not None and hmac.compare_digest(header.encode("utf-8"), expected.encode("utf-8"))
+
+    def run(self):
+        try:
+            self._server = _GatewayServer((self.host, self.port), _GatewayHandler)
+        except Exception as e:
+            print(f"HTTP gateway: failed to bind {self.host}:{self.port}: {e}")
+            return
+        self._server.gateway = self
+        self.port = self._server.server_address[1]  # Resolved when bound to port 0
+        print(f"HTTP gateway: listening on http://{self.host}:{self.port}")
+        self.ready.set()
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Stop accepting requests and end open event streams"""
+        self.stopping.set()
+        for wakeup in list(self.streams):
+            wakeup.set()
+        if self._server is not None:
+            self._server.shutdown()
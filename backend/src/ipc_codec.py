@@ -0,0 +1,176 @@
+"""
+IPC Codec - message encodings for persistent IPC connections
+Every persistent connection starts with newline-delimited JSON. A client
+can switch its connection to the binary codec with the `hello` action:
+
+    -> {"id": 1, "action": "hello", "params": {"codec": "binary"}}
+    <- {"id": 1, "ok": true, "result": {"codec": "binary"}}
+
+Everything after that line, in both directions, is binary frames:
+
+    uint32  length of the rest of the frame
+    uint16  number of blobs
+    uint32  length of the JSON part
+    bytes   JSON part (UTF-8)
+    then per blob: uint32 length + raw bytes
+
+(header integers big-endian). Bulk data such as LED frames or metric series is
+wrapped in a Blob; the binary codec sends it as a raw byte block, referenced
+from the JSON part as {"$blob": index, "kind": ...}, with no per-element
+encoding; numeric arrays are little-endian. The JSON codec sends a Blob as
+{"$b64": ..., "kind": ...}.
+"""
+
+import base64
+import json
+import struct
+import sys
+from array import array
+from typing import Iterator, List, Optional
+
+FRAME_HEADER = struct.Struct("!IHI")  # rest length, blob count, JSON length
+BLOB_HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024  # Larger frames are treated as a protocol error
+
+
+class Blob:
+    """Bulk data sent as one raw block: bytes, or an array.array of numbers"""
+
+    __slots__ = ("data", "kind")
+
+    def __init__(self, data, kind: str = "bytes"):
+        """
+        Args:
+            data: bytes-like object, or an array.array (its typecode becomes `kind`)
+            kind: "bytes", or the array typecode the data is packed with
+        """
+        if isinstance(data, array):
+            kind = data.typecode
+            if sys.byteorder == "big":
+                data = array(kind, data)
+                data.byteswap()
+            data = data.tobytes()
+        self.data = data
+        self.kind = kind
+
+    def value(self):
+        """Decoded value: bytes, or an array.array for numeric kinds (little-endian on the wire)"""
+        if self.kind == "bytes":
+            return bytes(self.data)
+        values = array(self.kind)
+        values.frombytes(self.data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+
+def _restore_b64(obj: dict):
+    if "$b64" in obj and len(obj) == 2:
+        return Blob(base64.b64decode(obj["$b64"]), obj.get("kind", "bytes")).value()
+    return obj
+
+
+class JSONCodec:
+    """Newline-delimited JSON; blobs are base64 encoded"""
+
+    name = "json"
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, Blob):
+            return {"$b64": base64.b64encode(obj.data).decode("ascii"), "kind": obj.kind}
+        return str(obj)
+
+    def encode(self, message: dict) -> bytes:
+        return json.dumps(message, default=self._default).encode("utf-8") + b"\n"
+
+    def decode(self, buffer: bytearray) -> Iterator[Optional[dict]]:
+        """Take complete lines out of `buffer`, one per iteration; invalid lines decode to None"""
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                return
+            line = bytes(buffer[:end])
+            del buffer[:end + 1]
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line.decode("utf-8"), object_hook=_restore_b64)
+            except ValueError:
+                message = None
+            yield message if isinstance(message, dict) else None
+
+
+class BinaryCodec:
+    """Length-prefixed frames with raw blob blocks"""
+
+    name = "binary"
+
+    def encode(self, message: dict) -> bytes:
+        blobs = []
+
+        def default(obj):
+            if isinstance(obj, Blob):
+                blobs.append(obj)
+                return {"$blob": len(blobs) - 1, "kind": obj.kind}
+            return str(obj)
+
+        body = json.dumps(message, default=default).encode("utf-8")
+        parts = [None, body]
+        size = FRAME_HEADER.size - 4 + len(body)
+        for blob in blobs:
+            parts.append(BLOB_HEADER.pack(len(blob.data)))
+            parts.append(blob.data)
+            size += BLOB_HEADER.size + len(blob.data)
+        parts[0] = FRAME_HEADER.pack(size, len(blobs), len(body))
+        return b"".join(parts)
+
+    def decode(self, buffer: bytearray) -> Iterator[Optional[dict]]:
+        """Take complete frames out of `buffer`, one per iteration.
+
+        A frame with an unreadable JSON part decodes to None; a corrupt
+        header raises ValueError (the stream cannot be resynchronised).
+        """
+        while len(buffer) >= FRAME_HEADER.size:
+            size, blob_count, body_len = FRAME_HEADER.unpack_from(buffer)
+            end = 4 + size
+            if size > MAX_FRAME or FRAME_HEADER.size + body_len > end:
+                raise ValueError(f"bad frame header (size {size}, body {body_len})")
+            if len(buffer) < end:
+                break
+            view = memoryview(buffer)[:end]
+            try:
+                offset = FRAME_HEADER.size
+                body = bytes(view[offset:offset + body_len])
+                offset += body_len
+                blobs: List[bytes] = []
+                for index in range(blob_count):
+                    (length,) = BLOB_HEADER.unpack_from(view, offset)
+                    offset += BLOB_HEADER.size
+                    if offset + length > end:
+                        raise ValueError(f"bad frame: blob {index} ({length} bytes) overruns the frame")
+                    blobs.append(bytes(view[offset:offset + length]))
+                    offset += length
+            except struct.error:
+                raise ValueError(f"bad frame: {blob_count} blob headers overrun the frame") from None
+            finally:
+                view.release()
+            del buffer[:end]
+            yield self._decode_body(body, blobs)
+
+    @staticmethod
+    def _decode_body(body: bytes, blobs: list) -> Optional[dict]:
+        def restore(obj):
+            if "$blob" in obj and len(obj) == 2:
+                return Blob(blobs[obj["$blob"]], obj.get("kind", "bytes")).value()
+            return obj
+
+        try:
+            message = json.loads(body.decode("utf-8"), object_hook=restore)
+        except (ValueError, IndexError):
+            return None
+        return message if isinstance(message, dict) else None
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec(), BinaryCodec())}
+
@@ -0,0 +1,196 @@
+"""
+IPC Metrics - per-action latency histograms for the IPC server
+Every action the server handles is timed into a fixed-bucket histogram and
+counted as a success or an error. The numbers are served by the `metrics`
+IPC action and written periodically as a Prometheus textfile (for
+node_exporter's textfile collector) by MetricsWriter. The manager actor
+records its command timings with the same class.
+
+Buckets are fixed, so recording a sample is one bisect and a few integer
+increments under a lock, and memory does not grow with traffic.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Optional, Sequence
+
+# Upper bounds in seconds; samples above the last bound land in +Inf
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class ActionStats:
+    """Histogram and result counts of one action"""
+
+    __slots__ = ("counts", "total", "ok", "errors", "max")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * (bucket_count + 1)  # Per bucket (not cumulative), last is +Inf
+        self.total = 0.0  # Sum of all samples in seconds
+        self.ok = 0
+        self.errors = 0
+        self.max = 0.0
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class IPCMetrics:
+    """Thread-safe collection of ActionStats, keyed by action name"""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS, name: str = "wopr_ipc_request",
+                 label: str = "action", description: str = "Time spent handling IPC actions.",
+                 results: bool = True):
+        """
+        Args:
+            buckets: Ascending histogram upper bounds in seconds
+            name: Prometheus metric name prefix (<name>_duration_seconds, <name>s_total)
+            label: Prometheus label the action name is exported under
+            description: HELP text of the histogram
+            results: Export the ok/error counter as well as the histogram
+        """
+        self.buckets = tuple(buckets)
+        self.name = name
+        self.label = label
+        self.description = description
+        self.results = results
+        self.started = time.time()
+        self.version = 0  # Bumped on every sample; lets writers skip unchanged output
+        self._actions = {}
+        self._lock = threading.Lock()
+
+    def observe(self, action: str, seconds: float, ok: bool):
+        """Record one handled request"""
+        index = bisect_left(self.buckets, seconds)  # First bound >= seconds ("le" semantics)
+        with self._lock:
+            stats = self._actions.get(action)
+            if stats is None:
+                stats = self._actions[action] = ActionStats(len(self.buckets))
+            stats.counts[index] += 1
+            stats.total += seconds
+            if ok:
+                stats.ok += 1
+            else:
+                stats.errors += 1
+            if seconds > stats.max:
+                stats.max = seconds
+            self.version += 1
+
+    def _copy(self):
+        with self._lock:
+            return self.version, {name: (list(s.counts), s.total, s.ok, s.errors, s.max)
+                                  for name, s in self._actions.items()}
+
+    def _quantile_ms(self, counts: list, count: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if it is the +Inf bucket)"""
+        rank = q * count
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return round(bound * 1000, 3)
+        return None
+
+    def snapshot(self) -> dict:
+        """Plain-dict view of all actions, as returned by the `metrics` action"""
+        _, actions = self._copy()
+        result = {}
+        for name, (counts, total, ok, errors, longest) in sorted(actions.items()):
+            count = ok + errors
+            result[name] = {
+                "count": count,
+                "ok": ok,
+                "errors": errors,
+                "sum_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3) if count else 0.0,
+                "max_ms": round(longest * 1000, 3),
+                "p50_ms": self._quantile_ms(counts, count, 0.50),
+                "p99_ms": self._quantile_ms(counts, count, 0.99),
+                "counts": counts,
+            }
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "buckets_ms": [round(b * 1000, 3) for b in self.buckets],
+            "actions": result,
+        }
+
+    def prometheus_text(self) -> str:
+        """Render all actions in the Prometheus text exposition format"""
+        _, actions = self._copy()
+        histogram = f"{self.name}_duration_seconds"
+        lines = [
+            f"# HELP {histogram} {self.description}",
+            f"# TYPE {histogram} histogram",
+        ]
+        for name, (counts, total, ok, errors, _) in sorted(actions.items()):
+            label = f'{self.label}="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{histogram}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{histogram}_bucket{{{label},le="+Inf"}} {ok + errors}')
+            lines.append(f'{histogram}_sum{{{label}}} {total:.6f}')
+            lines.append(f'{histogram}_count{{{label}}} {ok + errors}')
+        if self.results:
+            counter = f"{self.name}s_total"
+            lines.append(f"# HELP {counter} Requests by {self.label} and result.")
+            lines.append(f"# TYPE {counter} counter")
+            for name, (_, _, ok, errors, _) in sorted(actions.items()):
+                label = f'{self.label}="{_escape_label(name)}"'
+                lines.append(f'{counter}{{{label},result="ok"}} {ok}')
+                lines.append(f'{counter}{{{label},result="error"}} {errors}')
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str, metrics: Sequence[IPCMetrics]):
+    """Atomically replace `path` with the given metrics (tmp file + rename)"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        for m in metrics:
+            f.write(m.prometheus_text())
+    os.replace(tmp_path, path)
+
+
+class MetricsWriter(threading.Thread):
+    """Background thread that writes IPCMetrics to a Prometheus textfile"""
+
+    def __init__(self, metrics: Sequence[IPCMetrics], path: str, interval: float = 15.0,
+                 trigger: Optional[Sequence[IPCMetrics]] = None):
+        """
+        Args:
+            metrics: Metrics to write, in order, to the one file
+            path: Textfile to (re)write, e.g. <PATTERN_LOCATION>/wopr_ipc.prom
+            interval: Seconds between writes
+            trigger: Metrics whose changes cause a write (default: all of them); the
+                others are written along, but never cause a write on their own
+        """
+        super().__init__(daemon=True, name="ipc-metrics")
+        self.metrics = list(metrics)
+        self.trigger = list(self.metrics if trigger is None else trigger)
+        self.path = path
+        self.interval = interval
+        self._written_version = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self._write()
+        self._write()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _write(self):
+        version = tuple(m.version for m in self.trigger)
+        if version == self._written_version:
+            return  # Unchanged; spare the SD card
+        try:
+            write_textfile(self.path, self.metrics)
+            self._written_version = version
+        except Exception as e:
+            print(f"IPC metrics: failed to write {self.path}: {e}")
@@ -1,6 +1,12 @@
 """
 IPC server using a Unix domain socket to control PatternManager from other processes.
-Simple JSON request/response protocol.
+One thread serves every client from a selector loop: reads of in-memory
+state are answered inline, everything else runs in request order on a
+worker thread (and through the manager's command actor). On top of the
+JSON request/response protocol it offers pipelined persistent connections,
+a binary codec (ipc_codec), batches, event subscriptions, a frame stream
+and per-action latency metrics (ipc_metrics). It uses the standard library
+only.
 
 Requests: JSON object with `action` and optional `params`.
 Responses: JSON object with `ok` (bool), `result` or `error`.
@@ -11,6 +17,43 @@ Example request:
 Example response:
   {"ok": true, "result": "started"}
 
+List and status reads return the state `version` they were served from;
+send it back as params {"if_version": N} to get a "not_modified" reply
+when nothing changed.
+
+Two connection modes, chosen by the client's first line:
+  - One-shot (e.g. socat): send one request, shut down the write side, read
+    the response until the server closes the connection.
+  - Persistent: send newline-delimited requests that each carry an `id`, on
+    one connection that stays open. Requests may be pipelined; responses come
+    back one per line with the request's `id`. Actions that change state run
+    in request order, but a read such as `status` can be answered before an
+    earlier slow action (e.g. `start_pattern`) finishes:
+      -> {"id": 1, "action": "status"}
+      <- {"id": 1, "ok": true, "result": {...}}
+
+Event subscriptions: after `subscribe` (optionally with `topics` from
+pattern/hook/link/error and a `buffer` size) the server pushes one line per
+event, tagged with the subscribe request's `id` in persistent mode:
+      -> {"id": 7, "action": "subscribe", "params": {"topics": ["pattern"]}}
+      <- {"id": 7, "ok": true, "result": {"topics": ["pattern"], "buffer": 256}}
+      <- {"id": 7, "topic": "pattern", "seq": 12, "time": ..., "data": {"event": "started", ...}}
+If the client reads too slowly, the oldest buffered events are dropped and
+the next event carries a `dropped` count. One-shot clients can subscribe as
+well (e.g. `echo '{"action": "subscribe"}' | socat -t 86400 - UNIX-CONNECT:/tmp/wopr.sock`).
+
+Frame stream: after `stream_frames` {fps} a persistent connection gets the
+strip's LED colors up to fps times a second, as deltas against the last
+frame it was sent (see frame_delta). The first frame, and any frame after
+the strip length changed, is a key frame covering every LED; unchanged
+frames are not sent, and frames are skipped while the client reads too
+slowly. `runs` and `data` are blobs:
+      -> {"id": 8, "action": "stream_frames", "params": {"fps": 20}}
+      <- {"id": 8, "ok": true, "result": {"fps": 20}}
+      <- {"id": 8, "topic": "frame", "seq": 1, "num_leds": 60, "key": true,
+          "runs": [0, 60], "data": <60 * 3 RGB bytes>}
+{"fps": 0} stops the stream.
+
 Supported actions:
   - list_patterns
   - list_hooks
@@ -31,26 +74,150 @@ Supported actions:
   - add_pattern_to_startup {pattern_name}
   - remove_pattern_from_startup {pattern_name}
   - list_startup_patterns
+  - get_pattern_config {name} (saved params and zones of a pattern)
+  - set_pattern_params {name, params} (JSON object; {} clears them)
+  - set_pattern_zones {name, zones} ([{name, start, length}, ...]; [] clears them)
+  - startup_profile (start offset and duration of each boot stage, in ms)
+  - batch {requests: [{action, params}, ...]} (runs the requests in order as one
+    manager command, so they see one consistent state; returns their responses)
+  - get_frame (current LED colors as packed RGB bytes, a blob)
+  - metrics (per-action request counts, errors and latency histograms, plus the
+    manager's command queue depth, queue wait and run times; see ipc_metrics)
+  - stats (dashboard snapshot: strip FPS, long frame gaps and frame/write time
+    histograms, per-hook check times and circuit breaker states, IPC latency)
+  - hello {codec} (switch a persistent connection to "json" or "binary"; see ipc_codec)
+  - subscribe {topics, buffer} (keeps the connection open and pushes events)
+  - unsubscribe
+  - stream_frames {fps} (pushes LED frame deltas on a persistent connection)
   - shutdown (stops manager patterns and stops the server)
-
-This server is intentionally small and dependency-free.
 """
 
+import functools
 import os
+import selectors
 import socket
 import threading
 import json
+import time
 import traceback
-from typing import Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from event_bus import TOPICS
+from frame_delta import encode_delta, key_delta
+from ipc_codec import CODECS, Blob, JSONCodec
+from ipc_metrics import IPCMetrics
+
+
+LISTEN_BACKLOG = 128  # Pending connections before new clients are refused
+# Actions that cannot appear inside a batch
+BATCH_EXCLUDED = {"batch", "subscribe", "unsubscribe", "shutdown"}
+SUBSCRIBE_BUFFER = 256  # Default events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_OUTBUF_LIMIT = 64 * 1024  # Stop moving events to a socket with this much unsent
+MAX_FRAME_FPS = 60  # Highest frame stream rate a client may ask for
+
+# Actions that only read in-memory state. They are answered directly on the
+# I/O thread; everything else runs on the worker thread, so a slow
+# start_pattern (which can wait up to 2s for the old pattern to stop) or a
+# plugin rescan never delays them.
+INLINE_ACTIONS = {
+    "status",
+    "list_startup",
+    "list_hook_pattern_links",
+    "list_persistent_links",
+    "list_startup_patterns",
+    "get_pattern_config",
+    "startup_profile",
+    "get_frame",
+    "metrics",
+    "stats",
+}
+
+# Read actions answered from the manager's versioned state snapshot (no disk
+# I/O). A request whose params carry {"if_version": N} matching the current
+# version gets {"ok": true, "not_modified": true, "version": N} instead.
+SNAPSHOT_READS = {
+    "list_patterns": lambda snap: snap["patterns"],
+    "list_hooks": lambda snap: snap["hooks"],
+    "status": lambda snap: {"current_pattern": snap["current_pattern"]},
+    "list_startup": lambda snap: {"startup_patterns": snap["startup_patterns"],
+                                  "startup_links": snap["startup_links"]},
+    "list_hook_pattern_links": lambda snap: snap["hook_pattern_links"],
+    "list_persistent_links": lambda snap: snap["persistent_links"],
+    "list_startup_patterns": lambda snap: snap["standalone_patterns"],
+}
+
+
+class _Connection:
+    """Buffers and protocol mode of one client connection"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.mode = None      # None until the first line arrives, then "stream" or "oneshot"
+        self.eof = False      # Client shut down its write side
+        self.codec = CODECS["json"]  # Persistent-mode encoding, switched by `hello`
+        self.pending = 0      # Requests handed to the worker and not answered yet
+        self.subscription = None     # event_bus.Subscription after a subscribe request
+        self.subscription_id = None  # Request id of the subscribe, echoed on every event
+        self.frames = None    # _FrameStream after a stream_frames request
+        self.events = selectors.EVENT_READ  # What the selector is watching for
+        self.closed = False
+
+
+class _FrameStream:
+    """Rate and last sent frame of one connection's frame stream"""
+
+    __slots__ = ("request_id", "interval", "due", "last", "seq")
+
+    def __init__(self, request_id, fps: float):
+        self.request_id = request_id
+        self.interval = 1.0 / fps
+        self.due = time.monotonic()
+        self.last = None  # Frame the client holds; None until the key frame
+        self.seq = 0
 
 
 class IPCServer(threading.Thread):
+    """
+    Serves any number of clients from one thread with a selector. Requests
+    that only read state are answered inline; the rest are run one at a time
+    on a worker thread and answered when they complete.
+    """
+
     def __init__(self, manager, socket_path: str = "/tmp/wopr.sock"):
         super().__init__(daemon=True)
         self.manager = manager
         self.socket_path = socket_path
         self._stop_event = threading.Event()
         self._sock = None
+        self.ready = threading.Event()  # Set once the socket is listening
+        self._selector = selectors.DefaultSelector()
+        self._conns = set()
+        # Manager calls that may block run here, one at a time, in request order
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ipc-worker")
+        self._completed = deque()  # (conn, request_id, action, response) from the worker
+        self._notified = deque()   # Subscriber connections with new events
+        self._frame_conns = set()  # Connections with a frame stream
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.metrics = IPCMetrics()  # Latency and result counts per action
+        # Dispatch table: action name -> handler(params) -> response
+        self._actions = {
+            name[len("_action_"):]: getattr(self, name)
+            for name in dir(self) if name.startswith("_action_")
+        }
+        for name in SNAPSHOT_READS:
+            self._actions[name] = functools.partial(self._snapshot_read, name)
+        # Actions that act on the connection itself; run on the I/O thread and reply themselves
+        self._connection_actions = {
+            "hello": self._hello,
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe_action,
+            "stream_frames": self._stream_frames,
+        }
 
     def run(self):
         # Remove stale socket
@@ -74,265 +241,657 @@ class IPCServer(threading.Thread):
         except Exception:
             pass
 
-        self._sock.listen(1)
+        self._sock.listen(LISTEN_BACKLOG)
+        self._sock.setblocking(False)
+        self._selector.register(self._sock, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
         print(f"IPC: listening on {self.socket_path}")
+        self.ready.set()
 
-        while not self._stop_event.is_set():
+        try:
+            while not self._stop_event.is_set():
+                for key, events in self._selector.select(timeout=self._select_timeout()):
+                    if key.data == "accept":
+                        self._accept()
+                    elif key.data == "wake":
+                        self._drain_wakeups()
+                    else:
+                        conn = key.data
+                        try:
+                            if events & selectors.EVENT_READ:
+                                self._on_readable(conn)
+                            if events & selectors.EVENT_WRITE and not conn.closed:
+                                self._flush(conn)
+                        except Exception:
+                            if not self._stop_event.is_set():
+                                traceback.print_exc()
+                            self._close(conn)
+                self._deliver_completed()
+                self._deliver_events()
+                self._deliver_frames()
+        finally:
+            for conn in list(self._conns):
+                self._close(conn)
+            self._selector.close()
+            self._sock.close()
+            self._worker.shutdown(wait=False, cancel_futures=True)
+            self._cleanup()
+
+    # --- connections -----------------------------------------------------
+
+    def _accept(self):
+        while True:
             try:
-                self._sock.settimeout(1.0)
-                conn, _ = self._sock.accept()
-            except socket.timeout:
-                continue
+                sock, _ = self._sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
             except Exception as e:
                 if not self._stop_event.is_set():
                     print(f"IPC: accept error: {e}")
-                break
-
-            with conn:
-                try:
-                    data = b""
-                    # read until EOF
-                    while True:
-                        chunk = conn.recv(4096)
-                        if not chunk:
-                            break
-                        data += chunk
-                    if not data:
-                        continue
+                return
+            sock.setblocking(False)
+            conn = _Connection(sock)
+            self._conns.add(conn)
+            self._selector.register(sock, selectors.EVENT_READ, conn)
 
-                    try:
-                        req = json.loads(data.decode("utf-8"))
-                    except Exception:
-                        self._send(conn, ok=False, error="invalid json")
+    def _on_readable(self, conn: _Connection):
+        try:
+            chunk = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except ConnectionError:
+            self._close(conn)
+            return
+        if chunk:
+            conn.inbuf += chunk
+        else:
+            conn.eof = True
+
+        if conn.mode is None:
+            # The first line decides the mode; a client that shuts down its
+            # write side without sending a newline is a one-shot client
+            line, sep, rest = conn.inbuf.partition(b"\n")
+            first = self._parse_stream_request(line) if sep else None
+            if first is not None:
+                conn.mode = "stream"
+                conn.inbuf = rest
+                self._submit(conn, first)
+            elif sep or conn.eof:
+                conn.mode = "oneshot"
+
+        if conn.mode == "stream":
+            self._read_requests(conn)
+        elif conn.mode == "oneshot" and conn.eof and conn.inbuf:
+            data, conn.inbuf = bytes(conn.inbuf), bytearray()
+            try:
+                req = json.loads(data.decode("utf-8"))
+            except Exception:
+                req = None
+                self._queue_response(conn, {"ok": False, "error": "invalid json"})
+            if req is not None:
+                self._submit(conn, req)
+
+        # After EOF, stop reading and close once every response has been written
+        self._update_interest(conn)
+
+    def _read_requests(self, conn: _Connection):
+        """Submit every complete request in the input buffer, in the connection's codec"""
+        while not conn.closed:
+            codec = conn.codec
+            try:
+                for req in codec.decode(conn.inbuf):
+                    if req is None:
+                        self._queue_response(conn, {"id": None, "ok": False, "error": "invalid request"})
                         continue
+                    self._submit(conn, req)
+                    if conn.codec is not codec:
+                        break  # `hello` switched codecs; decode the rest with the new one
+                else:
+                    return
+            except ValueError as e:
+                print(f"IPC: closing connection after protocol error: {e}")
+                self._close(conn)
+                return
+
+    @staticmethod
+    def _parse_stream_request(line: bytes):
+        """Return the request if `line` is a persistent-mode request (a JSON object with an id)"""
+        try:
+            req = json.loads(line.decode("utf-8"))
+        except Exception:
+            return None
+        if isinstance(req, dict) and "id" in req:
+            return req
+        return None
+
+    def _submit(self, conn: _Connection, req: dict):
+        """Answer a request inline, or hand it to the worker thread"""
+        action = req.get("action")
+        params = req.get("params", {}) or {}
+        request_id = req.get("id")
+        handler = self._connection_actions.get(action)
+        if handler is not None:
+            start = time.perf_counter()
+            resp = handler(conn, request_id, params)
+            self.metrics.observe(action, time.perf_counter() - start, resp["ok"])
+            return
+        if action in INLINE_ACTIONS:
+            self._respond(conn, request_id, action, self._handle_action(action, params))
+            return
+        conn.pending += 1
+        future = self._worker.submit(self._run_action, action, params)
+        future.add_done_callback(
+            lambda f: self._complete(conn, request_id, action, f.result()))
+
+    def dispatch(self, action: str, params: dict) -> dict:
+        """Run one action outside the socket (HTTP gateway); the caller's thread waits for it"""
+        return self._run_action(action, params)
+
+    def _run_action(self, action: str, params: dict) -> dict:
+        try:
+            return self._handle_action(action, params)
+        except Exception as e:
+            traceback.print_exc()
+            self.manager.events.publish("error", {"source": "ipc", "name": action, "error": str(e)})
+            return {"ok": False, "error": "internal error"}
+
+    def _complete(self, conn, request_id, action, resp):
+        # Worker thread: hand the response back to the I/O thread
+        self._completed.append((conn, request_id, action, resp))
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # A wakeup is already pending
 
-                    action = req.get("action")
-                    params = req.get("params", {}) or {}
-                    resp = self._handle_action(action, params)
-                    self._send(conn, **resp)
-
-                    # If action asked to shutdown, break loop
-                    if action == "shutdown":
-                        self.stop()
-                        break
-
-                except Exception:
-                    traceback.print_exc()
-                    try:
-                        self._send(conn, ok=False, error="internal error")
-                    except Exception:
-                        pass
-
-        self._cleanup()
-
-    def _send(self, conn: socket.socket, ok: bool, result: Any = None, error: str = None):
-        payload = {"ok": ok}
-        if ok:
-            payload["result"] = result
+    def _drain_wakeups(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _deliver_completed(self):
+        while self._completed:
+            conn, request_id, action, resp = self._completed.popleft()
+            conn.pending -= 1
+            self._respond(conn, request_id, action, resp)
+
+    def _hello(self, conn: _Connection, request_id, params: dict) -> dict:
+        """Switch the connection's codec; the reply is still sent in the old one"""
+        name = params.get("codec", "json")
+        codec = CODECS.get(name)
+        if conn.mode != "stream":
+            resp = {"ok": False, "error": "codec negotiation needs a persistent connection"}
+        elif codec is None:
+            resp = {"ok": False, "error": f"unknown codec '{name}' (available: {', '.join(CODECS)})"}
         else:
-            payload["error"] = error
+            resp = {"ok": True, "result": {"codec": codec.name}}
+        self._respond(conn, request_id, "hello", resp)
+        if resp["ok"]:
+            conn.codec = codec
+        return resp
+
+    # --- event subscriptions ---------------------------------------------
+
+    def _subscribe(self, conn: _Connection, request_id, params: dict) -> dict:
+        """Start pushing events to this connection (replaces an earlier subscription)"""
+        topics = params.get("topics") or TOPICS
+        buffer = params.get("buffer", SUBSCRIBE_BUFFER)
+        if not isinstance(buffer, int) or buffer < 1:
+            resp = {"ok": False, "error": "buffer must be a positive integer"}
+            self._respond(conn, request_id, "subscribe", resp)
+            return resp
         try:
-            conn.sendall(json.dumps(payload).encode("utf-8"))
-        except Exception:
+            sub = self.manager.events.subscribe(topics, maxlen=buffer, notify=lambda _sub: self._notify(conn))
+        except ValueError as e:
+            resp = {"ok": False, "error": str(e)}
+            self._respond(conn, request_id, "subscribe", resp)
+            return resp
+        self._unsubscribe(conn)
+        conn.subscription = sub
+        conn.subscription_id = request_id
+        resp = {"ok": True, "result": {"topics": sorted(sub.topics), "buffer": buffer}}
+        self._respond(conn, request_id, "subscribe", resp)
+        return resp
+
+    def _unsubscribe_action(self, conn: _Connection, request_id, params: dict) -> dict:
+        self._unsubscribe(conn)
+        resp = {"ok": True, "result": "unsubscribed"}
+        self._respond(conn, request_id, "unsubscribe", resp)
+        return resp
+
+    def _unsubscribe(self, conn: _Connection):
+        if conn.subscription is not None:
+            self.manager.events.unsubscribe(conn.subscription)
+            conn.subscription = None
+
+    def _notify(self, conn: _Connection):
+        # Publishing thread: the I/O thread moves the events to the socket
+        self._notified.append(conn)
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
             pass
-        
 
-    def _handle_action(self, action: str, params: dict) -> dict:
+    def _deliver_events(self):
+        while self._notified:
+            conn = self._notified.popleft()
+            if self._pump_events(conn):
+                self._flush(conn)
+
+    def _pump_events(self, conn: _Connection) -> bool:
+        """Move buffered events to the socket buffer, unless the client is behind.
+
+        Events left in the subscription while the client catches up are
+        subject to its drop-oldest limit. Returns True if anything was added.
+        """
+        sub = conn.subscription
+        if conn.closed or sub is None or len(conn.outbuf) >= SUBSCRIBER_OUTBUF_LIMIT:
+            return False
+        events, dropped = sub.drain()
+        if not events:
+            return False
+        for event in events:
+            if conn.mode == "stream":
+                event = {"id": conn.subscription_id, **event}
+            if dropped:
+                event = {**event, "dropped": dropped}
+                dropped = 0
+            conn.outbuf += conn.codec.encode(event)
+        return True
+
+    # --- frame streams -----------------------------------------------------
+
+    def _stream_frames(self, conn: _Connection, request_id, params: dict) -> dict:
+        """Start, re-rate or ({"fps": 0}) stop this connection's frame stream"""
+        fps = params.get("fps", 20)
+        if conn.mode != "stream":
+            resp = {"ok": False, "error": "frame streams need a persistent connection"}
+        elif isinstance(fps, bool) or not isinstance(fps, (int, float)) or not 0 <= fps <= MAX_FRAME_FPS:
+            resp = {"ok": False, "error": f"fps must be a number from 0 to {MAX_FRAME_FPS}"}
+        else:
+            resp = {"ok": True, "result": {"fps": fps}}
+        self._respond(conn, request_id, "stream_frames", resp)
+        if not resp["ok"]:
+            return resp
+        if fps:
+            # A new stream starts over with a key frame
+            conn.frames = _FrameStream(request_id, fps)
+            self._frame_conns.add(conn)
+        else:
+            conn.frames = None
+            self._frame_conns.discard(conn)
+            self._update_interest(conn)
+        return resp
+
+    def _select_timeout(self) -> float:
+        """Wait no longer than until the next frame is due"""
+        if not self._frame_conns:
+            return 1.0
+        due = min(conn.frames.due for conn in self._frame_conns)
+        return min(1.0, max(0.0, due - time.monotonic()))
+
+    def _deliver_frames(self):
+        """Send a delta to every frame stream that is due and whose client keeps up"""
+        if not self._frame_conns:
+            return
+        now = time.monotonic()
+        frame = None  # Read from the strip once per pass, only if a stream is due
+        for conn in list(self._frame_conns):
+            stream = conn.frames
+            if now < stream.due:
+                continue
+            stream.due += stream.interval
+            if stream.due <= now:
+                stream.due = now + stream.interval  # Fell behind; don't send a burst
+            if len(conn.outbuf) >= SUBSCRIBER_OUTBUF_LIMIT:
+                continue  # Skipped; the next delta is still against what the client has
+            if frame is None:
+                frame = self.manager.frame_bytes()
+            key = stream.last is None or len(stream.last) != len(frame)
+            runs, data = key_delta(frame) if key else encode_delta(stream.last, frame)
+            if not key and not runs:
+                continue
+            stream.last = frame
+            stream.seq += 1
+            conn.outbuf += conn.codec.encode({
+                "id": stream.request_id, "topic": "frame", "seq": stream.seq,
+                "num_leds": len(frame) // 3, "key": key, "runs": Blob(runs), "data": Blob(data),
+            })
+            self._flush(conn)
+
+    def _respond(self, conn: _Connection, request_id, action: str, resp: dict):
+        if conn.mode == "stream":
+            resp = {"id": request_id, **resp}
+        self._queue_response(conn, resp)
+        if action == "shutdown":
+            self.stop()
+
+    def _queue_response(self, conn: _Connection, payload: dict):
+        if conn.closed:
+            return
+        if conn.mode == "stream" or conn.subscription is not None:
+            conn.outbuf += conn.codec.encode(payload)
+        else:
+            conn.outbuf += json.dumps(payload, default=JSONCodec._default).encode("utf-8")
+        self._flush(conn)
+
+    def _flush(self, conn: _Connection):
+        if conn.outbuf:
+            try:
+                sent = conn.sock.send(conn.outbuf)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except (ConnectionError, OSError):
+                self._close(conn)
+                return
+            del conn.outbuf[:sent]
+        if conn.subscription is not None:
+            # Room again after a slow subscriber caught up
+            self._pump_events(conn)
+        self._update_interest(conn)
+
+    def _update_interest(self, conn: _Connection):
+        """Select on what the connection is waiting for, or close it when it is done"""
+        if conn.closed:
+            return
+        if (conn.eof and not conn.pending and not conn.outbuf
+                and conn.subscription is None and conn.frames is None):
+            self._close(conn)
+            return
+        events = 0 if conn.eof else selectors.EVENT_READ
+        if conn.outbuf:
+            events |= selectors.EVENT_WRITE
+        if events == conn.events:
+            return
+        # Nothing to select on while only waiting for the worker
+        if not conn.events:
+            self._selector.register(conn.sock, events, conn)
+        elif not events:
+            self._selector.unregister(conn.sock)
+        else:
+            self._selector.modify(conn.sock, events, conn)
+        conn.events = events
+
+    def _close(self, conn: _Connection):
+        if conn.closed:
+            return
+        conn.closed = True
+        self._unsubscribe(conn)
+        self._frame_conns.discard(conn)
+        self._conns.discard(conn)
+        if conn.events:
+            self._selector.unregister(conn.sock)
         try:
-            if action == "list_patterns":
-                self.manager.load_patterns()  # Reload patterns to pick up new files
-                return {"ok": True, "result": list(self.manager.patterns.keys())}
-
-            if action == "list_hooks":
-                self.manager.load_hooks()  # Reload hooks to pick up new files
-                return {"ok": True, "result": [h.event_name for h in self.manager.hooks]}
-
-            if action == "start_pattern":
-                name = params.get("name")
-                if not name:
-                    return {"ok": False, "error": "missing name"}
-                self.manager.start_pattern(name)
-                return {"ok": True, "result": "started"}
-
-            if action == "stop_pattern":
-                self.manager.stop_pattern()
-                return {"ok": True, "result": "stopped"}
-
-            if action == "stop_all":
-                self.manager.stop_all_patterns()
-                return {"ok": True, "result": "stopped_all"}
-
-            if action == "status":
-                cur = self.manager.current_pattern.name if self.manager.current_pattern else None
-                return {"ok": True, "result": {"current_pattern": cur}}
-
-            if action == "save_pattern":
-                name = params.get("name")
-                if not name:
-                    return {"ok": False, "error": "missing name"}
-                self.manager.save_pattern(name)
-                return {"ok": True, "result": "saved"}
-
-
-            if action == "register_startup":
-                name = params.get("name")
-                if not name:
-                    return {"ok": False, "error": "missing name"}
-                linked_hook = params.get("linked_hook")
-                self.manager.register_startup_pattern(name, linked_hook=linked_hook)
-                return {"ok": True, "result": "registered"}
-
-
-
-            if action == "unregister_startup":
-                name = params.get("name")
-                if not name:
-                    return {"ok": False, "error": "missing name"}
-                try:
-                    self.manager.startup_patterns.remove(name)
-                except ValueError:
-                    pass
-                # remove any links pointing to the pattern
-                for k in list(self.manager.startup_links.keys()):
-                    if self.manager.startup_links.get(k) == name:
-                        del self.manager.startup_links[k]
-                return {"ok": True, "result": "unregistered"}
-
-            if action == "list_startup":
-                return {"ok": True, "result": {"startup_patterns": list(self.manager.startup_patterns), "startup_links": dict(self.manager.startup_links)}}
-
-            if action == "list_hook_pattern_links":
-                # Return all hooks and their current pattern links (if any)
-                hook_patterns = {}
-                for hook in self.manager.hooks:
-                    linked_pattern = self.manager.startup_links.get(hook.event_name)
-                    hook_patterns[hook.event_name] = linked_pattern
-                return {"ok": True, "result": hook_patterns}
-
-            if action == "link_hook_to_pattern":
-                hook_event_name = params.get("hook_event_name")
-                pattern_name = params.get("pattern_name")
-                if not hook_event_name or not pattern_name:
-                    return {"ok": False, "error": "missing hook_event_name or pattern_name"}
-                
-                # Verify hook exists
-                hook_exists = any(h.event_name == hook_event_name for h in self.manager.hooks)
-                if not hook_exists:
-                    return {"ok": False, "error": f"hook '{hook_event_name}' not found"}
-                
-                # Verify pattern exists
-                if pattern_name not in self.manager.patterns:
-                    return {"ok": False, "error": f"pattern '{pattern_name}' not found"}
-                
-                self.manager.startup_links[hook_event_name] = pattern_name
-                return {"ok": True, "result": f"linked {hook_event_name} to {pattern_name}"}
-
-            if action == "unlink_hook":
-                hook_event_name = params.get("hook_event_name")
-                if not hook_event_name:
-                    return {"ok": False, "error": "missing hook_event_name"}
-                
-                if hook_event_name in self.manager.startup_links:
-                    del self.manager.startup_links[hook_event_name]
-                    return {"ok": True, "result": f"unlinked {hook_event_name}"}
-                else:
-                    return {"ok": False, "error": f"hook '{hook_event_name}' not linked"}
-
-            if action == "trigger_test_hook":
-                # Find and trigger the test hook
-                for hook in self.manager.hooks:
-                    if hook.event_name == "test_trigger":
-                        if hasattr(hook, 'trigger'):
-                            hook.trigger()
-                            return {"ok": True, "result": "test hook triggered"}
-                        else:
-                            return {"ok": False, "error": "test hook does not support triggering"}
-                return {"ok": False, "error": "test hook not found"}
-
-            if action == "add_persistent_link":
-                hook_event_name = params.get("hook_event_name")
-                pattern_name = params.get("pattern_name")
-                if not hook_event_name or not pattern_name:
-                    return {"ok": False, "error": "missing hook_event_name or pattern_name"}
-                
-                # Verify hook exists
-                hook_exists = any(h.event_name == hook_event_name for h in self.manager.hooks)
-                if not hook_exists:
-                    return {"ok": False, "error": f"hook '{hook_event_name}' not found"}
-                
-                # Verify pattern exists
-                if pattern_name not in self.manager.patterns:
-                    return {"ok": False, "error": f"pattern '{pattern_name}' not found"}
-                
-                # Also add to runtime links
-                self.manager.startup_links[hook_event_name] = pattern_name
-                # Save to persistent storage
-                self.manager.save_persistent_link(hook_event_name, pattern_name)
-                return {"ok": True, "result": f"added persistent link {hook_event_name} → {pattern_name}"}
-
-            if action == "remove_persistent_link":
-                hook_event_name = params.get("hook_event_name")
-                if not hook_event_name:
-                    return {"ok": False, "error": "missing hook_event_name"}
-                
-                # Remove from runtime
-                if hook_event_name in self.manager.startup_links:
-                    del self.manager.startup_links[hook_event_name]
-                
-                # Remove from persistent storage
-                self.manager.remove_persistent_link(hook_event_name)
-                return {"ok": True, "result": f"removed persistent link {hook_event_name}"}
-
-            if action == "list_persistent_links":
-                links = self.manager.load_persistent_links()
-                return {"ok": True, "result": links}
-
-            if action == "add_pattern_to_startup":
-                pattern_name = params.get("pattern_name")
-                if not pattern_name:
-                    return {"ok": False, "error": "missing pattern_name"}
-                
-                # Verify pattern exists
-                if pattern_name not in self.manager.patterns:
-                    return {"ok": False, "error": f"pattern '{pattern_name}' not found"}
-                
-                # Save standalone pattern to persistent storage
-                self.manager.save_pattern_to_startup(pattern_name)
-                return {"ok": True, "result": f"added pattern '{pattern_name}' to startup"}
-
-            if action == "remove_pattern_from_startup":
-                pattern_name = params.get("pattern_name")
-                if not pattern_name:
-                    return {"ok": False, "error": "missing pattern_name"}
-                
-                # Remove standalone pattern from persistent storage
-                self.manager.remove_pattern_from_startup(pattern_name)
-                return {"ok": True, "result": f"removed pattern '{pattern_name}' from startup"}
-
-            if action == "list_startup_patterns":
-                patterns = self.manager.load_startup_patterns_list()
-                return {"ok": True, "result": patterns}
-            
-            if action == "shutdown":
-                # Stop patterns and return
-                self.manager.stop_all_patterns()
-                return {"ok": True, "result": "shutting_down"}
-            
+            conn.sock.close()
+        except Exception:
+            pass
 
-            return {"ok": False, "error": f"unknown action {action}"}
+    # --- actions -------------------------------------------------------
 
+    def _handle_action(self, action: str, params: dict) -> dict:
+        """Look up and run one action, timing it into the metrics"""
+        handler = self._actions.get(action)
+        if handler is None:
+            # Counted under one name so arbitrary client strings can't grow the metrics
+            self.metrics.observe("unknown", 0.0, False)
+            return {"ok": False, "error": f"unknown action {action}"}
+        start = time.perf_counter()
+        try:
+            resp = handler(params)
         except Exception as e:
+            resp = {"ok": False, "error": str(e)}
+            self.manager.events.publish("error", {"source": "ipc", "name": action, "error": str(e)})
+        self.metrics.observe(action, time.perf_counter() - start, resp.get("ok", False))
+        return resp
+
+    def _action_batch(self, params: dict) -> dict:
+        requests = params.get("requests")
+        if not isinstance(requests, list):
+            return {"ok": False, "error": "missing requests list"}
+
+        def run_entries():
+            results = []
+            for entry in requests:
+                if not isinstance(entry, dict):
+                    results.append({"ok": False, "error": "request must be an object"})
+                    continue
+                entry_action = entry.get("action")
+                if entry_action in BATCH_EXCLUDED:
+                    results.append({"ok": False, "error": f"{entry_action} is not allowed in a batch"})
+                    continue
+                results.append(self._handle_action(entry_action, entry.get("params", {}) or {}))
+            return results
+
+        # One manager command: no pattern change (hook link, IPC client) can land between the entries
+        return {"ok": True, "result": self.manager.execute("batch", run_entries)}
+
+    def _snapshot_read(self, action: str, params: dict) -> dict:
+        if action == "list_patterns":
+            self.manager.load_patterns()  # Picks up new/changed files only
+        elif action == "list_hooks":
+            self.manager.load_hooks()  # Picks up new/changed files only
+        snap = self.manager.snapshot()
+        if params.get("if_version") == snap["version"]:
+            return {"ok": True, "not_modified": True, "version": snap["version"]}
+        return {"ok": True, "result": SNAPSHOT_READS[action](snap), "version": snap["version"]}
+
+    def _action_stats(self, params: dict) -> dict:
+        strip_stats = getattr(self.manager.neo, "stats", None)  # Only the StripProxy keeps them
+        ipc = self.metrics.snapshot()
+        actor = self.manager.actor.stats()
+        return {"ok": True, "result": {
+            "uptime_s": ipc["uptime_s"],
+            "strip": strip_stats() if strip_stats else None,
+            "hooks": self.manager.hook_stats(),
+            "ipc": {name: {key: stats[key] for key in ("count", "errors", "mean_ms", "p50_ms", "p99_ms", "max_ms")}
+                    for name, stats in ipc["actions"].items()},
+            "manager": {"queue_depth": actor["queue_depth"], "max_queue_depth": actor["max_queue_depth"]},
+            "persistence": self.manager.persistence.stats(),
+        }}
+
+    def _action_start_pattern(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        self.manager.start_pattern(name)
+        return {"ok": True, "result": "started"}
+
+    def _action_stop_pattern(self, params: dict) -> dict:
+        self.manager.stop_pattern()
+        return {"ok": True, "result": "stopped"}
+
+    def _action_stop_all(self, params: dict) -> dict:
+        self.manager.stop_all_patterns()
+        return {"ok": True, "result": "stopped_all"}
+
+    def _action_save_pattern(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        self.manager.save_pattern(name)
+        return {"ok": True, "result": "saved"}
+
+    def _action_register_startup(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        linked_hook = params.get("linked_hook")
+        self.manager.register_startup_pattern(name, linked_hook=linked_hook)
+        self.manager.events.publish("link", {"event": "startup_registered", "pattern": name,
+                                             "hook": linked_hook})
+        return {"ok": True, "result": "registered"}
+
+    def _action_unregister_startup(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        # Also removes any links pointing to the pattern
+        self.manager.unregister_startup_pattern(name)
+        self.manager.events.publish("link", {"event": "startup_unregistered", "pattern": name})
+        return {"ok": True, "result": "unregistered"}
+
+    def _action_link_hook_to_pattern(self, params: dict) -> dict:
+        hook_event_name = params.get("hook_event_name")
+        pattern_name = params.get("pattern_name")
+        if not hook_event_name or not pattern_name:
+            return {"ok": False, "error": "missing hook_event_name or pattern_name"}
+
+        # Verify hook exists
+        if not self.manager.has_hook(hook_event_name):
+            return {"ok": False, "error": f"hook '{hook_event_name}' not found"}
+
+        # Verify pattern exists
+        if pattern_name not in self.manager.patterns:
+            return {"ok": False, "error": f"pattern '{pattern_name}' not found"}
+
+        self.manager.link_hook(hook_event_name, pattern_name)
+        self.manager.events.publish("link", {"event": "linked", "hook": hook_event_name,
+                                             "pattern": pattern_name, "persistent": False})
+        return {"ok": True, "result": f"linked {hook_event_name} to {pattern_name}"}
+
+    def _action_unlink_hook(self, params: dict) -> dict:
+        hook_event_name = params.get("hook_event_name")
+        if not hook_event_name:
+            return {"ok": False, "error": "missing hook_event_name"}
+
+        if self.manager.unlink_hook(hook_event_name):
+            self.manager.events.publish("link", {"event": "unlinked", "hook": hook_event_name,
+                                                 "persistent": False})
+            return {"ok": True, "result": f"unlinked {hook_event_name}"}
+        else:
+            return {"ok": False, "error": f"hook '{hook_event_name}' not linked"}
+
+    def _action_trigger_test_hook(self, params: dict) -> dict:
+        # Find and trigger the test hook (imports it on first use)
+        hook = self.manager.get_hook("test_trigger")
+        if hook is None:
+            return {"ok": False, "error": "test hook not found"}
+        if not hasattr(hook, 'trigger'):
+            return {"ok": False, "error": "test hook does not support triggering"}
+        hook.trigger()
+        return {"ok": True, "result": "test hook triggered"}
+
+    def _action_add_persistent_link(self, params: dict) -> dict:
+        hook_event_name = params.get("hook_event_name")
+        pattern_name = params.get("pattern_name")
+        if not hook_event_name or not pattern_name:
+            return {"ok": False, "error": "missing hook_event_name or pattern_name"}
+
+        # Verify hook exists
+        if not self.manager.has_hook(hook_event_name):
+            return {"ok": False, "error": f"hook '{hook_event_name}' not found"}
+
+        # Verify pattern exists
+        if pattern_name not in self.manager.patterns:
+            return {"ok": False, "error": f"pattern '{pattern_name}' not found"}
+
+        # Also add to runtime links
+        self.manager.link_hook(hook_event_name, pattern_name)
+        # Save to persistent storage
+        self.manager.save_persistent_link(hook_event_name, pattern_name)
+        self.manager.events.publish("link", {"event": "linked", "hook": hook_event_name,
+                                             "pattern": pattern_name, "persistent": True})
+        return {"ok": True, "result": f"added persistent link {hook_event_name} → {pattern_name}"}
+
+    def _action_remove_persistent_link(self, params: dict) -> dict:
+        hook_event_name = params.get("hook_event_name")
+        if not hook_event_name:
+            return {"ok": False, "error": "missing hook_event_name"}
+
+        # Remove from runtime
+        self.manager.unlink_hook(hook_event_name)
+
+        # Remove from persistent storage
+        self.manager.remove_persistent_link(hook_event_name)
+        self.manager.events.publish("link", {"event": "unlinked", "hook": hook_event_name,
+                                             "persistent": True})
+        return {"ok": True, "result": f"removed persistent link {hook_event_name}"}
+
+    def _action_add_pattern_to_startup(self, params: dict) -> dict:
+        pattern_name = params.get("pattern_name")
+        if not pattern_name:
+            return {"ok": False, "error": "missing pattern_name"}
+
+        # Verify pattern exists
+        if pattern_name not in self.manager.patterns:
+            return {"ok": False, "error": f"pattern '{pattern_name}' not found"}
+
+        # Save standalone pattern to persistent storage
+        self.manager.save_pattern_to_startup(pattern_name)
+        self.manager.events.publish("link", {"event": "startup_registered", "pattern": pattern_name,
+                                             "persistent": True})
+        return {"ok": True, "result": f"added pattern '{pattern_name}' to startup"}
+
+    def _action_remove_pattern_from_startup(self, params: dict) -> dict:
+        pattern_name = params.get("pattern_name")
+        if not pattern_name:
+            return {"ok": False, "error": "missing pattern_name"}
+
+        # Remove standalone pattern from persistent storage
+        self.manager.remove_pattern_from_startup(pattern_name)
+        self.manager.events.publish("link", {"event": "startup_unregistered", "pattern": pattern_name,
+                                             "persistent": True})
+        return {"ok": True, "result": f"removed pattern '{pattern_name}' from startup"}
+
+    def _action_get_pattern_config(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        return {"ok": True, "result": self.manager.pattern_config(name)}
+
+    def _action_set_pattern_params(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        if name not in self.manager.patterns:
+            return {"ok": False, "error": f"pattern '{name}' not found"}
+        try:
+            self.manager.set_pattern_params(name, params.get("params", {}))
+        except ValueError as e:
             return {"ok": False, "error": str(e)}
+        self.manager.events.publish("pattern", {"event": "params_changed", "name": name})
+        return {"ok": True, "result": "saved"}
+
+    def _action_set_pattern_zones(self, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            return {"ok": False, "error": "missing name"}
+        if name not in self.manager.patterns:
+            return {"ok": False, "error": f"pattern '{name}' not found"}
+        try:
+            self.manager.set_pattern_zones(name, params.get("zones", []))
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        self.manager.events.publish("pattern", {"event": "zones_changed", "name": name})
+        return {"ok": True, "result": "saved"}
+
+    def _action_get_frame(self, params: dict) -> dict:
+        frame = self.manager.frame_bytes()
+        return {"ok": True, "result": {"num_leds": len(frame) // 3, "frame": Blob(frame)}}
+
+    def _action_startup_profile(self, params: dict) -> dict:
+        profile = self.manager.startup_profile
+        if profile is None:
+            return {"ok": False, "error": "no startup profile recorded"}
+        return {"ok": True, "result": profile.as_dict()}
+
+    def _action_metrics(self, params: dict) -> dict:
+        result = self.metrics.snapshot()
+        result["manager"] = self.manager.actor.stats()
+        return {"ok": True, "result": result}
+
+    def _action_shutdown(self, params: dict) -> dict:
+        # Stop patterns and return
+        self.manager.stop_all_patterns()
+        return {"ok": True, "result": "shutting_down"}
 
     def stop(self):
+        """Stop the server; safe to call from any thread"""
         self._stop_event.set()
         try:
-            if self._sock:
-                try:
-                    self._sock.close()
-                except Exception:
-                    pass
-        except Exception:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
             pass
 
     def _cleanup(self):
@@ -0,0 +1,92 @@
+"""
+Manager Actor - runs PatternManager mutations one at a time on one thread
+Callers on other threads (IPC worker, main hook loop, plugin watcher) queue
+commands and get a concurrent.futures.Future back; the actor thread runs
+the commands in arrival order, so a hook-triggered restart can never
+interleave with an IPC restart. A command issued from the actor thread
+itself (a command that calls another manager method) runs inline.
+
+How long each command waited in the queue and how long it ran are recorded
+per command name in fixed-bucket histograms (see ipc_metrics).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+from ipc_metrics import IPCMetrics
+
+_STOP = object()
+
+
+class ManagerActor(threading.Thread):
+    """Single thread that owns all changes to the manager's state"""
+
+    def __init__(self):
+        super().__init__(daemon=True, name="manager-actor")
+        self._queue = queue.SimpleQueue()
+        self.max_depth = 0  # Deepest the queue has been
+        self.queue_wait = IPCMetrics(name="wopr_manager_queue_wait", label="command",
+                                     description="Time manager commands waited in the queue.",
+                                     results=False)
+        self.run_time = IPCMetrics(name="wopr_manager_command", label="command",
+                                   description="Time spent running manager commands.")
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            name, fn, args, future, queued = item
+            start = time.perf_counter()
+            self.queue_wait.observe(name, start - queued, True)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                self.run_time.observe(name, time.perf_counter() - start, False)
+                future.set_exception(e)
+            else:
+                self.run_time.observe(name, time.perf_counter() - start, True)
+                future.set_result(result)
+
+    def submit(self, name: str, fn: Callable, *args) -> Future:
+        """Queue fn(*args); the returned future resolves once it has run on the actor thread
+
+        Args:
+            name: Command name the timings are recorded under
+            fn: Callable to run
+        """
+        future = Future()
+        if threading.current_thread() is self:
+            # Already serialised; queueing would deadlock on our own result
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        self._queue.put((name, fn, args, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return future
+
+    def call(self, name: str, fn: Callable, *args):
+        """Run fn(*args) on the actor thread and wait for its result (or exception)"""
+        return self.submit(name, fn, *args).result()
+
+    def stop(self):
+        """Finish the commands already queued, then exit"""
+        self._queue.put(_STOP)
+
+    def stats(self) -> dict:
+        """Queue depth plus per-command queue wait and run time histograms"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "queue_wait": self.queue_wait.snapshot()["actions"],
+            "run": self.run_time.snapshot()["actions"],
+        }
@@ -0,0 +1,47 @@
+# CPU Cores: one LED segment per CPU core, colored by that core's load level
+from backend import PatternBase
+import queue
+
+
+class CPUCoresPattern(PatternBase):
+    @property
+    def name(self): return "CPU Cores Pattern"
+
+    @property
+    def description(self): return "One LED segment per CPU core, colored by core load"
+
+    def run(self, neo, stop_event, alert_queue=None):
+        """
+        Run the CPU cores pattern. Segment colors come from the
+        `core_colors` metadata sent by the cpu_core_monitor hook.
+
+        Args:
+            neo: NeoPixel strip object
+            stop_event: Threading event to stop pattern
+            alert_queue: Queue for receiving HookMessage alerts
+        """
+        core_colors = [(0, 0, 64)]  # Dim blue until the first sample arrives
+        dirty = True
+
+        while not stop_event.is_set():
+            if alert_queue:
+                try:
+                    message = alert_queue.get(timeout=0.25)
+                    colors = message.metadata.get("core_colors")
+                    if colors:
+                        core_colors = colors
+                        dirty = True
+                except queue.Empty:
+                    pass
+
+            if not dirty:
+                if not alert_queue:
+                    stop_event.wait(0.25)
+                continue
+
+            num_leds = neo.num_leds
+            cores = len(core_colors)
+            for i in range(num_leds):
+                neo.set_led_color(i, *core_colors[i * cores // num_leds])
+            neo.update_strip(sleep_duration=0)
+            dirty = False
@@ -0,0 +1,304 @@
+"""
+Plugin Registry - loads pattern/hook classes from a plugin directory
+Files are keyed by path, mtime and size so a rescan only re-imports the
+files that changed and keeps the existing instances of everything else.
+
+The registry can also be primed from a persisted plugin index (name,
+description, class, source hash per file). Indexed files are not imported
+until one of their plugins is asked for by name.
+"""
+
+import hashlib
+import importlib.util
+import inspect
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class PluginFile:
+    """Plugins defined in one file, plus the stat key and hash they came from"""
+
+    def __init__(self, path: Path, key: Tuple[int, int], digest: str,
+                 meta: List[dict], instances: Optional[list] = None):
+        self.path = path
+        self.key = key
+        self.digest = digest
+        self.meta = meta              # [{"class": ..., "name": ..., ...}] per plugin
+        self.instances = instances    # None until the file has been imported
+
+    @property
+    def loaded(self) -> bool:
+        return self.instances is not None
+
+
+class PluginRegistry:
+    """Plugin instances from one directory, re-imported only when a file changes"""
+
+    def __init__(self, directory: Path, base_class: type, kind: str,
+                 describe: Callable[[object], dict]):
+        """
+        Args:
+            directory: Directory containing the plugin .py files
+            base_class: Abstract base class the plugin classes inherit from
+            kind: "pattern" or "hook", used in log messages
+            describe: Returns the index metadata of an instance; must include "name"
+        """
+        self.directory = Path(directory)
+        self.base_class = base_class
+        self.kind = kind
+        self.describe = describe
+        self.generation = 0       # Bumped whenever the set of loaded instances changes
+        self.index_dirty = False  # True when the index no longer matches the files
+        self._files: Dict[Path, PluginFile] = {}
+        self._by_name: Dict[str, PluginFile] = {}  # Replaced, never mutated, so reads need no lock
+        self._lock = threading.RLock()
+        self._import_locks: Dict[Path, threading.Lock] = {}  # One import of a file at a time
+
+    @staticmethod
+    def _stat_key(path: Path) -> Tuple[int, int]:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _digest(path: Path) -> str:
+        return hashlib.sha1(path.read_bytes()).hexdigest()
+
+    def plugin_paths(self) -> List[Path]:
+        return sorted(p for p in self.directory.glob("*.py") if not p.name.startswith("_"))
+
+    def scan(self) -> bool:
+        """
+        Bring the registry up to date with the directory.
+
+        Unchanged files are not touched; indexed files that were not imported
+        yet stay that way. Returns True if any file was added, changed or removed.
+        """
+        changed = False
+        to_load = []
+        paths = self.plugin_paths()
+        seen = set(paths)
+
+        with self._lock:
+            for file_path in paths:
+                try:
+                    key = self._stat_key(file_path)
+                except FileNotFoundError:
+                    continue
+                entry = self._files.get(file_path)
+                if entry is not None and entry.key == key:
+                    continue
+                if entry is not None and not entry.loaded and entry.digest == self._digest(file_path):
+                    # Touched but not modified (e.g. a fresh checkout); keep it lazy
+                    entry.key = key
+                    self.index_dirty = True
+                    continue
+                to_load.append((file_path, key))
+
+            for file_path in list(self._files):
+                if file_path not in seen:
+                    del self._files[file_path]
+                    print(f"Removed {self.kind} file: {file_path.name}")
+                    changed = True
+
+        for file_path, key in to_load:
+            self._load_file(file_path, key)
+            changed = True
+
+        if changed:
+            with self._lock:
+                self._rebuild()
+        return changed
+
+    def reload_file(self, file_path: Path) -> bool:
+        """Re-import one file if its stat key changed (or drop it if deleted).
+
+        Returns True if the file's plugins were replaced or removed.
+        """
+        file_path = Path(file_path)
+        try:
+            key = self._stat_key(file_path)
+        except FileNotFoundError:
+            with self._lock:
+                removed = self._files.pop(file_path, None) is not None
+                if removed:
+                    print(f"Removed {self.kind} file: {file_path.name}")
+                    self._rebuild()
+            return removed
+        with self._lock:
+            entry = self._files.get(file_path)
+            if entry is not None and entry.key == key:
+                return False
+        loaded = self._load_file(file_path, key)
+        with self._lock:
+            self._rebuild()
+        return loaded
+
+    def _load_file(self, file_path: Path, key: Tuple[int, int]) -> bool:
+        """Import a file and instantiate its plugin classes.
+
+        The import runs outside the registry lock so a slow or broken module
+        never blocks readers, but under a per-file lock: a concurrent caller
+        asking for the same file waits and then uses the instances the first
+        one created instead of importing it again. On failure the previous
+        instances (if any) are kept, and the new key is recorded so the
+        broken file isn't re-imported until it changes again.
+        """
+        with self._lock:
+            import_lock = self._import_locks.setdefault(file_path, threading.Lock())
+        with import_lock:
+            with self._lock:
+                entry = self._files.get(file_path)
+                if entry is not None and entry.loaded and entry.key == key:
+                    return bool(entry.digest)  # Imported by another caller while we waited
+            return self._import_file(file_path, key)
+
+    def _import_file(self, file_path: Path, key: Tuple[int, int]) -> bool:
+        try:
+            digest = self._digest(file_path)
+            instances = self._import_instances(file_path)
+            meta = [dict(self.describe(inst), **{"class": type(inst).__name__})
+                    for inst in instances]
+        except Exception as e:
+            print(f"Error loading {self.kind} {file_path.name}: {e}")
+            with self._lock:
+                previous = self._files.get(file_path)
+                if previous is not None and previous.loaded:
+                    previous.key = key
+                else:
+                    self._files[file_path] = PluginFile(file_path, key, "", [], [])
+                self.index_dirty = True
+            return False
+
+        with self._lock:
+            self._files[file_path] = PluginFile(file_path, key, digest, meta, instances)
+            self.generation += 1
+            self.index_dirty = True
+        for m in meta:
+            print(f"Loaded {self.kind}: {m['name']}")
+        return True
+
+    def _import_instances(self, file_path: Path) -> list:
+        spec = importlib.util.spec_from_file_location(file_path.stem, file_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        instances = []
+        for name, obj in inspect.getmembers(module, inspect.isclass):
+            if (issubclass(obj, self.base_class) and
+                obj is not self.base_class and
+                not inspect.isabstract(obj)):
+                instances.append(obj())
+        return instances
+
+    def _rebuild(self):
+        # Caller holds self._lock
+        self.generation += 1
+        self._by_name = {m["name"]: entry for entry in self._files.values() for m in entry.meta}
+
+    def load(self, name: str):
+        """Return the plugin instance called `name`, importing its file on first use"""
+        entry = self._by_name.get(name)
+        if entry is None:
+            return None
+        if not entry.loaded:
+            try:
+                key = self._stat_key(entry.path)
+            except FileNotFoundError:
+                return None
+            self._load_file(entry.path, key)
+            with self._lock:
+                self._rebuild()
+            entry = self._by_name.get(name)
+            if entry is None or not entry.loaded:
+                return None
+        for inst, meta in zip(entry.instances, entry.meta):
+            if meta["name"] == name:
+                return inst
+        return None
+
+    def load_all(self) -> bool:
+        """Import every indexed file that hasn't been imported yet"""
+        with self._lock:
+            pending = [entry.path for entry in self._files.values() if not entry.loaded]
+        for file_path in pending:
+            try:
+                self._load_file(file_path, self._stat_key(file_path))
+            except FileNotFoundError:
+                with self._lock:
+                    self._files.pop(file_path, None)
+        if pending:
+            with self._lock:
+                self._rebuild()
+        return bool(pending)
+
+    def names(self) -> List[str]:
+        """Names of all known plugins, imported or not"""
+        return list(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def path_of(self, name: str) -> Optional[Path]:
+        """File that defines the plugin called `name`"""
+        entry = self._by_name.get(name)
+        return entry.path if entry else None
+
+    def describe_all(self) -> List[dict]:
+        """Index metadata of all known plugins, without importing anything"""
+        with self._lock:
+            return [m for entry in self._files.values() for m in entry.meta]
+
+    def instances(self) -> list:
+        """All imported plugin instances, in file order"""
+        with self._lock:
+            return [inst for path in sorted(self._files)
+                    for inst in (self._files[path].instances or ())]
+
+    def index_data(self) -> dict:
+        """Serializable index: {file name: {mtime_ns, size, sha1, plugins}}"""
+        with self._lock:
+            self.index_dirty = False
+            return {
+                entry.path.name: {
+                    "mtime_ns": entry.key[0],
+                    "size": entry.key[1],
+                    "sha1": entry.digest,
+                    "plugins": entry.meta,
+                }
+                for entry in self._files.values() if entry.digest
+            }
+
+    def load_index(self, data: dict):
+        """Prime the registry from index_data() output without importing anything"""
+        with self._lock:
+            for file_name, item in data.items():
+                file_path = self.directory / file_name
+                if file_path in self._files:
+                    continue
+                self._files[file_path] = PluginFile(
+                    file_path, (item["mtime_ns"], item["size"]), item["sha1"], item["plugins"])
+            self._rebuild()
+
+
+class LazyPluginMap(Mapping):
+    """Read-only name -> instance view of a registry; plugins are imported on first access"""
+
+    def __init__(self, registry: PluginRegistry):
+        self._registry = registry
+
+    def __getitem__(self, name):
+        instance = self._registry.load(name)
+        if instance is None:
+            raise KeyError(name)
+        return instance
+
+    def __contains__(self, name):
+        return name in self._registry
+
+    def __iter__(self):
+        return iter(self._registry.names())
+
+    def __len__(self):
+        return len(self._registry.names())
@@ -0,0 +1,142 @@
+"""
+Plugin Watcher - hot-reloads patterns and hooks when their files change
+Watches the manager's patterns_dir and hooks_dir with inotify (through
+libc, no extra dependencies) and falls back to polling file stats where
+inotify isn't available. Changed files are handed to
+PatternManager.reload_plugin_file() one at a time. The import runs on this
+thread, so a slow or broken import never stalls the render or hook loops;
+the manager state changes that follow run on the manager actor.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class PluginWatcher(threading.Thread):
+    """Background thread that reloads changed plugin files"""
+
+    def __init__(self, manager, debounce: float = 0.2, poll_interval: float = 2.0):
+        """
+        Args:
+            manager: PatternManager whose plugin directories are watched
+            debounce: Seconds to collect events before reloading (editors write in bursts)
+            poll_interval: Seconds between scans when inotify is unavailable
+        """
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.directories = [Path(manager.patterns_dir), Path(manager.hooks_dir)]
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            fd, dirs_by_wd = self._init_inotify()
+        except OSError as e:
+            print(f"Plugin watcher: inotify unavailable ({e}), polling every {self.poll_interval}s")
+            self._run_polling()
+            return
+
+        print(f"Plugin watcher: watching {', '.join(str(d) for d in self.directories)}")
+        try:
+            self._run_inotify(fd, dirs_by_wd)
+        finally:
+            os.close(fd)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _init_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        dirs_by_wd = {}
+        for directory in self.directories:
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(err, f"inotify_add_watch failed for {directory}")
+            dirs_by_wd[wd] = directory
+        return fd, dirs_by_wd
+
+    def _run_inotify(self, fd, dirs_by_wd):
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([fd], [], [], 1.0)
+            if not ready:
+                continue
+            # Let a burst of writes settle, then handle each file once
+            time.sleep(self.debounce)
+            changed = set()
+            overflow = False
+            for mask, directory, name in self._read_events(fd, dirs_by_wd):
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif directory is not None and name.endswith(".py") and not name.startswith("_"):
+                    changed.add(directory / name)
+            if overflow:
+                changed.update(p for d in self.directories for p in d.glob("*.py"))
+            for file_path in sorted(changed):
+                self._reload(file_path)
+
+    @staticmethod
+    def _read_events(fd, dirs_by_wd):
+        events = []
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                events.append((mask, dirs_by_wd.get(wd), name))
+
+    def _run_polling(self):
+        keys = self._stat_all()
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._stat_all()
+            for file_path in sorted(set(keys) | set(current)):
+                if keys.get(file_path) != current.get(file_path):
+                    self._reload(file_path)
+            keys = current
+
+    def _stat_all(self) -> dict:
+        keys = {}
+        for directory in self.directories:
+            for file_path in directory.glob("*.py"):
+                if file_path.name.startswith("_"):
+                    continue
+                try:
+                    st = file_path.stat()
+                except FileNotFoundError:
+                    continue
+                keys[file_path] = (st.st_mtime_ns, st.st_size)
+        return keys
+
+    def _reload(self, file_path: Path):
+        try:
+            self.manager.reload_plugin_file(file_path)
+        except Exception as e:
+            print(f"Plugin watcher: error reloading {file_path.name}: {e}")
@@ -1,28 +1,38 @@
 #!/usr/bin/env python3
 """
-Service runner: initialize Neo, PatternManager, hooks/patterns, start startup patterns
-and run an IPC server for external control.
+Service runner: initialize Neo, restore the last pattern, then load hooks, restore
+startup patterns/links and run an IPC server for external control in parallel.
 """
+import time
+
+PROCESS_START = time.monotonic()  # Taken before the heavy imports below
+
+import os
 import signal
 import sys
-import time
 import threading
 
 from pi5neo import Pi5Neo
 from backend import PatternManager
 from ipc_server import IPCServer
-from config import DEVICE, NUM_LEDS, SPI_SPEED, STARTUP_PATTERNS, HOOK_LINKS
-
+from ipc_metrics import MetricsWriter
+from http_gateway import HTTPGateway
+from strip_proxy import StripProxy
+from plugin_watcher import PluginWatcher
+from startup_profile import StartupProfile
+from config import DEVICE, NUM_LEDS, SPI_SPEED, STARTUP_PATTERNS, HOOK_LINKS, PLUGIN_HOT_RELOAD
+from config import PATTERN_LOCATION, IPC_METRICS_FILE, IPC_METRICS_INTERVAL
+from config import HTTP_GATEWAY_ENABLED, HTTP_GATEWAY_HOST, HTTP_GATEWAY_PORT, HTTP_GATEWAY_TOKEN
 
-def main(socket_path: str = "/tmp/wopr.sock"):
-    neo = Pi5Neo(DEVICE, NUM_LEDS, SPI_SPEED)
-    manager = PatternManager(neo)
 
-    # Load patterns and hooks
-    manager.load_patterns()
-    manager.load_hooks()
+def _restore_startup(manager, restored: bool, retry_restore: bool):
+    """Register startup patterns and hook links from config and the state store
 
-    # Register config-specified startup patterns and hook links
+    Args:
+        restored: Whether the last pattern was already restored
+        retry_restore: Try the restore again now that all pattern files are scanned
+            (the saved pattern may live in a file that is newer than the plugin index)
+    """
     for p in STARTUP_PATTERNS:
         manager.register_startup_pattern(p)
     for hook_event, pattern_name in HOOK_LINKS.items():
@@ -35,27 +45,93 @@ def main(socket_path: str = "/tmp/wopr.sock"):
     linked_patterns = persistent_data.get("linked", {})
     for hook_event, pattern_name in linked_patterns.items():
         if hook_event not in manager.startup_links:
-            manager.startup_links[hook_event] = pattern_name
+            manager.link_hook(hook_event, pattern_name)
             # Auto-start hook-linked patterns on boot
             if pattern_name in manager.patterns:
-                manager.startup_patterns.append(pattern_name)
+                manager.register_startup_pattern(pattern_name)
                 print(f"Restored persistent hook link: {hook_event} → {pattern_name} (auto-starting)")
     
     # Restore standalone patterns (also auto-start them)
     standalone_patterns = persistent_data.get("standalone", [])
     for pattern_name in standalone_patterns:
         if pattern_name in manager.patterns and pattern_name not in manager.startup_patterns:
-            manager.startup_patterns.append(pattern_name)
+            manager.register_startup_pattern(pattern_name)
             print(f"Restored standalone startup pattern: {pattern_name}")
 
-    # RESTORE LAST PATTERN (from previous session)
-    if not manager.load_pattern():
+    if not restored and retry_restore:
+        restored = manager.load_pattern()
+    if not restored:
         # If no saved pattern, start config defaults and startup patterns
         manager.start_startup_patterns()
 
-    # Start IPC server
-    ipc = IPCServer(manager, socket_path=socket_path)
+
+def _start_ipc(ipc):
     ipc.start()
+    ipc.ready.wait(timeout=5.0)
+
+
+def main(socket_path: str = "/tmp/wopr.sock"):
+    profile = StartupProfile(PROCESS_START)
+    profile.mark("imports_done")
+
+    def _report_first_frame(strip):
+        profile.mark("first_frame", strip.first_frame_time)
+        elapsed_ms = (strip.first_frame_time - PROCESS_START) * 1000
+        print(f"Time to first frame: {elapsed_ms:.0f} ms")
+
+    with profile.stage("strip_init"):
+        neo = StripProxy(Pi5Neo(DEVICE, NUM_LEDS, SPI_SPEED), on_first_frame=_report_first_frame)
+        manager = PatternManager(neo)
+    manager.startup_profile = profile
+
+    # RESTORE LAST PATTERN (from previous session) before anything else, so
+    # it renders right after the strip is up. With a plugin index only the
+    # restored pattern's file is imported here.
+    with profile.stage("restore_pattern"):
+        indexed = manager.load_plugin_index()
+        if not indexed:
+            manager.load_patterns()
+        restored = manager.load_pattern()
+
+    # The rest of the boot runs in parallel while the pattern renders:
+    # pick up new/changed plugin files, load hooks, restore startup
+    # patterns and links, and start the IPC server.
+    ipc = IPCServer(manager, socket_path=socket_path)
+    scan = profile.start_stage("scan_patterns", manager.load_patterns)
+    stages = [
+        scan,
+        profile.start_stage("load_hooks", manager.load_hooks),
+        profile.start_stage("restore_links", _restore_startup,
+                            manager, restored, indexed, after=[scan]),
+        profile.start_stage("ipc_start", _start_ipc, ipc),
+    ]
+    for stage in stages:
+        stage.join()
+    profile.mark("boot_done")
+    print("Startup profile:")
+    profile.report()
+
+    # Hot-reload patterns and hooks when their files change
+    watcher = None
+    if PLUGIN_HOT_RELOAD:
+        watcher = PluginWatcher(manager)
+        watcher.start()
+
+    # Export IPC latency metrics for node_exporter
+    metrics_writer = None
+    if IPC_METRICS_INTERVAL > 0:
+        metrics = [ipc.metrics, manager.actor.queue_wait, manager.actor.run_time,
+                   manager.hook_timings, neo.timings, manager.persistence.timings]
+        # Frame and hook timings change all the time; only IPC traffic triggers a write
+        metrics_writer = MetricsWriter(metrics, os.path.join(PATTERN_LOCATION, IPC_METRICS_FILE),
+                                       interval=IPC_METRICS_INTERVAL, trigger=[ipc.metrics])
+        metrics_writer.start()
+
+    # Remote control over HTTP (off by default)
+    gateway = None
+    if HTTP_GATEWAY_ENABLED:
+        gateway = HTTPGateway(ipc, HTTP_GATEWAY_HOST, HTTP_GATEWAY_PORT, token=HTTP_GATEWAY_TOKEN)
+        gateway.start()
 
     # Wait for termination signal
     stop_event = threading.Event()
@@ -80,9 +156,17 @@ def main(socket_path: str = "/tmp/wopr.sock"):
     finally:
         #print("Stopping patterns...")
         #manager.stop_all_patterns()  //Kills patterns when we want to keep them running but the service is always running.
+        if watcher:
+            watcher.stop()
+        if metrics_writer:
+            metrics_writer.stop()
+        if gateway:
+            gateway.stop()
         print("Stopping IPC server...")
         ipc.stop()
         ipc.join(timeout=2.0)
+        manager.persistence.stop()  # Write changes still waiting for their delay
+        manager.store.close()
         print("Service stopped")
 
 
@@ -0,0 +1,44 @@
+"""
+Simulated Strip - a stand-in for Pi5Neo that needs no SPI device
+Keeps the LED colours in memory and makes update_strip() take about as long
+as writing the frame to a real WS2812 strip. Used by the benchmarks so the
+service can run on any machine.
+"""
+
+import time
+from typing import List, Tuple
+
+WS2812_BIT_TIME = 1.25e-6  # Seconds per bit on the wire (800 kHz)
+WS2812_RESET_TIME = 50e-6  # Latch time after each frame
+
+
+class SimulatedStrip:
+    """In-memory strip with the Pi5Neo methods the patterns use"""
+
+    def __init__(self, device: str = "/dev/null", num_leds: int = 10, spi_speed_khz: int = 800):
+        """
+        Args:
+            device: Ignored; accepted so it can be constructed like Pi5Neo
+            num_leds: Number of LEDs on the simulated strip
+            spi_speed_khz: Ignored; the wire time uses the WS2812 data rate
+        """
+        self.num_leds = num_leds
+        self.led_state: List[Tuple[int, int, int]] = [(0, 0, 0)] * num_leds
+        self.frame_time = num_leds * 24 * WS2812_BIT_TIME + WS2812_RESET_TIME
+        self.frames = 0
+
+    def set_led_color(self, index: int, red: int, green: int, blue: int):
+        if 0 <= index < self.num_leds:
+            self.led_state[index] = (red, green, blue)
+
+    def fill_strip(self, red: int, green: int, blue: int):
+        self.led_state = [(red, green, blue)] * self.num_leds
+
+    def clear_strip(self):
+        self.fill_strip(0, 0, 0)
+
+    def update_strip(self, sleep_duration: float = 0.1):
+        time.sleep(self.frame_time)
+        self.frames += 1
+        if sleep_duration:
+            time.sleep(sleep_duration)
@@ -0,0 +1,89 @@
+"""
+Startup Profile - timing of the service's boot stages
+Stages run either inline (stage() context manager) or on their own thread
+(start_stage()). Every time is recorded in milliseconds relative to process
+start, and the whole profile is served by the `startup_profile` IPC action.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+
+class StartupProfile:
+    """Start offset and duration of each boot stage, plus one-off marks (first frame)"""
+
+    def __init__(self, origin: float):
+        """
+        Args:
+            origin: time.monotonic() at process start; all offsets are relative to it
+        """
+        self.origin = origin
+        self.stages = {}  # name -> {"start_ms", "duration_ms", "thread", "error"}
+        self.marks = {}   # name -> offset in ms
+        self._lock = threading.Lock()
+
+    def _ms(self, when: float) -> float:
+        return round((when - self.origin) * 1000, 1)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the body of a `with` block as one stage"""
+        start = time.monotonic()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self.stages[name] = {
+                    "start_ms": self._ms(start),
+                    "duration_ms": round((end - start) * 1000, 1),
+                    "thread": threading.current_thread().name,
+                    "error": error,
+                }
+
+    def start_stage(self, name: str, target: Callable, *args,
+                    after: Iterable[threading.Thread] = ()) -> threading.Thread:
+        """Run target(*args) as a stage on a background thread.
+
+        The stage starts once every thread in `after` has finished. A failing
+        stage is logged and recorded; it does not stop the other stages.
+        """
+        def run():
+            for thread in after:
+                thread.join()
+            try:
+                with self.stage(name):
+                    target(*args)
+            except Exception as e:
+                print(f"Startup stage {name} failed: {e}")
+
+        thread = threading.Thread(target=run, name=f"boot-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark(self, name: str, when: Optional[float] = None):
+        """Record a point in time (defaults to now)"""
+        with self._lock:
+            self.marks[name] = self._ms(time.monotonic() if when is None else when)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            stages = sorted(({"name": n, **s} for n, s in self.stages.items()),
+                            key=lambda s: s["start_ms"])
+            return {"stages": stages, "marks": dict(self.marks)}
+
+    def report(self):
+        """Print one line per stage, in start order"""
+        profile = self.as_dict()
+        for s in profile["stages"]:
+            status = f" FAILED: {s['error']}" if s["error"] else ""
+            print(f"  {s['name']:<16} +{s['start_ms']:>7.1f} ms  {s['duration_ms']:>7.1f} ms  "
+                  f"[{s['thread']}]{status}")
+        for name, offset in profile["marks"].items():
+            print(f"  {name:<16} +{offset:>7.1f} ms")
@@ -0,0 +1,338 @@
+"""
+State Store - the service's persistent state in one SQLite database
+Holds the saved pattern, persistent hook links, standalone startup
+patterns, the registered startup list, and per-pattern parameters and
+zones. The database runs in WAL mode; its schema version is SQLite's
+user_version, and pending migrations run when the file is opened.
+
+The whole state is read in one transaction when the store is opened and
+kept in memory, so lookups never touch the disk. Changes replace the
+in-memory state and are committed behind (see write_behind): a burst of
+changes becomes one transaction that writes only the rows that changed.
+
+The first open imports the files the service used before the store
+(pattern.txt, hook.txt in either of its formats, and the startup list in
+/tmp) and renames them to "<name>.migrated".
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# table -> (key columns, value columns); every table is keyed and WITHOUT ROWID
+TABLES = {
+    "meta": (("key",), ("value",)),
+    "links": (("hook",), ("pattern",)),
+    "standalone": (("pattern",), ("position",)),
+    "params": (("pattern", "key"), ("value",)),
+    "zones": (("pattern", "name"), ("position", "start", "length")),
+}
+
+SCHEMA_V1 = [
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE links (hook TEXT PRIMARY KEY, pattern TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX links_pattern ON links (pattern)",
+    "CREATE TABLE standalone (pattern TEXT PRIMARY KEY, position INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE params (pattern TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+    " PRIMARY KEY (pattern, key)) WITHOUT ROWID",
+    "CREATE TABLE zones (pattern TEXT NOT NULL, name TEXT NOT NULL, position INTEGER NOT NULL,"
+    " start INTEGER NOT NULL, length INTEGER NOT NULL, PRIMARY KEY (pattern, name)) WITHOUT ROWID",
+]
+
+EMPTY_STATE = {
+    "pattern": None,     # Saved pattern, restored at boot
+    "linked": {},        # hook event name -> pattern name
+    "standalone": [],    # Patterns started at boot without a hook
+    "registered": [],    # Registered startup patterns (save_startup_patterns)
+    "params": {},        # pattern name -> {parameter: JSON value}
+    "zones": {},         # pattern name -> [{"name", "start", "length"}]
+}
+
+
+def normalize_zones(zones) -> List[dict]:
+    """Check a pattern's zones and return them as [{"name", "start", "length"}]; raises ValueError"""
+    if not isinstance(zones, list):
+        raise ValueError("zones must be a list")
+    result, names = [], set()
+    for zone in zones:
+        if not isinstance(zone, dict):
+            raise ValueError("each zone must be an object with name, start and length")
+        name, start, length = zone.get("name"), zone.get("start"), zone.get("length")
+        if not isinstance(name, str) or not name:
+            raise ValueError("zone name must be a non-empty string")
+        if name in names:
+            raise ValueError(f"duplicate zone '{name}'")
+        if not isinstance(start, int) or not isinstance(length, int) or start < 0 or length < 1:
+            raise ValueError(f"zone '{name}' needs start >= 0 and length >= 1")
+        names.add(name)
+        result.append({"name": name, "start": start, "length": length})
+    return result
+
+
+def normalize_params(params) -> dict:
+    """Check a pattern's parameters (a JSON object) and return a copy; raises ValueError"""
+    if not isinstance(params, dict) or not all(isinstance(k, str) for k in params):
+        raise ValueError("params must be an object with string keys")
+    try:
+        return json.loads(json.dumps(params))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"params must be JSON values: {e}")
+
+
+def _rows(state: dict) -> Dict[str, dict]:
+    """The state as table rows: {table: {key tuple: value tuple}}"""
+    return {
+        "meta": {("pattern",): (json.dumps(state["pattern"]),),
+                 ("registered",): (json.dumps(state["registered"]),)},
+        "links": {(hook,): (pattern,) for hook, pattern in state["linked"].items()},
+        "standalone": {(pattern,): (i,) for i, pattern in enumerate(state["standalone"])},
+        "params": {(pattern, key): (json.dumps(value),)
+                   for pattern, params in state["params"].items() for key, value in params.items()},
+        "zones": {(pattern, z["name"]): (i, z["start"], z["length"])
+                  for pattern, zones in state["zones"].items() for i, z in enumerate(zones)},
+    }
+
+
+def _sync_rows(conn, old: Dict[str, dict], new: Dict[str, dict]):
+    """Delete, insert and update only the rows that differ between two _rows() results"""
+    for table, (keys, values) in TABLES.items():
+        old_rows, new_rows = old.get(table, {}), new[table]
+        gone = [key for key in old_rows if key not in new_rows]
+        if gone:
+            where = " AND ".join(f"{k} = ?" for k in keys)
+            conn.executemany(f"DELETE FROM {table} WHERE {where}", gone)
+        changed = [key + value for key, value in new_rows.items() if old_rows.get(key) != value]
+        if changed:
+            columns = keys + values
+            conn.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                             f"VALUES ({', '.join('?' * len(columns))})", changed)
+
+
+@contextmanager
+def _transaction(conn, mode: str = ""):
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def read_legacy_files(pattern_file: str, hook_file: str, startup_file: str) -> dict:
+    """State from the files used before the store (missing or unreadable files are skipped)"""
+    state = dict(EMPTY_STATE)
+    try:
+        with open(pattern_file, 'r') as f:
+            state["pattern"] = f.read().strip() or None
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading {pattern_file}: {e}")
+    try:
+        with open(hook_file, 'r') as f:
+            data = json.load(f)
+        if data and isinstance(data, dict):
+            # Old format: hook names as keys and patterns as values, no "linked"/"standalone"
+            if "linked" not in data and "standalone" not in data:
+                data = {"linked": data, "standalone": []}
+            state["linked"] = dict(data.get("linked", {}))
+            state["standalone"] = list(dict.fromkeys(data.get("standalone", [])))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading {hook_file}: {e}")
+    try:
+        with open(startup_file, 'r') as f:
+            state["registered"] = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading {startup_file}: {e}")
+    return state
+
+
+class StateStore:
+    """In-memory persistent state, committed behind to a SQLite database"""
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str, persistence, legacy_files: Optional[List[str]] = None):
+        """
+        Args:
+            path: Database file
+            persistence: WriteBehind that schedules the commits
+            legacy_files: [pattern file, hook file, startup list file] imported on the first open
+        """
+        self.path = path
+        self.persistence = persistence
+        self.legacy_files = legacy_files
+        self.state = EMPTY_STATE  # Replaced, never mutated, so readers need no lock
+        self.migrated = False  # True if this open imported the legacy files
+        self._conn = None
+        self._committed = {}  # _rows() of the state in the database
+        self._warned_closed = False
+
+    def open(self) -> bool:
+        """Open (creating or migrating) the database and read the whole state"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # Commits are already coalesced; keep each one
+            self._conn = conn
+            self._migrate()
+            self.state = self._load()
+        except Exception as e:
+            print(f"Error opening state store {self.path}: {e}")
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            return False
+        self._committed = _rows(self.state)
+        self.persistence.register(self.path, self._commit)
+        self.persistence.known(self.path, self.state)
+        return True
+
+    def close(self):
+        """Checkpoint the WAL into the database and close it (after the last flush)"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+        except Exception as e:
+            print(f"Error closing state store: {e}")
+        self._conn = None
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > self.SCHEMA_VERSION:
+            raise RuntimeError(f"database schema {version} is newer than this service ({self.SCHEMA_VERSION})")
+        if version == 0:
+            legacy = read_legacy_files(*self.legacy_files) if self.legacy_files else EMPTY_STATE
+            with _transaction(self._conn, "IMMEDIATE"):
+                for statement in SCHEMA_V1:
+                    self._conn.execute(statement)
+                _sync_rows(self._conn, {}, _rows(legacy))
+                self._conn.execute("PRAGMA user_version = 1")
+            self._retire_legacy_files()
+            print(f"Created state store {self.path}")
+        # Later schema versions migrate here, one `if version < N` step each
+
+    def _retire_legacy_files(self):
+        for path in self.legacy_files or ():
+            if os.path.exists(path):
+                try:
+                    os.replace(path, f"{path}.migrated")
+                    self.migrated = True
+                    print(f"Migrated {path} into the state store")
+                except Exception as e:
+                    print(f"Error renaming {path}: {e}")
+
+    def _load(self) -> dict:
+        """The whole state, read in one transaction"""
+        conn = self._conn
+        with _transaction(conn):
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            links = conn.execute("SELECT hook, pattern FROM links").fetchall()
+            standalone = conn.execute("SELECT pattern FROM standalone ORDER BY position").fetchall()
+            params = conn.execute("SELECT pattern, key, value FROM params").fetchall()
+            zones = conn.execute("SELECT pattern, name, start, length FROM zones "
+                                 "ORDER BY pattern, position").fetchall()
+        state = {
+            "pattern": json.loads(meta.get("pattern", "null")),
+            "linked": dict(links),
+            "standalone": [row[0] for row in standalone],
+            "registered": json.loads(meta.get("registered", "[]")),
+            "params": {},
+            "zones": {},
+        }
+        for pattern, key, value in params:
+            state["params"].setdefault(pattern, {})[key] = json.loads(value)
+        for pattern, name, start, length in zones:
+            state["zones"].setdefault(pattern, []).append({"name": name, "start": start, "length": length})
+        return state
+
+    def _commit(self, state: dict):
+        """WriteBehind writer: commit the rows that changed since the last commit"""
+        if self._conn is None:
+            raise RuntimeError("state store is not open")
+        rows = _rows(state)
+        with _transaction(self._conn, "IMMEDIATE"):
+            _sync_rows(self._conn, self._committed, rows)
+        self._committed = rows
+
+    def _update(self, **changes) -> bool:
+        """Replace parts of the state and schedule a commit; False if nothing changed"""
+        state = {**self.state, **changes}
+        if state == self.state:
+            return False
+        self.state = state
+        if self._conn is None:
+            # No writer is registered for the path; the change lives in memory only
+            if not self._warned_closed:
+                self._warned_closed = True
+                print(f"State store {self.path} is not open; changes will not be saved")
+            return True
+        self.persistence.write(self.path, state)
+        return True
+
+    # Reads (in memory)
+
+    @property
+    def pattern(self) -> Optional[str]:
+        return self.state["pattern"]
+
+    def links(self) -> dict:
+        return dict(self.state["linked"])
+
+    def standalone(self) -> list:
+        return list(self.state["standalone"])
+
+    def registered(self) -> list:
+        return list(self.state["registered"])
+
+    def params(self, pattern: str) -> dict:
+        return dict(self.state["params"].get(pattern, {}))
+
+    def zones(self, pattern: str) -> list:
+        return [dict(z) for z in self.state["zones"].get(pattern, [])]
+
+    # Changes (committed behind); made on one thread, the manager actor
+
+    def set_pattern(self, pattern: Optional[str]) -> bool:
+        return self._update(pattern=pattern)
+
+    def set_link(self, hook: str, pattern: str) -> bool:
+        return self._update(linked={**self.state["linked"], hook: pattern})
+
+    def remove_link(self, hook: str) -> bool:
+        return self._update(linked={h: p for h, p in self.state["linked"].items() if h != hook})
+
+    def add_standalone(self, pattern: str) -> bool:
+        if pattern in self.state["standalone"]:
+            return False
+        return self._update(standalone=self.state["standalone"] + [pattern])
+
+    def remove_standalone(self, pattern: str) -> bool:
+        return self._update(standalone=[p for p in self.state["standalone"] if p != pattern])
+
+    def set_registered(self, patterns: List[str]) -> bool:
+        return self._update(registered=list(patterns))
+
+    def set_params(self, pattern: str, params: dict) -> bool:
+        """Replace a pattern's parameters ({} removes them)"""
+        all_params = {p: v for p, v in self.state["params"].items() if p != pattern}
+        if params:
+            all_params[pattern] = normalize_params(params)
+        return self._update(params=all_params)
+
+    def set_zones(self, pattern: str, zones: list) -> bool:
+        """Replace a pattern's zones ([] removes them)"""
+        all_zones = {p: z for p, z in self.state["zones"].items() if p != pattern}
+        if zones:
+            all_zones[pattern] = normalize_zones(zones)
+        return self._update(zones=all_zones)
@@ -0,0 +1,117 @@
+"""
+Strip Proxy - wraps the Pi5Neo strip so the service can observe frames
+Patterns use it exactly like a Pi5Neo object; every call is passed through,
+and each update_strip() call is counted as one frame.
+
+update_strip() is timed: the SPI write on its own (the proxy does the
+pattern's sleep itself, after the write) and the interval between frames.
+A frame interval more than LONG_GAP_FACTOR times the recent average
+counts as a long gap. That is not a dropped frame: the proxy can't tell
+when a frame was due, and patterns that only write when something changed
+(e.g. CPU Cores) have long gaps while working as intended.
+"""
+
+import threading
+import time
+from collections import deque
+
+from ipc_metrics import IPCMetrics
+
+LONG_GAP_FACTOR = 1.5  # Interval, relative to the recent average, that counts as a long gap
+INTERVAL_SMOOTHING = 0.1  # Weight of the newest interval in the running average
+FPS_WINDOW = 1.0  # Seconds of frames the live FPS is measured over
+
+
+class StripProxy:
+    """Pass-through wrapper around a Pi5Neo strip that records frame timing"""
+
+    def __init__(self, neo, on_first_frame=None):
+        """
+        Args:
+            neo: The Pi5Neo strip object to wrap
+            on_first_frame: Optional callback(proxy) run after the first frame is written
+        """
+        self._neo = neo
+        self._on_first_frame = on_first_frame
+        self.frames = 0
+        self.first_frame_time = None  # time.monotonic() of the first update_strip()
+        self._frame_cond = threading.Condition()
+        # "write" is the SPI write alone, "interval" the time from one frame to the next
+        self.timings = IPCMetrics(name="wopr_strip_frame", label="stage", results=False,
+                                  description="LED strip write time and frame interval.")
+        self.long_gaps = 0  # Frame intervals over LONG_GAP_FACTOR times the average
+        self._frame_times = deque(maxlen=1024)  # time.monotonic() of recent frames, for the FPS
+        self._avg_interval = None  # Running average; None until two frames of one pattern
+
+    def __getattr__(self, name):
+        return getattr(self._neo, name)
+
+    def update_strip(self, sleep_duration: float = 0.1):
+        start = time.perf_counter()
+        result = self._neo.update_strip(sleep_duration=0)
+        self._record_frame(time.perf_counter() - start)
+        with self._frame_cond:
+            self.frames += 1
+            self._frame_cond.notify_all()
+        if self.first_frame_time is None:
+            self.first_frame_time = time.monotonic()
+            if self._on_first_frame:
+                try:
+                    self._on_first_frame(self)
+                except Exception as e:
+                    print(f"Error in first frame callback: {e}")
+        if sleep_duration:
+            time.sleep(sleep_duration)
+        return result
+
+    def _record_frame(self, write_time: float):
+        now = time.monotonic()
+        self.timings.observe("write", write_time, True)
+        last = self._frame_times[-1] if self._frame_times else None
+        self._frame_times.append(now)
+        if last is None:
+            return
+        interval = now - last
+        self.timings.observe("interval", interval, True)
+        average = self._avg_interval
+        if average is None:
+            self._avg_interval = interval
+            return
+        if interval > average * LONG_GAP_FACTOR:
+            self.long_gaps += 1
+        self._avg_interval = average + INTERVAL_SMOOTHING * (interval - average)
+
+    def pattern_started(self):
+        """Forget the frame rate of the previous pattern (called on every pattern start)"""
+        self._frame_times.clear()
+        self._avg_interval = None
+
+    def fps(self) -> float:
+        """Frames per second over the last FPS_WINDOW seconds"""
+        now = time.monotonic()
+        recent = [t for t in list(self._frame_times) if now - t <= FPS_WINDOW]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1] - recent[0])
+
+    def stats(self) -> dict:
+        """Frame counts, live FPS and the write/interval histograms"""
+        timings = self.timings.snapshot()
+        return {
+            "frames": self.frames,
+            "fps": round(self.fps(), 1),
+            "long_gaps": self.long_gaps,
+            "avg_interval_ms": round(self._avg_interval * 1000, 3) if self._avg_interval else None,
+            "buckets_ms": timings["buckets_ms"],
+            "write": timings["actions"].get("write"),
+            "interval": timings["actions"].get("interval"),
+        }
+
+    def wait_for_frame(self, timeout: float = None) -> bool:
+        """Block until the next frame has been written (a frame boundary).
+
+        Returns False if no frame was written within `timeout` seconds.
+        """
+        with self._frame_cond:
+            start = self.frames
+            return self._frame_cond.wait_for(lambda: self.frames != start, timeout)
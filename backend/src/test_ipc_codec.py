@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the IPC codecs: round trips, partial input and corrupt binary frames
+"""
+from array import array
+
+import pytest
+
+from ipc_codec import BLOB_HEADER, FRAME_HEADER, BinaryCodec, Blob, JSONCodec
+
+MESSAGE = {"id": 3, "ok": True, "result": {"name": "Pulse", "levels": [1, 2, 3]}}
+
+
+def blob_message():
+    return {"id": 4, "frame": Blob(b"\x00\x10\xff" * 4), "series": Blob(array("I", [1, 70000, 3]))}
+
+
+def test_json_round_trip():
+    codec = JSONCodec()
+    buffer = bytearray(codec.encode(MESSAGE) + codec.encode(blob_message()))
+
+    first, second = list(codec.decode(buffer))
+
+    assert first == MESSAGE
+    assert second == {"id": 4, "frame": b"\x00\x10\xff" * 4, "series": array("I", [1, 70000, 3])}
+    assert buffer == b""
+
+
+def test_json_invalid_line_decodes_to_none():
+    buffer = bytearray(b'{"id": 1\n[1, 2]\n' + JSONCodec().encode(MESSAGE))
+
+    assert list(JSONCodec().decode(buffer)) == [None, None, MESSAGE]
+
+
+def test_binary_round_trip():
+    codec = BinaryCodec()
+    buffer = bytearray(codec.encode(MESSAGE) + codec.encode(blob_message()))
+
+    first, second = list(codec.decode(buffer))
+
+    assert first == MESSAGE
+    assert second == {"id": 4, "frame": b"\x00\x10\xff" * 4, "series": array("I", [1, 70000, 3])}
+    assert buffer == b""
+
+
+def test_binary_truncated_frame_waits_for_the_rest():
+    codec = BinaryCodec()
+    frame = codec.encode(blob_message())
+    buffer = bytearray(frame[:-5])
+
+    assert list(codec.decode(buffer)) == []
+    assert len(buffer) == len(frame) - 5  # Kept until the rest arrives
+
+    buffer += frame[-5:]
+    assert [m["id"] for m in codec.decode(buffer)] == [4]
+
+
+def test_binary_blob_length_past_the_frame_is_rejected():
+    frame = bytearray(BinaryCodec().encode({"frame": Blob(b"abc")}))
+    # The one blob header sits just before its 3 data bytes
+    frame[-3 - BLOB_HEADER.size:-3] = BLOB_HEADER.pack(1000)
+
+    with pytest.raises(ValueError):
+        list(BinaryCodec().decode(frame))
+
+
+def test_binary_blob_count_past_the_frame_is_rejected():
+    frame = BinaryCodec().encode({"frame": Blob(b"abc")})
+    size, _, body_len = FRAME_HEADER.unpack_from(frame)
+    frame = FRAME_HEADER.pack(size, 50, body_len) + frame[FRAME_HEADER.size:]
+
+    with pytest.raises(ValueError):
+        list(BinaryCodec().decode(bytearray(frame)))
+
+
+def test_binary_json_length_past_the_frame_is_rejected():
+    frame = BinaryCodec().encode(MESSAGE)
+    size, blob_count, _ = FRAME_HEADER.unpack_from(frame)
+    frame = FRAME_HEADER.pack(size, blob_count, size) + frame[FRAME_HEADER.size:]
+
+    with pytest.raises(ValueError):
+        list(BinaryCodec().decode(bytearray(frame)))
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test that failed IPC actions reach "error" subscribers (runs its own server, no LED strip needed)
+"""
+import json
+import os
+import socket
+import tempfile
+
+from event_bus import EventBus
+from ipc_server import IPCServer
+
+
+class FailingManager:
+    """Just enough of a PatternManager for a server whose start_pattern always fails"""
+
+    def __init__(self):
+        self.events = EventBus()
+
+    def start_pattern(self, name):
+        raise RuntimeError(f"cannot start {name}")
+
+
+def read_message(sock, buffer):
+    while b"\n" not in buffer:
+        chunk = sock.recv(65536)
+        assert chunk, "connection closed by server"
+        buffer += chunk
+    line, _, rest = buffer.partition(b"\n")
+    buffer[:] = rest
+    return json.loads(line)
+
+
+def test_failed_action_publishes_error_event():
+    socket_path = os.path.join(tempfile.mkdtemp(), "wopr.sock")
+    server = IPCServer(FailingManager(), socket_path)
+    server.start()
+    assert server.ready.wait(5)
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(5)
+        sock.connect(socket_path)
+        buffer = bytearray()
+        sock.sendall(b'{"id": 1, "action": "subscribe", "params": {"topics": ["error"]}}\n')
+        assert read_message(sock, buffer)["ok"]
+
+        sock.sendall(b'{"id": 2, "action": "start_pattern", "params": {"name": "Missing Pattern"}}\n')
+        response = event = None
+        while response is None or event is None:
+            message = read_message(sock, buffer)
+            if message.get("topic") == "error":
+                event = message
+            elif message.get("id") == 2:
+                response = message
+        sock.close()
+    finally:
+        server.stop()
+        server.join(5)
+
+    assert response["ok"] is False
+    assert event["id"] == 1
+    assert event["data"] == {"source": "ipc", "name": "start_pattern",
+                             "error": "cannot start Missing Pattern"}
+
+
+if __name__ == "__main__":
+    test_failed_action_publishes_error_event()
+    print("✓ Failed action published an error event")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test the state store's one-time import of the legacy pattern.txt, hook.txt and startup list
+"""
+import json
+import os
+import sqlite3
+import tempfile
+
+from state_store import StateStore
+from write_behind import WriteBehind
+
+
+def legacy_paths(directory):
+    return [os.path.join(directory, "pattern.txt"), os.path.join(directory, "hook.txt"),
+            os.path.join(directory, "wopr_startup.txt")]
+
+
+def open_store(directory):
+    store = StateStore(os.path.join(directory, "wopr_state.db"), WriteBehind(),
+                       legacy_files=legacy_paths(directory))
+    assert store.open()
+    return store
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def rows(directory, query):
+    conn = sqlite3.connect(os.path.join(directory, "wopr_state.db"))
+    try:
+        return sorted(conn.execute(query).fetchall())
+    finally:
+        conn.close()
+
+
+def test_migrates_present_files():
+    directory = tempfile.mkdtemp()
+    pattern_file, hook_file, startup_file = legacy_paths(directory)
+    write(pattern_file, "Knight Rider Pattern\n")
+    write(hook_file, json.dumps({"linked": {"cpu_monitor": "Loading Bar Pattern"},
+                                 "standalone": ["Rainbow", "Rainbow", "Pulse"]}))
+    write(startup_file, "Knight Rider Pattern\n\nPulse\nPulse\n")
+
+    store = open_store(directory)
+
+    assert store.migrated
+    assert store.pattern == "Knight Rider Pattern"
+    assert store.links() == {"cpu_monitor": "Loading Bar Pattern"}
+    assert store.standalone() == ["Rainbow", "Pulse"]
+    assert store.registered() == ["Knight Rider Pattern", "Pulse"]
+    assert rows(directory, "SELECT hook, pattern FROM links") == [("cpu_monitor", "Loading Bar Pattern")]
+    assert rows(directory, "SELECT pattern, position FROM standalone") == [("Pulse", 1), ("Rainbow", 0)]
+    assert rows(directory, "SELECT key, value FROM meta") == [
+        ("pattern", '"Knight Rider Pattern"'), ("registered", '["Knight Rider Pattern", "Pulse"]')]
+    for path in legacy_paths(directory):
+        assert not os.path.exists(path)
+        assert os.path.exists(f"{path}.migrated")
+    store.close()
+
+
+def test_migrates_old_hook_file_format():
+    directory = tempfile.mkdtemp()
+    write(legacy_paths(directory)[1], json.dumps({"cpu_monitor": "Loading Bar Pattern"}))
+
+    store = open_store(directory)
+
+    assert store.links() == {"cpu_monitor": "Loading Bar Pattern"}
+    assert store.standalone() == []
+    store.close()
+
+
+def test_absent_files_create_an_empty_store():
+    directory = tempfile.mkdtemp()
+
+    store = open_store(directory)
+
+    assert not store.migrated
+    assert store.pattern is None
+    assert store.links() == {} and store.standalone() == [] and store.registered() == []
+    assert rows(directory, "SELECT hook FROM links") == []
+    assert [name for name in os.listdir(directory) if name.endswith(".migrated")] == []
+    store.close()
+
+
+def test_malformed_hook_file_is_skipped():
+    directory = tempfile.mkdtemp()
+    pattern_file, hook_file, _ = legacy_paths(directory)
+    write(pattern_file, "Pulse")
+    write(hook_file, "{not json")
+
+    store = open_store(directory)
+
+    assert store.pattern == "Pulse"
+    assert store.links() == {} and store.standalone() == []
+    # Set aside like the readable files, so it isn't parsed again on every boot
+    assert os.path.exists(f"{hook_file}.migrated")
+    store.close()
+
+
+def test_second_open_does_not_migrate_again():
+    directory = tempfile.mkdtemp()
+    pattern_file = legacy_paths(directory)[0]
+    write(pattern_file, "Pulse")
+    open_store(directory).close()
+
+    # A legacy file that shows up after the store exists is left alone
+    write(pattern_file, "Rainbow")
+    store = open_store(directory)
+
+    assert not store.migrated
+    assert store.pattern == "Pulse"
+    with open(pattern_file) as f:
+        assert f.read() == "Rainbow"
+    with open(f"{pattern_file}.migrated") as f:
+        assert f.read() == "Pulse"
+    store.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,591 @@
+"""
+WOPR Client - client library for the IPC protocol (see ipc_server)
+Stdlib only, so it can be copied next to any script or imported from
+backend/src. Two clients with the same typed wrappers for every action:
+
+    from wopr_client import WOPRClient
+    with WOPRClient() as client:
+        client.start_pattern("Knight Rider Pattern")
+        print(client.status()["current_pattern"])
+
+    from wopr_client import AsyncWOPRClient
+    async with AsyncWOPRClient() as client:
+        patterns, status = await asyncio.gather(client.list_patterns(), client.status())
+
+Both keep a small pool of persistent connections. WOPRClient uses one
+connection per calling thread at a time and can pipeline a list of
+requests on it (pipeline()). AsyncWOPRClient multiplexes concurrent callers
+over its connections by request id.
+
+A dropped connection (e.g. the service restarted) is reopened with
+exponential backoff. A request is only sent again if it cannot have run
+twice: the connection failed before it was sent, a pooled connection turned
+out to be closed, or the action only reads state.
+
+Errors: request()/pipeline()/batch() return the response dicts, with
+{"ok": false, "error": ...} for failures of any kind. call() and the typed
+wrappers return the result and raise IPCError for an error response or
+IPCConnectionError when the service cannot be reached.
+"""
+
+import asyncio
+import random
+import socket
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from frame_delta import apply_delta
+from ipc_codec import CODECS
+
+DEFAULT_SOCKET = "/tmp/wopr.sock"
+
+# Actions that are safe to send again after a failure: reads, plus the
+# set_pattern_* writes, which store a whole value (sending one twice leaves
+# the same state as sending it once). A batch is safe when all of its entries are.
+IDEMPOTENT_ACTIONS = {
+    "status", "list_patterns", "list_hooks", "list_startup", "list_hook_pattern_links",
+    "list_persistent_links", "list_startup_patterns", "startup_profile", "get_frame", "metrics",
+    "stats", "get_pattern_config", "set_pattern_params", "set_pattern_zones",
+}
+
+
+def _idempotent(action: str, params: Optional[dict]) -> bool:
+    """True if the request may be sent again; a batch is when all of its entries are"""
+    if action == "batch":
+        entries = (params or {}).get("requests") or []
+        return all(isinstance(e, dict) and e.get("action") in IDEMPOTENT_ACTIONS for e in entries)
+    return action in IDEMPOTENT_ACTIONS
+
+
+class IPCError(Exception):
+    """The service answered with {"ok": false}"""
+
+    def __init__(self, message: str, response: Optional[dict] = None):
+        super().__init__(message)
+        self.response = response or {"ok": False, "error": message}
+
+
+class IPCConnectionError(ConnectionError):
+    """The service could not be reached (after retrying)"""
+
+
+def _result(action: str, response: dict, convert=None):
+    if not response.get("ok"):
+        raise IPCError(f"{action}: {response.get('error')}", response)
+    result = response.get("result")
+    return convert(result) if convert else result
+
+
+class _Actions:
+    """Typed wrappers for every action; subclasses provide _invoke()"""
+
+    def _invoke(self, action: str, params: Optional[dict] = None, convert=None):
+        raise NotImplementedError
+
+    def status(self) -> dict:
+        return self._invoke("status")
+
+    def list_patterns(self) -> List[str]:
+        return self._invoke("list_patterns")
+
+    def list_hooks(self) -> List[str]:
+        return self._invoke("list_hooks")
+
+    def start_pattern(self, name: str) -> str:
+        return self._invoke("start_pattern", {"name": name})
+
+    def stop_pattern(self) -> str:
+        return self._invoke("stop_pattern")
+
+    def stop_all(self) -> str:
+        return self._invoke("stop_all")
+
+    def save_pattern(self, name: str) -> str:
+        return self._invoke("save_pattern", {"name": name})
+
+    def register_startup(self, name: str, linked_hook: Optional[str] = None) -> str:
+        params = {"name": name}
+        if linked_hook:
+            params["linked_hook"] = linked_hook
+        return self._invoke("register_startup", params)
+
+    def unregister_startup(self, name: str) -> str:
+        return self._invoke("unregister_startup", {"name": name})
+
+    def list_startup(self) -> dict:
+        return self._invoke("list_startup")
+
+    def link_hook_to_pattern(self, hook_event_name: str, pattern_name: str) -> str:
+        return self._invoke("link_hook_to_pattern",
+                            {"hook_event_name": hook_event_name, "pattern_name": pattern_name})
+
+    def unlink_hook(self, hook_event_name: str) -> str:
+        return self._invoke("unlink_hook", {"hook_event_name": hook_event_name})
+
+    def list_hook_pattern_links(self) -> Dict[str, Optional[str]]:
+        return self._invoke("list_hook_pattern_links")
+
+    def trigger_test_hook(self) -> str:
+        return self._invoke("trigger_test_hook")
+
+    def add_persistent_link(self, hook_event_name: str, pattern_name: str) -> str:
+        return self._invoke("add_persistent_link",
+                            {"hook_event_name": hook_event_name, "pattern_name": pattern_name})
+
+    def remove_persistent_link(self, hook_event_name: str) -> str:
+        return self._invoke("remove_persistent_link", {"hook_event_name": hook_event_name})
+
+    def list_persistent_links(self) -> Dict[str, str]:
+        return self._invoke("list_persistent_links")
+
+    def add_pattern_to_startup(self, pattern_name: str) -> str:
+        return self._invoke("add_pattern_to_startup", {"pattern_name": pattern_name})
+
+    def remove_pattern_from_startup(self, pattern_name: str) -> str:
+        return self._invoke("remove_pattern_from_startup", {"pattern_name": pattern_name})
+
+    def list_startup_patterns(self) -> List[str]:
+        return self._invoke("list_startup_patterns")
+
+    def get_pattern_config(self, name: str) -> dict:
+        return self._invoke("get_pattern_config", {"name": name})
+
+    def set_pattern_params(self, name: str, params: dict) -> str:
+        return self._invoke("set_pattern_params", {"name": name, "params": params})
+
+    def set_pattern_zones(self, name: str, zones: List[dict]) -> str:
+        return self._invoke("set_pattern_zones", {"name": name, "zones": zones})
+
+    def startup_profile(self) -> dict:
+        return self._invoke("startup_profile")
+
+    def get_frame(self) -> bytes:
+        """Current LED colors as packed RGB bytes (3 per LED)"""
+        return self._invoke("get_frame", convert=lambda r: bytes(r["frame"]))
+
+    def metrics(self) -> dict:
+        return self._invoke("metrics")
+
+    def stats(self) -> dict:
+        return self._invoke("stats")
+
+    def shutdown(self) -> str:
+        return self._invoke("shutdown")
+
+
+# --- sync client ----------------------------------------------------------
+
+class _Connection:
+    """One persistent connection; used by one thread at a time"""
+
+    def __init__(self, socket_path: str, timeout: float, codec: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(socket_path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.codec = CODECS["json"]
+        self.buffer = bytearray()
+        self.responses = {}  # id -> response read ahead of the one being waited for
+        self.next_id = 0
+        self.reused = False    # Taken from the pool rather than just opened
+        self.received = False  # Got any bytes since it was taken
+        self.sent = False      # Wrote a request since it was taken
+        if codec != "json":
+            reply = self.receive(self.send("hello", {"codec": codec}))
+            if not reply.get("ok"):
+                self.close()
+                raise IPCError(f"hello: {reply.get('error')}", reply)
+            self.codec = CODECS[codec]
+            self.sent = False
+
+    def send(self, action: str, params: Optional[dict] = None) -> int:
+        self.next_id += 1
+        request = {"id": self.next_id, "action": action}
+        if params:
+            request["params"] = params
+        self.sock.sendall(self.codec.encode(request))
+        self.sent = True
+        return self.next_id
+
+    def receive(self, request_id: int) -> dict:
+        """Wait for the response to `request_id` (read-only actions may overtake earlier requests)"""
+        while request_id not in self.responses:
+            chunk = self.sock.recv(1 << 20)
+            if not chunk:
+                raise ConnectionError("connection closed by service")
+            self.received = True
+            self.buffer += chunk
+            for reply in self.codec.decode(self.buffer):
+                if reply is None:
+                    raise ConnectionError("unreadable response from service")
+                self.responses[reply.pop("id", None)] = reply
+        return self.responses.pop(request_id)
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class WOPRClient(_Actions):
+    """Thread-safe client with a pool of persistent connections"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, pool_size: int = 2, timeout: float = 5.0,
+                 retries: int = 3, backoff: float = 0.05, max_backoff: float = 1.0, codec: str = "json"):
+        """
+        Args:
+            socket_path: Service socket
+            pool_size: Most connections open at once (and concurrent requests)
+            timeout: Seconds to wait for connect, send or a response
+            retries: Reconnect attempts for a failed request
+            backoff: First delay between attempts, doubled after each one
+            max_backoff: Longest delay between attempts
+            codec: "json", or "binary" for raw frames (see ipc_codec)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec '{codec}' (available: {', '.join(CODECS)})")
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.codec = codec
+        self.connected = False  # Whether the last request reached the service
+        self._idle: List[_Connection] = []
+        self._idle_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the idle connections (busy ones close when they are returned)"""
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _checkout(self) -> _Connection:
+        with self._idle_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return _Connection(self.socket_path, self.timeout, self.codec)
+        conn.reused = True
+        conn.received = False
+        conn.sent = False
+        return conn
+
+    def _execute(self, requests: Sequence[Tuple[str, Optional[dict]]], fn):
+        """Run fn(conn), which sends `requests`, on a pooled connection, reconnecting with backoff"""
+        idempotent = all(_idempotent(action, params) for action, params in requests)
+        delay = self.backoff
+        attempt = 0
+        while True:
+            conn = None
+            with self._slots:
+                try:
+                    conn = self._checkout()
+                    result = fn(conn)
+                except (OSError, ValueError) as e:  # ConnectionError and timeouts are OSErrors
+                    error = e
+                except BaseException:
+                    if conn is not None:
+                        conn.close()
+                    raise
+                else:
+                    with self._idle_lock:
+                        self._idle.append(conn)
+                    self.connected = True
+                    return result
+            if conn is not None:
+                conn.close()
+            # A pooled connection the service closed while idle: resend at once,
+            # unless the service may have run a non-idempotent request already
+            stale = (conn is not None and conn.reused and not conn.received
+                     and (idempotent or not conn.sent))
+            if not (conn is None or stale or idempotent) or attempt >= self.retries:
+                self.connected = False
+                raise IPCConnectionError(f"{self.socket_path}: {error}") from error
+            attempt += 1
+            if not stale:
+                time.sleep(min(delay, self.max_backoff) * random.uniform(0.5, 1.0))
+                delay *= 2
+
+    def request(self, action: str, params: Optional[dict] = None) -> dict:
+        """Send one request; returns the response dict (never raises for service errors)"""
+        try:
+            return self._execute([(action, params)], lambda conn: conn.receive(conn.send(action, params)))
+        except IPCConnectionError as e:
+            return {"ok": False, "error": str(e)}
+
+    def call(self, action: str, params: Optional[dict] = None):
+        """Send one request; returns its result or raises IPCError / IPCConnectionError"""
+        return _result(action, self._execute([(action, params)],
+                                             lambda conn: conn.receive(conn.send(action, params))))
+
+    def _invoke(self, action: str, params: Optional[dict] = None, convert=None):
+        response = self._execute([(action, params)], lambda conn: conn.receive(conn.send(action, params)))
+        return _result(action, response, convert)
+
+    def pipeline(self, requests: Sequence[Tuple[str, Optional[dict]]]) -> List[dict]:
+        """Send several (action, params) requests back to back on one connection, then read
+        all responses; one response dict per request, in order"""
+        def run(conn):
+            ids = [conn.send(action, params) for action, params in requests]
+            return [conn.receive(i) for i in ids]
+        try:
+            return self._execute(requests, run)
+        except IPCConnectionError as e:
+            return [{"ok": False, "error": str(e)} for _ in requests]
+
+    def batch(self, requests: Sequence[Tuple[str, Optional[dict]]]) -> List[dict]:
+        """Run (action, params) requests as one server-side batch (one consistent state)"""
+        response = self.request("batch", {"requests": [{"action": a, "params": p or {}} for a, p in requests]})
+        if not response.get("ok"):
+            return [{"ok": False, "error": response.get("error")} for _ in requests]
+        return response.get("result", [])
+
+    def subscribe(self, topics: Optional[Sequence[str]] = None, buffer: Optional[int] = None) -> Iterator[dict]:
+        """Yield pushed events on a dedicated connection until the generator is closed"""
+        params = {}
+        if topics:
+            params["topics"] = list(topics)
+        if buffer:
+            params["buffer"] = buffer
+        return self._stream("subscribe", params)
+
+    def frames(self, fps: float = 20) -> Iterator[bytes]:
+        """Yield the strip's LED colors (packed RGB) whenever they change, at most fps times a second
+
+        The service sends deltas (see frame_delta); each yielded value is the whole frame.
+        """
+        frame = bytearray()
+        for message in self._stream("stream_frames", {"fps": fps}):
+            if message.get("key"):
+                frame = bytearray(message["num_leds"] * 3)
+            apply_delta(frame, message["runs"], message["data"])
+            yield bytes(frame)
+
+    def _stream(self, action: str, params: dict) -> Iterator[dict]:
+        """Send `action` on a dedicated connection, then yield the messages it pushes"""
+        conn = _Connection(self.socket_path, self.timeout, self.codec)
+        try:
+            conn.send(action, params)
+            started = False
+            while True:
+                for message in conn.codec.decode(conn.buffer):
+                    if message is None:
+                        raise ConnectionError("unreadable event from service")
+                    message.pop("id", None)  # Everything here carries the request's id
+                    if "topic" in message:
+                        yield message
+                    elif not started:
+                        _result(action, message)
+                        started = True
+                        conn.sock.settimeout(None)
+                chunk = conn.sock.recv(1 << 20)
+                if not chunk:
+                    raise ConnectionError("connection closed by service")
+                conn.buffer += chunk
+        finally:
+            conn.close()
+
+
+# --- asyncio client -------------------------------------------------------
+
+class _AsyncConnection:
+    """One persistent connection shared by concurrent callers; a reader task
+    matches responses to their requests by id"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.codec = CODECS["json"]
+        self.buffer = bytearray()
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.next_id = 0
+        self.closed = False
+        self._task = None
+
+    @classmethod
+    async def open(cls, socket_path: str, codec: str) -> "_AsyncConnection":
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        conn = cls(reader, writer)
+        if codec != "json":
+            writer.write(conn.codec.encode({"id": 0, "action": "hello", "params": {"codec": codec}}))
+            replies = []
+            while not replies:
+                chunk = await reader.read(1 << 16)
+                if not chunk:
+                    writer.close()
+                    raise ConnectionError("connection closed by service")
+                conn.buffer += chunk
+                # Stop after the first message: whatever follows is in the new codec
+                for reply in conn.codec.decode(conn.buffer):
+                    replies.append(reply or {"ok": False, "error": "unreadable reply"})
+                    break
+            reply = replies[0]
+            if not reply.get("ok"):
+                writer.close()
+                raise IPCError(f"hello: {reply.get('error')}", reply)
+            conn.codec = CODECS[codec]
+        conn._task = asyncio.ensure_future(conn._read_loop())
+        return conn
+
+    async def _read_loop(self):
+        error = ConnectionError("connection closed by service")
+        try:
+            while True:
+                for reply in self.codec.decode(self.buffer):
+                    if reply is None:
+                        raise ConnectionError("unreadable response from service")
+                    future = self.pending.pop(reply.pop("id", None), None)
+                    if future is not None and not future.done():
+                        future.set_result(reply)
+                chunk = await self.reader.read(1 << 20)
+                if not chunk:
+                    break
+                self.buffer += chunk
+        except (OSError, ValueError) as e:
+            error = e if isinstance(e, ConnectionError) else ConnectionError(str(e))
+        finally:
+            self.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.pending.clear()
+
+    async def request(self, action: str, params: Optional[dict], timeout: float) -> dict:
+        if self.closed:
+            raise ConnectionError("connection closed")
+        self.next_id += 1
+        request_id = self.next_id
+        request = {"id": request_id, "action": action}
+        if params:
+            request["params"] = params
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(self.codec.encode(request))
+        try:
+            await self.writer.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class AsyncWOPRClient(_Actions):
+    """asyncio client; concurrent requests are pipelined over a pool of connections"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, pool_size: int = 2, timeout: float = 5.0,
+                 retries: int = 3, backoff: float = 0.05, max_backoff: float = 1.0, codec: str = "json"):
+        """
+        Args:
+            socket_path: Service socket
+            pool_size: Most connections open at once
+            timeout: Seconds to wait for a response
+            retries: Reconnect attempts for a failed request
+            backoff: First delay between attempts, doubled after each one
+            max_backoff: Longest delay between attempts
+            codec: "json", or "binary" for raw frames (see ipc_codec)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec '{codec}' (available: {', '.join(CODECS)})")
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.codec = codec
+        self.connected = False
+        self._conns: List[_AsyncConnection] = []
+        self._open_lock = None  # asyncio.Lock, created inside the running loop
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        for conn in conns:
+            if conn._task is not None:
+                await asyncio.gather(conn._task, return_exceptions=True)
+
+    async def _connection(self) -> _AsyncConnection:
+        """Least busy open connection, opening another while the pool has room"""
+        self._conns = [c for c in self._conns if not c.closed]
+        idle = min(self._conns, key=lambda c: len(c.pending), default=None)
+        if idle is not None and (not idle.pending or len(self._conns) >= self.pool_size):
+            return idle
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if len(self._conns) < self.pool_size:
+                conn = await asyncio.wait_for(_AsyncConnection.open(self.socket_path, self.codec), self.timeout)
+                self._conns.append(conn)
+                return conn
+        return min(self._conns, key=lambda c: len(c.pending))
+
+    async def _execute(self, action: str, params: Optional[dict]) -> dict:
+        idempotent = _idempotent(action, params)
+        delay = self.backoff
+        attempt = 0
+        while True:
+            conn = None
+            try:
+                conn = await self._connection()
+                response = await conn.request(action, params, self.timeout)
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                if conn is not None and not isinstance(e, asyncio.TimeoutError):
+                    conn.close()
+                if not (conn is None or idempotent) or attempt >= self.retries:
+                    self.connected = False
+                    raise IPCConnectionError(f"{self.socket_path}: {str(e) or type(e).__name__}") from e
+                attempt += 1
+                await asyncio.sleep(min(delay, self.max_backoff) * random.uniform(0.5, 1.0))
+                delay *= 2
+                continue
+            self.connected = True
+            return response
+
+    async def request(self, action: str, params: Optional[dict] = None) -> dict:
+        """Send one request; returns the response dict (never raises for service errors)"""
+        try:
+            return await self._execute(action, params)
+        except IPCConnectionError as e:
+            return {"ok": False, "error": str(e)}
+
+    async def call(self, action: str, params: Optional[dict] = None):
+        """Send one request; returns its result or raises IPCError / IPCConnectionError"""
+        return _result(action, await self._execute(action, params))
+
+    async def _invoke(self, action: str, params: Optional[dict] = None, convert=None):
+        return _result(action, await self._execute(action, params), convert)
+
+    async def pipeline(self, requests: Sequence[Tuple[str, Optional[dict]]]) -> List[dict]:
+        """Send several (action, params) requests concurrently; one response dict per request, in order"""
+        return list(await asyncio.gather(*(self.request(a, p) for a, p in requests)))
+
+    async def batch(self, requests: Sequence[Tuple[str, Optional[dict]]]) -> List[dict]:
+        """Run (action, params) requests as one server-side batch (one consistent state)"""
+        response = await self.request("batch", {"requests": [{"action": a, "params": p or {}} for a, p in requests]})
+        if not response.get("ok"):
+            return [{"ok": False, "error": response.get("error")} for _ in requests]
+        return response.get("result", [])
@@ -0,0 +1,204 @@
+"""
+Write Behind - debounced, atomic writes of the service's persistent files
+The manager keeps its persistent state (saved pattern, hook links and
+standalone patterns, startup patterns, plugin index) in memory and hands
+every change to a WriteBehind. One background thread writes a file once
+no change to it has arrived for `delay` seconds, and never later than
+`max_delay` after the first unwritten change. A burst of changes therefore
+costs one write, and a change back to what is already on disk costs none.
+
+Every write goes to a temporary file in the same directory, which is
+fsynced and renamed over the old file, and then the directory is fsynced.
+After a power cut the file holds either the old or the new contents,
+never a mix. Changes still waiting for their delay are lost on a power
+cut; stop() (and interpreter exit) writes them out. A write that fails is
+scheduled again, `delay` seconds later, unless a newer change replaced it.
+
+A target can also be given its own writer with register(), e.g. the state
+store, whose "contents" are a snapshot it commits in one transaction.
+
+Writes and deletes are timed per file into an IPCMetrics histogram. Its
+counts are the SD card writes for the wear budget.
+"""
+
+import atexit
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from ipc_metrics import IPCMetrics
+
+_UNKNOWN = object()  # On-disk contents not known (never read or written)
+
+
+def _fsync_dir(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, content: str):
+    """Replace `path` with `content` so that a crash leaves the old or the new file (tmp + fsync + rename)"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(directory)
+
+
+class WriteBehind(threading.Thread):
+    """Background writer that coalesces changes to a few small files"""
+
+    def __init__(self, delay: float = 2.0, max_delay: float = 10.0):
+        """
+        Args:
+            delay: Seconds without a new change before pending changes are written
+            max_delay: Longest a change may wait while changes keep arriving
+        """
+        super().__init__(daemon=True, name="write-behind")
+        self.delay = delay
+        self.max_delay = max_delay
+        self.timings = IPCMetrics(name="wopr_sd_write", label="file",
+                                  description="Time spent writing persistent files (write, fsync and rename).")
+        self.changes = 0    # write()/delete() calls
+        self.coalesced = 0  # Changes replaced by a later one before they were written
+        self.skipped = 0    # Files not written because they already held the contents
+        self.bytes_written = 0
+        self._pending: Dict[str, Any] = {}  # path -> contents, None to delete
+        self._on_disk: Dict[str, Any] = {}  # path -> contents known to be on disk
+        self._writers: Dict[str, Callable[[Any], None]] = {}  # path -> writer, instead of a file replace
+        self._first_change = None
+        self._last_change = None
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # flush() and the thread never write at once
+
+    def start(self):
+        super().start()
+        atexit.register(self.flush)  # Daemon threads die at exit; don't lose pending changes
+
+    def register(self, path: str, writer: Callable[[Any], None]):
+        """Write `path` by calling writer(contents) instead of replacing a file"""
+        with self._io_lock:
+            self._writers[path] = writer
+
+    def known(self, path: str, content: Any):
+        """Tell the writer what `path` holds on disk (None: absent), e.g. after reading it at boot"""
+        with self._io_lock:
+            self._on_disk[path] = content
+
+    def write(self, path: str, content: Any):
+        """Schedule `path` to hold `content` (None deletes the file)"""
+        now = time.monotonic()
+        with self._cond:
+            if path in self._pending:
+                self.coalesced += 1
+            self._pending[path] = content
+            self.changes += 1
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._cond.notify()
+
+    def delete(self, path: str):
+        self.write(path, None)
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                while not self._stopping:
+                    due = min(self._last_change + self.delay, self._first_change + self.max_delay)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self.flush()
+
+    def flush(self):
+        """Write every pending change now, on the calling thread"""
+        # Taken under the I/O lock, so an older batch can never land after a newer one
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._first_change = None
+            self._write(batch)
+
+    def stop(self):
+        """Write pending changes and end the thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self.is_alive():
+            self.join(timeout=5.0)
+        self.flush()
+
+    def _write(self, batch: dict):
+        """Write a batch of changes; the caller holds the I/O lock"""
+        for path, content in batch.items():
+            if self._on_disk.get(path, _UNKNOWN) == content:
+                self.skipped += 1
+                continue
+            writer = self._writers.get(path)
+            if content is None and writer is None and not os.path.exists(path):
+                self.skipped += 1
+                self._on_disk[path] = None
+                continue
+            name = os.path.basename(path)
+            start = time.perf_counter()
+            try:
+                if writer is not None:
+                    writer(content)
+                elif content is None:
+                    os.remove(path)
+                    _fsync_dir(os.path.dirname(path) or ".")
+                else:
+                    atomic_write(path, content)
+                    self.bytes_written += len(content.encode("utf-8"))
+            except Exception as e:
+                self.timings.observe(name, time.perf_counter() - start, False)
+                self._on_disk.pop(path, None)
+                print(f"Error writing {path}: {e}")
+                self._retry(path, content)
+                continue
+            self.timings.observe(name, time.perf_counter() - start, True)
+            self._on_disk[path] = content
+
+    def _retry(self, path: str, content: Any):
+        """Schedule a failed write again, unless a newer change is already pending"""
+        now = time.monotonic()
+        with self._cond:
+            if self._stopping or path in self._pending:
+                return
+            self._pending[path] = content
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        """Write counts per file plus coalescing totals"""
+        with self._cond:
+            pending = len(self._pending)
+        files = self.timings.snapshot()["actions"]
+        return {
+            "writes": sum(f["count"] for f in files.values()),
+            "errors": sum(f["errors"] for f in files.values()),
+            "bytes_written": self.bytes_written,
+            "changes": self.changes,
+            "coalesced": self.coalesced,
+            "skipped": self.skipped,
+            "pending": pending,
+            "files": {name: {"writes": f["count"], "errors": f["errors"], "mean_ms": f["mean_ms"],
+                             "max_ms": f["max_ms"]} for name, f in files.items()},
+        }
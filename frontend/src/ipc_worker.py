@@ -0,0 +1,114 @@
+"""
+IPC Worker - runs GUI requests to the service off the Qt UI thread
+The worker owns the WOPRClient and lives on its own QThread, so a slow
+service (a start_pattern can wait on the previous pattern's join) never
+blocks painting or input. Results come back to the UI thread through a
+queued signal and are handed to the callback given with the request.
+
+Requests sent with a key (e.g. "status") are coalesced: while one is in
+flight, further requests with the same key only replace a single pending
+follow-up, which is sent when the in-flight one returns. The in-flight
+response is still delivered, so a key under steady refresh triggers keeps
+getting answers; the follow-up brings anything it missed.
+"""
+
+import itertools
+
+from PySide6.QtCore import QObject, QThread, Signal, Slot
+
+from wopr_client import WOPRClient  # backend/src is put on sys.path by wopr_gui
+
+
+class _Worker(QObject):
+    """Lives on the IPC thread; runs one request list at a time"""
+
+    finished = Signal(int, object, bool)  # ticket, responses, connected
+
+    def __init__(self, socket_path):
+        super().__init__()
+        # Persistent connection, opened on first command; reconnects once if the service restarted
+        self.client = WOPRClient(socket_path, pool_size=1, retries=1)
+
+    @Slot(int, object)
+    def run(self, ticket, requests):
+        try:
+            if len(requests) == 1:
+                action, params = requests[0]
+                responses = [self.client.request(action, params)]
+            else:
+                responses = self.client.batch(requests)
+        except Exception as e:
+            responses = [{"ok": False, "error": str(e)}] * len(requests)
+        self.finished.emit(ticket, responses, self.client.connected)
+
+
+class IPCWorker(QObject):
+    """UI-thread handle that queues requests to a worker QThread"""
+
+    connectionChanged = Signal(bool)
+    _request = Signal(int, object)  # ticket, [(action, params), ...]
+
+    def __init__(self, socket_path, parent=None):
+        """
+        Args:
+            socket_path: Unix socket of the service
+            parent: Owning QObject (the main window)
+        """
+        super().__init__(parent)
+        self.connected = False
+        self._tickets = itertools.count(1)
+        self._callbacks = {}  # ticket -> (key, callback)
+        self._in_flight = {}  # key -> ticket
+        self._pending = {}  # key -> (requests, callback) to send once the in-flight one returns
+        self._thread = QThread()
+        self._thread.setObjectName("wopr-ipc")
+        self._worker = _Worker(socket_path)
+        self._worker.moveToThread(self._thread)
+        self._request.connect(self._worker.run)
+        self._worker.finished.connect(self._on_finished)
+        self._thread.start()
+
+    def send(self, requests, callback=None, key=None):
+        """Queue requests; callback(responses) runs on the UI thread, one response per request
+
+        Args:
+            requests: List of (action, params) tuples; more than one goes as a single batch
+            callback: Called with the list of responses, in order
+            key: Coalescing key for refreshes; None for commands that must all run
+        """
+        if key is not None and key in self._in_flight:
+            self._pending[key] = (requests, callback)
+            return
+        ticket = next(self._tickets)
+        self._callbacks[ticket] = (key, callback)
+        if key is not None:
+            self._in_flight[key] = ticket
+        self._request.emit(ticket, list(requests))
+
+    def close(self, timeout_ms=3000):
+        """Drop outstanding callbacks and stop the worker thread"""
+        self._callbacks.clear()
+        self._pending.clear()
+        self._in_flight.clear()
+        self._thread.quit()
+        if not self._thread.wait(timeout_ms):
+            print("IPC worker: request still running at exit")
+            return
+        self._worker.client.close()
+
+    @Slot(int, object, bool)
+    def _on_finished(self, ticket, responses, connected):
+        if connected != self.connected:
+            self.connected = connected
+            self.connectionChanged.emit(connected)
+        entry = self._callbacks.pop(ticket, None)
+        if entry is None:
+            return  # Closed meanwhile
+        key, callback = entry
+        if key is not None:
+            self._in_flight.pop(key, None)
+            pending = self._pending.pop(key, None)
+            if pending is not None:
+                self.send(pending[0], pending[1], key)
+        if callback is not None:
+            callback(responses)
@@ -0,0 +1,89 @@
+"""
+LED Preview - live view of the strip's colors in the GUI
+One colored cell per LED, wrapped into rows that fit the widget's width.
+Frames arrive from the service's frame stream as deltas (see frame_delta);
+only the cells of changed LEDs are invalidated, so Qt repaints just those
+even on strips with thousands of LEDs.
+"""
+
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
+from frame_delta import apply_delta
+
+CELL = 8  # Cell pitch in pixels
+GAP = 1   # Pixels between neighbouring cells
+BACKGROUND = QColor(32, 32, 32)
+
+
+class LedPreview(QWidget):
+    """Row(s) of LED cells, updated from frame stream messages"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frame = bytearray()  # Packed RGB, 3 bytes per LED
+        self.num_leds = 0
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        # paintEvent fills every dirty rectangle, so Qt need not clear it first
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self._fit_height()
+
+    def columns(self):
+        return max(1, self.width() // CELL)
+
+    def apply_frame(self, message):
+        """Apply one `frame` message and repaint the LEDs it changed"""
+        runs, data = message["runs"], message["data"]
+        if message.get("key"):
+            self.num_leds = message["num_leds"]
+            self.frame = bytearray(self.num_leds * 3)
+            apply_delta(self.frame, runs, data)
+            self._fit_height()
+            self.update()
+            return
+        apply_delta(self.frame, runs, data)
+        cols = self.columns()
+        for i in range(0, len(runs), 2):
+            first, last = runs[i], runs[i] + runs[i + 1] - 1
+            first_row, last_row = first // cols, last // cols
+            if first_row == last_row:
+                left = (first % cols) * CELL
+                self.update(QRect(left, first_row * CELL, (last % cols) * CELL + CELL - left, CELL))
+            else:
+                self.update(QRect(0, first_row * CELL, cols * CELL, (last_row - first_row + 1) * CELL))
+
+    def clear(self):
+        self.frame = bytearray()
+        self.num_leds = 0
+        self._fit_height()
+        self.update()
+
+    def _fit_height(self):
+        rows = -(-self.num_leds // self.columns())
+        self.setFixedHeight(max(1, rows) * CELL)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if event.oldSize().width() != event.size().width():
+            self._fit_height()  # Rows wrap differently
+
+    def paintEvent(self, event):
+        # Walk the dirty region rect by rect: its bounding box would span every
+        # cell between two far-apart changed LEDs
+        painter = QPainter(self)
+        cols = self.columns()
+        frame = self.frame
+        for rect in event.region():
+            painter.fillRect(rect, BACKGROUND)
+            first_col = rect.left() // CELL
+            last_col = min(cols - 1, rect.right() // CELL)
+            for row in range(rect.top() // CELL, rect.bottom() // CELL + 1):
+                for col in range(first_col, last_col + 1):
+                    led = row * cols + col
+                    if led >= self.num_leds:
+                        break
+                    offset = led * 3
+                    painter.fillRect(col * CELL, row * CELL, CELL - GAP, CELL - GAP,
+                                     QColor(frame[offset], frame[offset + 1], frame[offset + 2]))
+        painter.end()
@@ -0,0 +1,56 @@
+"""
+List Sync - keep Qt list widgets in step with a list of names by minimal edits
+A refresh used to clear() a list and add every item again, which drops the
+selection and rebuilds every row. SortedNames remembers what its widget
+shows and applies only the removals and insertions between that and the
+new names; rows that stay are not touched, so their selection stays too.
+"""
+
+from typing import Iterable, List, Sequence, Tuple
+
+
+def diff_sorted(old: Sequence[str], new: Sequence[str]) -> Tuple[List[int], List[Tuple[int, str]]]:
+    """
+    Edits that turn one sorted, duplicate-free list into another
+
+    Returns:
+        (removals, insertions): indexes into `old` to remove, highest first,
+        then (index, name) to insert into the result, lowest index first
+    """
+    old_names, new_names = set(old), set(new)
+    removals = [i for i in range(len(old) - 1, -1, -1) if old[i] not in new_names]
+    insertions = [(i, name) for i, name in enumerate(new) if name not in old_names]
+    return removals, insertions
+
+
+class SortedNames:
+    """Sorted names shown in a QListWidget or QComboBox, starting at row `offset`"""
+
+    def __init__(self, widget, offset: int = 0):
+        """
+        Args:
+            widget: QListWidget or QComboBox this model owns the rows of
+            offset: Fixed rows above the names (e.g. a "(Select ...)" placeholder)
+        """
+        self.widget = widget
+        self.offset = offset
+        self.names: List[str] = []
+
+    def set(self, names: Iterable[str]) -> bool:
+        """Show `names`; returns False (and touches nothing) if they are already shown"""
+        names = sorted(set(names))
+        if names == self.names:
+            return False
+        removals, insertions = diff_sorted(self.names, names)
+        remove = getattr(self.widget, "takeItem", None) or self.widget.removeItem
+        # Row changes must not look like user selections (e.g. currentIndexChanged)
+        blocked = self.widget.blockSignals(True)
+        try:
+            for i in removals:
+                remove(i + self.offset)
+            for i, name in insertions:
+                self.widget.insertItem(i + self.offset, name)
+        finally:
+            self.widget.blockSignals(blocked)
+        self.names = names
+        return True
@@ -0,0 +1,229 @@
+"""
+Performance Dashboard - live service performance tab for the GUI
+Fed by the service's `stats` action about once a second: strip FPS with a
+short history, a histogram of recent frame intervals, long frame gaps and
+SPI write time, per-hook check times with their circuit breaker states,
+IPC latency per action, and SD card writes of the persistent files. The
+charts are painted directly with QPainter (no plotting library), so the
+tab is cheap enough to leave open on the Pi.
+"""
+
+from collections import deque
+
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PySide6.QtWidgets import (
+    QGroupBox, QHBoxLayout, QHeaderView, QLabel, QSizePolicy, QSplitter,
+    QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+HISTORY = 60  # FPS samples shown in the sparkline
+HISTOGRAM_WINDOW = 10  # Polls whose new frame intervals make up the histogram
+BACKGROUND = QColor(32, 32, 32)
+FOREGROUND = QColor(0, 200, 120)
+TEXT = QColor(200, 200, 200)
+BREAKER_COLORS = {"closed": QColor("green"), "half_open": QColor("orange"), "open": QColor("red")}
+
+
+class Sparkline(QWidget):
+    """Line of the last HISTORY values, scaled to the largest"""
+
+    def __init__(self, unit="", parent=None):
+        super().__init__(parent)
+        self.unit = unit
+        self.values = deque(maxlen=HISTORY)
+        self.setMinimumHeight(60)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def add(self, value):
+        self.values.append(value)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), BACKGROUND)
+        values = list(self.values)
+        if values:
+            top = max(max(values), 1e-9)
+            width, height = self.width() - 1, self.height() - 1
+            step = width / (HISTORY - 1)
+            x0 = width - step * (len(values) - 1)
+            points = [QPointF(x0 + i * step, height - v / top * (height - 4)) for i, v in enumerate(values)]
+            painter.setPen(QPen(FOREGROUND, 1.5))
+            painter.drawPolyline(QPolygonF(points))
+            painter.setPen(TEXT)
+            painter.drawText(4, 14, f"{values[-1]:.1f} {self.unit}  (max {top:.1f})")
+        painter.end()
+
+
+class Histogram(QWidget):
+    """One bar per bucket; labels are the buckets' upper bounds"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.labels = []
+        self.counts = []
+        self.setMinimumHeight(110)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def set_data(self, labels, counts):
+        if labels == self.labels and counts == self.counts:
+            return
+        self.labels = labels
+        self.counts = counts
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), BACKGROUND)
+        if self.counts:
+            bars = len(self.counts)
+            label_height = 14
+            height = self.height() - label_height - 2
+            slot = self.width() / bars
+            top = max(max(self.counts), 1)
+            font = painter.font()
+            font.setPointSize(7)
+            painter.setFont(font)
+            for i, (label, count) in enumerate(zip(self.labels, self.counts)):
+                x = i * slot
+                bar = count / top * (height - 12)
+                painter.fillRect(int(x + 1), int(height - bar), max(1, int(slot - 2)), int(bar), FOREGROUND)
+                painter.setPen(TEXT)
+                if count:
+                    painter.drawText(int(x), int(height - bar - 12), int(slot), 12, Qt.AlignCenter, str(count))
+                painter.drawText(int(x), height + 2, int(slot), label_height, Qt.AlignCenter, label)
+        painter.end()
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:g}"
+
+
+def _persistence_text(persistence):
+    if not persistence:
+        return ""
+    return (f"    SD writes: {persistence['writes']} ({persistence['coalesced']} coalesced, "
+            f"{persistence['pending']} pending)")
+
+
+def _fill_table(table, rows, colors=None):
+    """Show rows ({name: [cells]}) in a table, touching only cells whose text changed"""
+    names = sorted(rows)
+    if table.rowCount() != len(names):
+        table.setRowCount(len(names))
+    for row, name in enumerate(names):
+        for col, text in enumerate([name] + rows[name]):
+            item = table.item(row, col)
+            if item is None:
+                item = QTableWidgetItem(text)
+                table.setItem(row, col, item)
+            elif item.text() != text:
+                item.setText(text)
+            if colors and col == len(rows[name]):
+                item.setForeground(colors.get(name, TEXT))
+
+
+def _table(headers):
+    table = QTableWidget(0, len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.verticalHeader().setVisible(False)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    table.horizontalHeader().setStretchLastSection(True)
+    return table
+
+
+class PerfDashboard(QWidget):
+    """Performance tab; apply_stats() takes one `stats` result"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._last_interval_counts = None
+        self._interval_deltas = deque(maxlen=HISTOGRAM_WINDOW)
+        layout = QVBoxLayout(self)
+
+        self.summary = QLabel("Waiting for the service...")
+        self.summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summary)
+
+        charts = QHBoxLayout()
+        fps_group = QGroupBox("Frame Rate")
+        fps_layout = QVBoxLayout()
+        self.fps_line = Sparkline("fps")
+        fps_layout.addWidget(self.fps_line)
+        fps_group.setLayout(fps_layout)
+        charts.addWidget(fps_group)
+        hist_group = QGroupBox("Frame Time (ms, recent frames)")
+        hist_layout = QVBoxLayout()
+        self.frame_histogram = Histogram()
+        hist_layout.addWidget(self.frame_histogram)
+        hist_group.setLayout(hist_layout)
+        charts.addWidget(hist_group, 2)
+        layout.addLayout(charts)
+
+        tables = QSplitter(Qt.Horizontal)
+        hooks_group = QGroupBox("Hook Checks")
+        hooks_layout = QVBoxLayout()
+        self.hooks_table = _table(["Hook", "Checks", "Errors", "Mean ms", "p99 ms", "Max ms", "Breaker"])
+        hooks_layout.addWidget(self.hooks_table)
+        hooks_group.setLayout(hooks_layout)
+        tables.addWidget(hooks_group)
+        ipc_group = QGroupBox("IPC Latency")
+        ipc_layout = QVBoxLayout()
+        self.ipc_table = _table(["Action", "Requests", "Errors", "p50 ms", "p99 ms", "Max ms"])
+        ipc_layout.addWidget(self.ipc_table)
+        ipc_group.setLayout(ipc_layout)
+        tables.addWidget(ipc_group)
+        layout.addWidget(tables, 1)
+
+    def apply_stats(self, stats):
+        strip = stats.get("strip")
+        manager = stats.get("manager", {})
+        if strip:
+            write = strip.get("write") or {}
+            self.summary.setText(
+                f"FPS: {strip['fps']:.1f}    Frames: {strip['frames']}    Long gaps: {strip['long_gaps']}    "
+                f"SPI write p50/p99: {_ms(write.get('p50_ms'))}/{_ms(write.get('p99_ms'))} ms    "
+                f"Manager queue: {manager.get('queue_depth', 0)} (max {manager.get('max_queue_depth', 0)})"
+                + _persistence_text(stats.get("persistence"))
+            )
+            self.fps_line.add(strip["fps"])
+            self._apply_intervals(strip)
+        else:
+            self.summary.setText("The service does not record frame timings (no strip proxy)")
+
+        hooks = stats.get("hooks", {})
+        rows, colors = {}, {}
+        for name, hook in hooks.items():
+            breaker = hook["breaker"]
+            state = breaker["state"]
+            if breaker.get("retry_in_s") is not None:
+                state += f" (retry in {breaker['retry_in_s']:g}s)"
+            rows[name] = [str(hook.get("count", 0)), str(hook.get("errors", 0)), _ms(hook.get("mean_ms")),
+                          _ms(hook.get("p99_ms")), _ms(hook.get("max_ms")), state]
+            colors[name] = BREAKER_COLORS.get(breaker["state"], TEXT)
+        _fill_table(self.hooks_table, rows, colors)
+
+        _fill_table(self.ipc_table, {
+            name: [str(a["count"]), str(a["errors"]), _ms(a["p50_ms"]), _ms(a["p99_ms"]), _ms(a["max_ms"])]
+            for name, a in stats.get("ipc", {}).items()
+        })
+
+    def _apply_intervals(self, strip):
+        """Histogram of the frame intervals recorded during the last HISTOGRAM_WINDOW polls"""
+        interval = strip.get("interval")
+        if not interval:
+            return
+        counts = interval["counts"]
+        last = self._last_interval_counts
+        if last is None or len(last) != len(counts):
+            last = counts  # First poll: only a baseline
+        elif any(c < l for c, l in zip(counts, last)):
+            self._interval_deltas.clear()  # The service restarted; everything it has is new
+            last = [0] * len(counts)
+        self._interval_deltas.append([c - l for c, l in zip(counts, last)])
+        self._last_interval_counts = counts
+        window = [sum(column) for column in zip(*self._interval_deltas)]
+        labels = [f"{b:g}" for b in strip["buckets_ms"]] + [f">{strip['buckets_ms'][-1]:g}"]
+        self.frame_histogram.set_data(labels, window)
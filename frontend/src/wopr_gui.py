@@ -4,22 +4,41 @@ PySide6 GUI for controlling the WOPR LED service via IPC.
 Top section for testing patterns and hooks.
 Bottom section for persistent startup configuration.
 """
+import os
 import sys
 import socket
 import json
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QListWidget, QLabel, QGroupBox, QMessageBox,
-    QSplitter, QStatusBar, QListWidgetItem, QComboBox
+    QSplitter, QStatusBar, QListWidgetItem, QComboBox, QScrollArea, QTabWidget
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import QTimer, Qt, QSocketNotifier
 from PySide6.QtGui import QFont
 
+# The IPC client library and codecs live with the service code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend", "src"))
+from ipc_codec import CODECS
+from ipc_worker import IPCWorker
+from led_preview import LedPreview
+from list_sync import SortedNames
+from perf_dashboard import PerfDashboard
+
+PREVIEW_FPS = 20  # Live preview frame rate asked of the service
+EVENTS_ID = 1  # Request ids on the event stream connection
+FRAMES_ID = 2
+
 
 class WOPRControlGUI(QMainWindow):
     def __init__(self, socket_path="/tmp/wopr.sock"):
         super().__init__()
         self.socket_path = socket_path
+        # Requests run on a worker thread; results come back as callbacks on this thread
+        self.ipc = IPCWorker(socket_path, self)
+        self.ipc.connectionChanged.connect(self.update_connection_status)
+        self._event_sock = None  # Subscription connection for pushed events
+        self._event_notifier = None
+        self._event_buffer = bytearray()
         self.setWindowTitle("WOPR LED Control")
         self.setMinimumSize(900, 700)
         
@@ -27,10 +46,17 @@ class WOPRControlGUI(QMainWindow):
         self.current_pattern = None  # Currently selected pattern in dropdown
         self.hook_links = {}  # {hook_name: pattern_name}
         self.startup_patterns = []  # [pattern_names]
+        self._versions = {}  # Action -> state version of the last reply applied
         
         # Create central widget and main layout
+        # Control tab (everything below) and the performance dashboard tab
+        self.tabs = QTabWidget()
+        self.setCentralWidget(self.tabs)
         central = QWidget()
-        self.setCentralWidget(central)
+        self.tabs.addTab(central, "Control")
+        self.perf_dashboard = PerfDashboard()
+        self.tabs.addTab(self.perf_dashboard, "Performance")
+        self.tabs.currentChanged.connect(lambda _index: self.poll_stats())
         layout = QVBoxLayout(central)
         
         # Status bar
@@ -55,6 +81,19 @@ class WOPRControlGUI(QMainWindow):
         status_layout.addWidget(self.current_pattern_label)
         layout.addLayout(status_layout)
         
+        # Live preview of the strip, fed by the frame stream
+        preview_group = QGroupBox("Live Preview")
+        preview_layout = QVBoxLayout()
+        self.led_preview = LedPreview()
+        preview_scroll = QScrollArea()
+        preview_scroll.setWidget(self.led_preview)
+        preview_scroll.setWidgetResizable(True)
+        preview_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        preview_scroll.setMaximumHeight(120)
+        preview_layout.addWidget(preview_scroll)
+        preview_group.setLayout(preview_layout)
+        layout.addWidget(preview_group)
+        
         # ===== TEST SECTION (Top) =====
         test_group = QGroupBox("Test Patterns & Hooks")
         test_layout = QVBoxLayout()
@@ -66,6 +105,7 @@ class WOPRControlGUI(QMainWindow):
         patterns_group = QGroupBox("Available Patterns")
         patterns_layout = QVBoxLayout()
         self.test_patterns_list = QListWidget()
+        self.pattern_names = SortedNames(self.test_patterns_list)
         self.test_patterns_list.itemDoubleClicked.connect(self.start_selected_pattern)
         patterns_layout.addWidget(self.test_patterns_list)
         
@@ -85,6 +125,7 @@ class WOPRControlGUI(QMainWindow):
         hooks_group = QGroupBox("Available Hooks (Test)")
         hooks_layout = QVBoxLayout()
         self.test_hooks_list = QListWidget()
+        self.hook_names = SortedNames(self.test_hooks_list)
         hooks_layout.addWidget(self.test_hooks_list)
         
         hook_btn_layout = QHBoxLayout()
@@ -114,6 +155,7 @@ class WOPRControlGUI(QMainWindow):
         
         self.startup_mode_dropdown = QComboBox()
         self.startup_mode_dropdown.addItem("(Select a pattern)")
+        self.startup_pattern_names = SortedNames(self.startup_mode_dropdown, offset=1)
         self.startup_mode_dropdown.currentIndexChanged.connect(self.on_startup_mode_changed)
         mode_layout.addWidget(self.startup_mode_dropdown)
         mode_layout.addSpacing(20)
@@ -133,6 +175,7 @@ class WOPRControlGUI(QMainWindow):
         
         self.hook_dropdown = QComboBox()
         self.hook_dropdown.addItem("(Select a hook)")
+        self.link_hook_names = SortedNames(self.hook_dropdown, offset=1)
         hook_option_layout.addWidget(self.hook_dropdown)
         
         self.hook_start_btn = QPushButton("Start & Auto-start on Boot")
@@ -195,45 +238,142 @@ class WOPRControlGUI(QMainWindow):
         control_layout.addWidget(self.stop_all_btn)
         layout.addLayout(control_layout)
         
-        # Auto-refresh timer
+        # Status changes are pushed over an event subscription; the timer only
+        # polls (and retries the subscription) while the service is unreachable
         self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_status)
-        self.refresh_timer.start(2000)  # Refresh every 2 seconds
+        self.refresh_timer.timeout.connect(self.poll_status)
+        self.refresh_timer.start(2000)  # Every 2 seconds
+        
+        # The dashboard is only fed while its tab is showing
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.poll_stats)
+        self.stats_timer.start(1000)
+        self._open_event_stream()
         
         # Initial refresh
         self.refresh_all()
     
-    def send_ipc_command(self, action, params=None):
-        """Send a command to the IPC server and return the response."""
+    def send_ipc_command(self, action, params=None, callback=None, key=None):
+        """Send a command to the IPC server without blocking; callback(response) gets the reply.
+        
+        Args:
+            action: IPC action name
+            params: Action parameters, or None
+            callback: Called on the UI thread with the response
+            key: Coalescing key for refreshes (see IPCWorker.send)
+        """
+        def done(responses):
+            self._check_connection(responses[0])
+            if callback is not None:
+                callback(responses[0])
+        self.ipc.send([(action, params)], done, key)
+    
+    def _check_connection(self, response):
+        if not self.ipc.connected:
+            self.status_bar.showMessage(f"Error: {response.get('error')}", 5000)
+    
+    def _open_event_stream(self):
+        """Subscribe to pattern, link and error events and to the frame stream. Returns True if sent."""
         try:
             sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(2.0)
             sock.connect(self.socket_path)
-            
-            request = {"action": action}
-            if params:
-                request["params"] = params
-            
-            sock.sendall(json.dumps(request).encode("utf-8"))
-            sock.shutdown(socket.SHUT_WR)
-            
-            # Read response
-            data = b""
+            requests = [
+                {"id": EVENTS_ID, "action": "subscribe", "params": {"topics": ["pattern", "link", "error"]}},
+                {"id": FRAMES_ID, "action": "stream_frames", "params": {"fps": PREVIEW_FPS}},
+            ]
+            sock.sendall(b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in requests))
+        except Exception:
+            return False
+        sock.setblocking(False)
+        self._event_sock = sock
+        self._event_buffer = bytearray()
+        self._event_notifier = QSocketNotifier(sock.fileno(), QSocketNotifier.Type.Read, self)
+        self._event_notifier.activated.connect(self._on_event_stream_ready)
+        return True
+    
+    def _close_event_stream(self):
+        if self._event_notifier is not None:
+            self._event_notifier.setEnabled(False)
+            self._event_notifier.deleteLater()
+            self._event_notifier = None
+        if self._event_sock is not None:
+            try:
+                self._event_sock.close()
+            except Exception:
+                pass
+            self._event_sock = None
+        self.led_preview.clear()  # Stale until the next key frame
+    
+    def _on_event_stream_ready(self):
+        """Read pushed events and update the affected parts of the window."""
+        try:
             while True:
-                chunk = sock.recv(4096)
+                chunk = self._event_sock.recv(65536)
                 if not chunk:
-                    break
-                data += chunk
-            
-            sock.close()
-            
-            response = json.loads(data.decode("utf-8"))
-            self.update_connection_status(True)
-            return response
-            
-        except Exception as e:
+                    raise ConnectionError("event stream closed")
+                self._event_buffer += chunk
+        except BlockingIOError:
+            pass
+        except Exception:
+            self._close_event_stream()
             self.update_connection_status(False)
-            self.status_bar.showMessage(f"Error: {str(e)}", 5000)
-            return {"ok": False, "error": str(e)}
+            return
+        
+        for message in CODECS["json"].decode(self._event_buffer):
+            if message is None:
+                continue
+            if message.get("topic") == "frame":
+                self.led_preview.apply_frame(message)
+            elif "topic" in message:
+                self.handle_event(message)
+            elif message.get("id") == FRAMES_ID:
+                if not message.get("ok"):
+                    self.status_bar.showMessage(f"No live preview: {message.get('error')}", 5000)
+            elif message.get("ok"):
+                # Subscribed; catch up on anything that changed while unsubscribed
+                self.update_connection_status(True)
+                self.refresh_status()
+            else:
+                self._close_event_stream()
+                return
+    
+    def handle_event(self, event):
+        """Apply one pushed event."""
+        data = event.get("data", {})
+        if event.get("dropped"):
+            # Missed events; resync instead of trusting this one alone
+            self.refresh_status()
+            self.refresh_startup_links()
+            return
+        topic = event.get("topic")
+        if topic == "pattern":
+            self.show_current_pattern(data.get("name") if data.get("event") == "started" else None)
+        elif topic == "link":
+            self.refresh_startup_links()
+        elif topic == "error":
+            self.status_bar.showMessage(
+                f"Error in {data.get('source')} {data.get('name')}: {data.get('error')}", 5000)
+    
+    def poll_status(self):
+        """Fallback polling while there is no event subscription."""
+        if self._event_sock is None and not self._open_event_stream():
+            self.refresh_status()
+    
+    def poll_stats(self):
+        """Fetch service performance stats for the dashboard tab, if it is showing."""
+        if self.tabs.currentWidget() is not self.perf_dashboard or not self.isVisible():
+            return
+        
+        def done(response):
+            if response.get("ok"):
+                self.perf_dashboard.apply_stats(response.get("result", {}))
+        self.send_ipc_command("stats", callback=done, key="stats")
+    
+    def closeEvent(self, event):
+        self._close_event_stream()
+        self.ipc.close()
+        super().closeEvent(event)
     
     def update_connection_status(self, connected):
         """Update the connection status indicator."""
@@ -244,93 +384,117 @@ class WOPRControlGUI(QMainWindow):
             self.conn_status.setText("● Disconnected")
             self.conn_status.setStyleSheet("color: red; font-weight: bold;")
     
+    def send_ipc_batch(self, requests, callback=None, key=None):
+        """Send several commands in one round trip without blocking.
+        
+        Args:
+            requests: List of (action, params) tuples; params may be None
+            callback: Called on the UI thread with one response per request, in order
+            key: Coalescing key for refreshes (see IPCWorker.send)
+        """
+        def done(responses):
+            self._check_connection(responses[0] if responses else {})
+            if callback is not None:
+                callback(*responses)
+        self.ipc.send(requests, done, key)
+    
+    def _versioned(self, action):
+        """(action, params) asking for a reply only if the state changed since the last one applied."""
+        version = self._versions.get(action)
+        return (action, {"if_version": version} if version is not None else None)
+    
+    def _changed(self, action, response):
+        """True if `response` carries new data for `action`; records its state version."""
+        if not response.get("ok"):
+            return False
+        if "version" in response:
+            self._versions[action] = response["version"]
+        return not response.get("not_modified")
+    
     def refresh_all(self):
-        """Refresh all data from the service."""
-        self.refresh_patterns()
-        self.refresh_hooks()
-        self.refresh_status()
-        self.refresh_startup_links()
+        """Refresh all data from the service in one round trip."""
+        def done(patterns, hooks, status, links, startup):
+            self.apply_patterns(patterns)
+            self.apply_hooks(hooks)
+            self.apply_status(status)
+            self.apply_startup_links(links, startup)
+        self.send_ipc_batch([
+            self._versioned("list_patterns"),
+            self._versioned("list_hooks"),
+            self._versioned("status"),
+            self._versioned("list_persistent_links"),
+            self._versioned("list_startup_patterns"),
+        ], done, key="all")
     
     def refresh_patterns(self):
         """Refresh the list of available patterns."""
-        response = self.send_ipc_command("list_patterns")
-        if response.get("ok"):
-            self.test_patterns_list.clear()
-            patterns = response.get("result", [])
-            self.test_patterns_list.addItems(sorted(patterns))
-            self.status_bar.showMessage(f"Loaded {len(patterns)} patterns", 3000)
+        self.send_ipc_command(*self._versioned("list_patterns"), callback=self.apply_patterns, key="patterns")
+    
+    def apply_patterns(self, response):
+        """Show the available patterns in the test list and the startup dropdown."""
+        if not self._changed("list_patterns", response):
+            return
+        patterns = response.get("result", [])
+        self.pattern_names.set(patterns)
+        current_text = self.startup_mode_dropdown.currentText()
+        if self.startup_pattern_names.set(patterns) and self.startup_mode_dropdown.findText(current_text) < 0:
+            # The selected pattern is gone
+            self.startup_mode_dropdown.setCurrentIndex(0)
+        self.status_bar.showMessage(f"Loaded {len(patterns)} patterns", 3000)
     
     def refresh_hooks(self):
         """Refresh the list of available hooks."""
-        response = self.send_ipc_command("list_hooks")
-        if response.get("ok"):
-            self.test_hooks_list.clear()
-            hooks = response.get("result", [])
-            self.test_hooks_list.addItems(sorted(hooks))
+        self.send_ipc_command(*self._versioned("list_hooks"), callback=self.apply_hooks, key="hooks")
+    
+    def apply_hooks(self, response):
+        """Show the available hooks in the test list and the hook link dropdown."""
+        if not self._changed("list_hooks", response):
+            return
+        hooks = response.get("result", [])
+        self.hook_names.set(hooks)
+        current_hook = self.hook_dropdown.currentText()
+        if self.link_hook_names.set(hooks) and self.hook_dropdown.findText(current_hook) < 0:
+            self.hook_dropdown.setCurrentIndex(0)
     
     def refresh_status(self):
         """Refresh the current pattern status."""
-        response = self.send_ipc_command("status")
-        if response.get("ok"):
+        self.send_ipc_command(*self._versioned("status"), callback=self.apply_status, key="status")
+    
+    def apply_status(self, response):
+        if self._changed("status", response):
             result = response.get("result", {})
-            current = result.get("current_pattern")
-            if current:
-                self.current_pattern_label.setText(f"Current Pattern: {current}")
-                self.current_pattern_label.setStyleSheet("color: green;")
-            else:
-                self.current_pattern_label.setText("Current Pattern: None")
-                self.current_pattern_label.setStyleSheet("color: gray;")
+            self.show_current_pattern(result.get("current_pattern"))
+    
+    def show_current_pattern(self, current):
+        """Update the current pattern label."""
+        if current:
+            self.current_pattern_label.setText(f"Current Pattern: {current}")
+            self.current_pattern_label.setStyleSheet("color: green;")
+        else:
+            self.current_pattern_label.setText("Current Pattern: None")
+            self.current_pattern_label.setStyleSheet("color: gray;")
     
     def refresh_startup_links(self):
         """Refresh the persistent startup links and patterns."""
+        def done(links, startup, patterns, hooks):
+            self.apply_startup_links(links, startup)
+            self.apply_patterns(patterns)
+            self.apply_hooks(hooks)
+        self.send_ipc_batch([
+            self._versioned("list_persistent_links"),
+            self._versioned("list_startup_patterns"),
+            self._versioned("list_patterns"),
+            self._versioned("list_hooks"),
+        ], done, key="startup_links")
+    
+    def apply_startup_links(self, links, startup):
         # Refresh hook-pattern links
-        response = self.send_ipc_command("list_persistent_links")
-        if response.get("ok"):
-            self.hook_links = response.get("result", {})
+        if self._changed("list_persistent_links", links):
+            self.hook_links = links.get("result", {})
         
         # Refresh standalone patterns
-        response = self.send_ipc_command("list_startup_patterns")
-        if response.get("ok"):
-            self.startup_patterns = response.get("result", [])
-        
-        # Update pattern dropdown with all available patterns
-        self.startup_mode_dropdown.blockSignals(True)
-        current_text = self.startup_mode_dropdown.currentText()
-        self.startup_mode_dropdown.clear()
-        self.startup_mode_dropdown.addItem("(Select a pattern)")
-        
-        # Get all patterns
-        response = self.send_ipc_command("list_patterns")
-        if response.get("ok"):
-            patterns = sorted(response.get("result", []))
-            for pattern in patterns:
-                self.startup_mode_dropdown.addItem(pattern)
-        
-        # Restore selection if it exists
-        index = self.startup_mode_dropdown.findText(current_text)
-        if index >= 0:
-            self.startup_mode_dropdown.setCurrentIndex(index)
-        
-        self.startup_mode_dropdown.blockSignals(False)
-        
-        # Update hook dropdown
-        response = self.send_ipc_command("list_hooks")
-        if response.get("ok"):
-            self.hook_dropdown.blockSignals(True)
-            current_hook = self.hook_dropdown.currentText()
-            self.hook_dropdown.clear()
-            self.hook_dropdown.addItem("(Select a hook)")
-            
-            hooks = sorted(response.get("result", []))
-            for hook in hooks:
-                self.hook_dropdown.addItem(hook)
-            
-            # Restore selection if it exists
-            index = self.hook_dropdown.findText(current_hook)
-            if index >= 0:
-                self.hook_dropdown.setCurrentIndex(index)
-            
-            self.hook_dropdown.blockSignals(False)
+        if self._changed("list_startup_patterns", startup):
+            self.startup_patterns = startup.get("result", [])
     
     def start_selected_pattern(self):
         """Start the selected pattern."""
@@ -340,23 +504,26 @@ class WOPRControlGUI(QMainWindow):
             return
         
         pattern_name = current.text()
-        response = self.send_ipc_command("start_pattern", {"name": pattern_name})
         
-        if response.get("ok"):
-            self.status_bar.showMessage(f"Started pattern: {pattern_name}", 3000)
-            self.refresh_status()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to start pattern: {response.get('error')}")
+        def done(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(f"Started pattern: {pattern_name}", 3000)
+                self.refresh_status()
+            else:
+                self.status_bar.clearMessage()
+                QMessageBox.critical(self, "Error", f"Failed to start pattern: {response.get('error')}")
+        self.status_bar.showMessage(f"Starting pattern: {pattern_name}...")
+        self.send_ipc_command("start_pattern", {"name": pattern_name}, done)
     
     def stop_pattern(self):
         """Stop the current pattern."""
-        response = self.send_ipc_command("stop_pattern")
-        
-        if response.get("ok"):
-            self.status_bar.showMessage("Stopped current pattern", 3000)
-            self.refresh_status()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to stop pattern: {response.get('error')}")
+        def done(response):
+            if response.get("ok"):
+                self.status_bar.showMessage("Stopped current pattern", 3000)
+                self.refresh_status()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to stop pattern: {response.get('error')}")
+        self.send_ipc_command("stop_pattern", callback=done)
     
     def stop_all_patterns(self):
         """Stop all patterns."""
@@ -366,12 +533,13 @@ class WOPRControlGUI(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            response = self.send_ipc_command("stop_all")
-            if response.get("ok"):
-                self.status_bar.showMessage("Stopped all patterns", 3000)
-                self.refresh_status()
-            else:
-                QMessageBox.critical(self, "Error", f"Failed to stop patterns: {response.get('error')}")
+            def done(response):
+                if response.get("ok"):
+                    self.status_bar.showMessage("Stopped all patterns", 3000)
+                    self.refresh_status()
+                else:
+                    QMessageBox.critical(self, "Error", f"Failed to stop patterns: {response.get('error')}")
+            self.send_ipc_command("stop_all", callback=done)
     
     def trigger_selected_hook(self):
         """Trigger the selected hook for testing."""
@@ -384,11 +552,12 @@ class WOPRControlGUI(QMainWindow):
         
         # Special case for test hook
         if hook_name == "test_trigger":
-            response = self.send_ipc_command("trigger_test_hook")
-            if response.get("ok"):
-                self.status_bar.showMessage(f"Triggered hook: {hook_name}", 3000)
-            else:
-                QMessageBox.critical(self, "Error", f"Failed to trigger hook: {response.get('error')}")
+            def done(response):
+                if response.get("ok"):
+                    self.status_bar.showMessage(f"Triggered hook: {hook_name}", 3000)
+                else:
+                    QMessageBox.critical(self, "Error", f"Failed to trigger hook: {response.get('error')}")
+            self.send_ipc_command("trigger_test_hook", callback=done)
         else:
             QMessageBox.information(
                 self, "Info", 
@@ -412,28 +581,29 @@ class WOPRControlGUI(QMainWindow):
         hook_event_name = hook_item.text()
         pattern_name = pattern_item.text()
         
-        # Check if pattern is already in standalone
-        response = self.send_ipc_command("list_startup_patterns")
-        if response.get("ok"):
-            standalone = response.get("result", [])
-            if pattern_name in standalone:
-                QMessageBox.warning(
-                    self, "Conflict", 
-                    f"Pattern '{pattern_name}' is already configured as Standalone.\n"
-                    f"Remove it from Standalone first before adding as a Hook Link."
-                )
-                return
-        
-        response = self.send_ipc_command("add_persistent_link", {
-            "hook_event_name": hook_event_name,
-            "pattern_name": pattern_name
-        })
+        def added(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(f"Added hook link: {hook_event_name} → {pattern_name}", 3000)
+                self.refresh_startup_links()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to add link: {response.get('error')}")
         
-        if response.get("ok"):
-            self.status_bar.showMessage(f"Added hook link: {hook_event_name} → {pattern_name}", 3000)
-            self.refresh_startup_links()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to add link: {response.get('error')}")
+        # Check if pattern is already in standalone
+        def checked(response):
+            if response.get("ok"):
+                standalone = response.get("result", [])
+                if pattern_name in standalone:
+                    QMessageBox.warning(
+                        self, "Conflict", 
+                        f"Pattern '{pattern_name}' is already configured as Standalone.\n"
+                        f"Remove it from Standalone first before adding as a Hook Link."
+                    )
+                    return
+            self.send_ipc_command("add_persistent_link", {
+                "hook_event_name": hook_event_name,
+                "pattern_name": pattern_name
+            }, added)
+        self.send_ipc_command("list_startup_patterns", callback=checked)
     
     def remove_startup_link(self):
         """Remove the selected persistent link."""
@@ -458,15 +628,15 @@ class WOPRControlGUI(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            response = self.send_ipc_command("remove_persistent_link", {
+            def done(response):
+                if response.get("ok"):
+                    self.status_bar.showMessage(f"Removed link: {hook_event_name}", 3000)
+                    self.refresh_startup_links()
+                else:
+                    QMessageBox.critical(self, "Error", f"Failed to remove link: {response.get('error')}")
+            self.send_ipc_command("remove_persistent_link", {
                 "hook_event_name": hook_event_name
-            })
-            
-            if response.get("ok"):
-                self.status_bar.showMessage(f"Removed link: {hook_event_name}", 3000)
-                self.refresh_startup_links()
-            else:
-                QMessageBox.critical(self, "Error", f"Failed to remove link: {response.get('error')}")
+            }, done)
 
     def add_pattern_to_startup(self):
         """Add a standalone pattern to startup (no hook required)."""
@@ -478,28 +648,29 @@ class WOPRControlGUI(QMainWindow):
         
         pattern_name = pattern_item.text()
         
-        # Check if pattern is already in hook links
-        response = self.send_ipc_command("list_persistent_links")
-        if response.get("ok"):
-            links = response.get("result", {})
-            for hook_event, linked_pattern in links.items():
-                if linked_pattern == pattern_name:
-                    QMessageBox.warning(
-                        self, "Conflict",
-                        f"Pattern '{pattern_name}' is already linked to hook '{hook_event}'.\n"
-                        f"Remove the hook link first before adding as Standalone."
-                    )
-                    return
-        
-        response = self.send_ipc_command("add_pattern_to_startup", {
-            "pattern_name": pattern_name
-        })
+        def added(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(f"Added pattern to startup: {pattern_name}", 3000)
+                self.refresh_startup_links()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to add pattern: {response.get('error')}")
         
-        if response.get("ok"):
-            self.status_bar.showMessage(f"Added pattern to startup: {pattern_name}", 3000)
-            self.refresh_startup_links()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to add pattern: {response.get('error')}")
+        # Check if pattern is already in hook links
+        def checked(response):
+            if response.get("ok"):
+                links = response.get("result", {})
+                for hook_event, linked_pattern in links.items():
+                    if linked_pattern == pattern_name:
+                        QMessageBox.warning(
+                            self, "Conflict",
+                            f"Pattern '{pattern_name}' is already linked to hook '{hook_event}'.\n"
+                            f"Remove the hook link first before adding as Standalone."
+                        )
+                        return
+            self.send_ipc_command("add_pattern_to_startup", {
+                "pattern_name": pattern_name
+            }, added)
+        self.send_ipc_command("list_persistent_links", callback=checked)
 
     def remove_pattern_from_startup(self):
         """Remove a standalone pattern from startup."""
@@ -518,15 +689,15 @@ class WOPRControlGUI(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            response = self.send_ipc_command("remove_pattern_from_startup", {
+            def done(response):
+                if response.get("ok"):
+                    self.status_bar.showMessage(f"Removed pattern from startup: {pattern_name}", 3000)
+                    self.refresh_startup_links()
+                else:
+                    QMessageBox.critical(self, "Error", f"Failed to remove pattern: {response.get('error')}")
+            self.send_ipc_command("remove_pattern_from_startup", {
                 "pattern_name": pattern_name
-            })
-            
-            if response.get("ok"):
-                self.status_bar.showMessage(f"Removed pattern from startup: {pattern_name}", 3000)
-                self.refresh_startup_links()
-            else:
-                QMessageBox.critical(self, "Error", f"Failed to remove pattern: {response.get('error')}")
+            }, done)
 
     def on_startup_mode_changed(self):
         """Handle pattern selection from dropdown - update configuration options."""
@@ -601,30 +772,31 @@ class WOPRControlGUI(QMainWindow):
             )
             return
         
+        def started(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(
+                    f"✓ Started {pattern_name} (linked to {hook_name}, auto-starts on boot)", 5000
+                )
+                self.hook_start_btn.setText("✓ Running")
+                self.hook_start_btn.setEnabled(False)
+                self.hook_remove_btn.setEnabled(True)
+                self.refresh_startup_links()
+                self.refresh_status()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to start pattern: {response.get('error')}")
+        
+        def linked(response):
+            if not response.get("ok"):
+                QMessageBox.critical(self, "Error", f"Failed to add link: {response.get('error')}")
+                return
+            # Start the pattern immediately
+            self.send_ipc_command("start_pattern", {"name": pattern_name}, started)
+        
         # Add persistent link
-        response = self.send_ipc_command("add_persistent_link", {
+        self.send_ipc_command("add_persistent_link", {
             "hook_event_name": hook_name,
             "pattern_name": pattern_name
-        })
-        
-        if not response.get("ok"):
-            QMessageBox.critical(self, "Error", f"Failed to add link: {response.get('error')}")
-            return
-        
-        # Start the pattern immediately
-        response = self.send_ipc_command("start_pattern", {"name": pattern_name})
-        
-        if response.get("ok"):
-            self.status_bar.showMessage(
-                f"✓ Started {pattern_name} (linked to {hook_name}, auto-starts on boot)", 5000
-            )
-            self.hook_start_btn.setText("✓ Running")
-            self.hook_start_btn.setEnabled(False)
-            self.hook_remove_btn.setEnabled(True)
-            self.refresh_startup_links()
-            self.refresh_status()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to start pattern: {response.get('error')}")
+        }, linked)
 
     def remove_startup_link_with_stop(self):
         """Remove hook link and stop the pattern."""
@@ -649,27 +821,28 @@ class WOPRControlGUI(QMainWindow):
         if reply != QMessageBox.Yes:
             return
         
-        # Remove link
-        response = self.send_ipc_command("remove_persistent_link", {
-            "hook_event_name": hook_name
-        })
-        
-        if not response.get("ok"):
-            QMessageBox.critical(self, "Error", f"Failed to remove link: {response.get('error')}")
-            return
+        def stopped(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(f"Removed hook link and stopped pattern", 3000)
+                self.hook_start_btn.setText("Start & Auto-start on Boot")
+                self.hook_remove_btn.setEnabled(False)
+                self.hook_start_btn.setEnabled(True)
+                self.refresh_startup_links()
+                self.refresh_status()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to stop pattern: {response.get('error')}")
         
-        # Stop pattern
-        response = self.send_ipc_command("stop_pattern")
+        def unlinked(response):
+            if not response.get("ok"):
+                QMessageBox.critical(self, "Error", f"Failed to remove link: {response.get('error')}")
+                return
+            # Stop pattern
+            self.send_ipc_command("stop_pattern", callback=stopped)
         
-        if response.get("ok"):
-            self.status_bar.showMessage(f"Removed hook link and stopped pattern", 3000)
-            self.hook_start_btn.setText("Start & Auto-start on Boot")
-            self.hook_remove_btn.setEnabled(False)
-            self.hook_start_btn.setEnabled(True)
-            self.refresh_startup_links()
-            self.refresh_status()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to stop pattern: {response.get('error')}")
+        # Remove link
+        self.send_ipc_command("remove_persistent_link", {
+            "hook_event_name": hook_name
+        }, unlinked)
 
     def add_pattern_to_startup_with_start(self):
         """Add standalone pattern and immediately start it."""
@@ -688,28 +861,29 @@ class WOPRControlGUI(QMainWindow):
             )
             return
         
-        # Add to startup
-        response = self.send_ipc_command("add_pattern_to_startup", {
-            "pattern_name": pattern_name
-        })
-        
-        if not response.get("ok"):
-            QMessageBox.critical(self, "Error", f"Failed to add pattern: {response.get('error')}")
-            return
+        def started(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(
+                    f"✓ Started {pattern_name} (standalone, auto-starts on boot)", 5000
+                )
+                self.standalone_start_btn.setText("✓ Running")
+                self.standalone_start_btn.setEnabled(False)
+                self.standalone_remove_btn.setEnabled(True)
+                self.refresh_startup_links()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to start pattern: {response.get('error')}")
         
-        # Start the pattern immediately
-        response = self.send_ipc_command("start_pattern", {"name": pattern_name})
+        def added(response):
+            if not response.get("ok"):
+                QMessageBox.critical(self, "Error", f"Failed to add pattern: {response.get('error')}")
+                return
+            # Start the pattern immediately
+            self.send_ipc_command("start_pattern", {"name": pattern_name}, started)
         
-        if response.get("ok"):
-            self.status_bar.showMessage(
-                f"✓ Started {pattern_name} (standalone, auto-starts on boot)", 5000
-            )
-            self.standalone_start_btn.setText("✓ Running")
-            self.standalone_start_btn.setEnabled(False)
-            self.standalone_remove_btn.setEnabled(True)
-            self.refresh_startup_links()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to start pattern: {response.get('error')}")
+        # Add to startup
+        self.send_ipc_command("add_pattern_to_startup", {
+            "pattern_name": pattern_name
+        }, added)
 
     def remove_pattern_from_startup_with_stop(self):
         """Remove standalone pattern and stop it."""
@@ -731,26 +905,27 @@ class WOPRControlGUI(QMainWindow):
         if reply != QMessageBox.Yes:
             return
         
-        # Remove from startup
-        response = self.send_ipc_command("remove_pattern_from_startup", {
-            "pattern_name": pattern_name
-        })
-        
-        if not response.get("ok"):
-            QMessageBox.critical(self, "Error", f"Failed to remove pattern: {response.get('error')}")
-            return
+        def stopped(response):
+            if response.get("ok"):
+                self.status_bar.showMessage(f"Removed pattern from startup and stopped it", 3000)
+                self.standalone_start_btn.setText("Start & Auto-start on Boot")
+                self.standalone_remove_btn.setEnabled(False)
+                self.standalone_start_btn.setEnabled(True)
+                self.refresh_startup_links()
+            else:
+                QMessageBox.critical(self, "Error", f"Failed to stop pattern: {response.get('error')}")
         
-        # Stop pattern
-        response = self.send_ipc_command("stop_pattern")
+        def removed(response):
+            if not response.get("ok"):
+                QMessageBox.critical(self, "Error", f"Failed to remove pattern: {response.get('error')}")
+                return
+            # Stop pattern
+            self.send_ipc_command("stop_pattern", callback=stopped)
         
-        if response.get("ok"):
-            self.status_bar.showMessage(f"Removed pattern from startup and stopped it", 3000)
-            self.standalone_start_btn.setText("Start & Auto-start on Boot")
-            self.standalone_remove_btn.setEnabled(False)
-            self.standalone_start_btn.setEnabled(True)
-            self.refresh_startup_links()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to stop pattern: {response.get('error')}")
+        # Remove from startup
+        self.send_ipc_command("remove_pattern_from_startup", {
+            "pattern_name": pattern_name
+        }, removed)
 
 
 